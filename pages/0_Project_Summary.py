@@ -2,20 +2,14 @@
 import streamlit as st
 import pandas as pd
 
-from src.ui_common import sidebar
-from src.project_presizing import (
-    load_use_profiles, load_city_presets,
-    estimate_electrical_loads, estimate_hvac_capacities, estimate_hvac_electrical_kw, estimate_lifts_kw,
-    estimate_rain_flow_lps, estimate_tech_rooms_and_shafts, estimate_fixtures_from_occupancy,
-)
+from src.ui_common import sidebar, project_model, debug_panel
+from src.project_presizing import estimate_rain_flow_lps
 
 st.title("Project summary — auto pre-sizing")
 
 ctx = sidebar()
-use_profiles = load_use_profiles()
-city_presets = load_city_presets()
-prof = use_profiles.get(ctx["use_type"], {})
-cityp = city_presets.get(ctx["city"], city_presets.get("Custom", {}))
+model = project_model()
+cityp = model["city_preset"]
 
 st.markdown("## Inputs")
 st.write({
@@ -33,19 +27,19 @@ st.write({
 })
 
 st.markdown("## Space allowances")
-area_total = ctx["area_above_m2"] + ctx["area_below_m2"]
-allow = estimate_tech_rooms_and_shafts(area_total, ctx["floors_above"], prof)
+allow = model["allowances"]
 df_space = pd.DataFrame([
     {"Item": "Technical rooms (m²)", "Estimated": allow["tech_rooms_m2"], "Used (editable)": ctx["tech_rooms_m2"]},
     {"Item": "Shafts total (m²)", "Estimated": allow["shafts_m2"], "Used (editable)": ctx["shafts_m2"]},
     {"Item": "Shafts per storey (m²)", "Estimated": allow["shafts_m2_per_floor"], "Used (editable)": ctx["shafts_m2"] / max(1, ctx["floors_above"])},
+    {"Item": "of which smoke control risers (m²)", "Estimated": allow["fire_shafts_m2"], "Used (editable)": allow["fire_shafts_m2"]},
 ])
 st.dataframe(df_space, use_container_width=True)
 
 st.markdown("## Electrical (LV) — estimated connected loads")
-elec = estimate_electrical_loads(ctx["area_above_m2"], prof)
-hvac_kw, hvac_meta = estimate_hvac_electrical_kw(ctx["area_above_m2"], prof, design_summer_C=float(ctx.get("design_summer_C", 32.0)))
-lifts_kw, lifts_meta = estimate_lifts_kw(ctx["area_above_m2"], prof)
+elec = model["electrical_loads"]
+hvac_kw, hvac_meta = model["hvac_electrical"]
+lifts_kw, lifts_meta = model["lifts"]
 
 df_elec = pd.DataFrame([
     {"Component": "Lighting", "kW": elec["lighting_kw"]},
@@ -65,7 +59,7 @@ with st.expander("Electrical estimation assumptions"):
     st.write(lifts_meta)
 
 st.markdown("## HVAC — capacities (very simplified)")
-hv = estimate_hvac_capacities(ctx["area_above_m2"], prof, diversity=0.8, design_temp_C=float(cityp.get('design_temp_C', -10.0)))
+hv = model["hvac_capacities"]
 df_hvac = pd.DataFrame([
     {"Item": "Heating capacity (kW)", "Value": hv["heating_kw"]},
     {"Item": "Cooling capacity (kW)", "Value": hv["cooling_kw"]},
@@ -76,7 +70,7 @@ df_hvac = pd.DataFrame([
 st.dataframe(df_hvac, use_container_width=True)
 
 st.markdown("## Plumbing / DHW — starter fixtures (rule-of-thumb)")
-fixtures = estimate_fixtures_from_occupancy(ctx["use_type"], ctx["persons"])
+fixtures = model["fixtures"]
 df_fix = pd.DataFrame([{"Fixture": k, "Count (estimated)": v} for k, v in fixtures.items()])
 st.dataframe(df_fix, use_container_width=True)
 st.caption("These fixtures are only to seed pre-sizing. Verify against the design brief and applicable requirements.")
@@ -96,3 +90,5 @@ st.caption("Q = r · C · A, where r is in L/(s·ha) and A is roof area in hecta
 
 st.markdown("## Notes")
 st.info("All results are indicative and intended for early-stage pre-sizing. Always verify against the applicable standards and local requirements.")
+
+debug_panel()
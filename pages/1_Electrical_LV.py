@@ -1,14 +1,13 @@
 import streamlit as st
 
-from src.ui_common import sidebar
+from src.ui_common import sidebar, project_model, debug_panel
 from src.calcs_electrical import LoadItem, compute_demand, size_feeder, MOTOR_START_METHODS
-from src.project_presizing import load_use_profiles, estimate_hvac_electrical_kw, estimate_lifts_kw
 
 st.title("Electrical (LV) — pre-sizing")
 
 ctx = sidebar()
-use_profiles = load_use_profiles()
-prof = use_profiles.get(ctx.get("use_type", "Office"), {})
+model = project_model()
+prof = model["use_profile"]
 
 st.markdown("## Inputs")
 
@@ -57,8 +56,8 @@ auto_est = st.toggle(
 )
 
 if auto_est:
-    hvac_est_kw, hvac_meta = estimate_hvac_electrical_kw(float(ctx.get("area_above_m2", area)), prof, design_summer_C=float(ctx.get("design_summer_C", 32.0)))
-    lifts_est_kw, lifts_meta = estimate_lifts_kw(float(ctx.get("area_above_m2", area)), prof)
+    hvac_est_kw, hvac_meta = model["hvac_electrical"]
+    lifts_est_kw, lifts_meta = model["lifts"]
 
     hvac_kw = st.number_input("HVAC (kW) — estimated (editable)", min_value=0.0, value=float(round(hvac_est_kw, 2)), step=5.0)
     lifts_kw = st.number_input("Lifts (kW) — estimated (editable)", min_value=0.0, value=float(round(lifts_est_kw, 2)), step=2.0)
@@ -74,27 +73,6 @@ else:
     hvac_kw = st.number_input("HVAC (kW) — if known", min_value=0.0, value=0.0, step=5.0)
     lifts_kw = st.number_input("Lifts (kW) — if applicable", min_value=0.0, value=0.0, step=2.0)
 
-st.markdown("## Feeder sizing (simplified)")
-
-cA, cB, cC = st.columns(3)
-with cA:
-    v_ll = st.number_input("Voltage (V, L-L)", min_value=100.0, value=400.0, step=10.0)
-with cB:
-    length_m = st.number_input("Feeder length (m)", min_value=1.0, value=50.0, step=5.0)
-with cC:
-    max_vdrop = st.number_input("Max voltage drop (%)", min_value=1.0, value=3.0, step=0.5)
-
-st.markdown("### Motor (optional)")
-add_motor = st.checkbox("Include a motor starting check (informative)", value=False)
-motor_kw = 0.0
-motor_method = "Direct on line (DOL)"
-if add_motor:
-    cM1, cM2 = st.columns(2)
-    with cM1:
-        motor_kw = st.number_input("Motor power (kW)", min_value=0.0, value=15.0, step=1.0)
-    with cM2:
-        motor_method = st.selectbox("Start method", list(MOTOR_START_METHODS.keys()), index=0)
-
 # Build load list
 lighting_kw = area * lighting_wm2 / 1000.0
 sockets_kw = area * sockets_wm2 / 1000.0
@@ -103,53 +81,83 @@ other_kw = area * other_wm2 / 1000.0
 loads = [
     LoadItem("Lighting", lighting_kw, div_lighting),
     LoadItem("Sockets / small power", sockets_kw, div_sockets),
-    LoadItem("HVAC", float(hvac_kw), div_hvac),
-    LoadItem("Lifts", float(lifts_kw), div_lifts),
+    LoadItem("HVAC", hvac_kw, div_hvac),
+    LoadItem("Lifts", lifts_kw, div_lifts),
     LoadItem("Other", other_kw, div_other),
 ]
 
 p_dem_kw, df = compute_demand(loads)
 
-res = size_feeder(
-    p_dem_kw=p_dem_kw,
-    v_ll=float(v_ll),
-    length_m=float(length_m),
-    max_vdrop_pct=float(max_vdrop),
-    add_motor=bool(add_motor),
-    motor_kw=float(motor_kw),
-    motor_start_method=str(motor_method),
-)
 
-st.markdown("## Results")
+@st.fragment
+def feeder_block(p_dem_kw: float, df):
+    """Feeder inputs and results; editing them reruns only this block."""
+    st.markdown("## Feeder sizing (simplified)")
+
+    cA, cB, cC = st.columns(3)
+    with cA:
+        v_ll = st.number_input("Voltage (V, L-L)", min_value=100.0, value=400.0, step=10.0)
+    with cB:
+        length_m = st.number_input("Feeder length (m)", min_value=1.0, value=50.0, step=5.0)
+    with cC:
+        max_vdrop = st.number_input("Max voltage drop (%)", min_value=1.0, value=3.0, step=0.5)
+
+    st.markdown("### Motor (optional)")
+    add_motor = st.checkbox("Include a motor starting check (informative)", value=False)
+    motor_kw = 0.0
+    motor_method = "Direct on line (DOL)"
+    if add_motor:
+        cM1, cM2 = st.columns(2)
+        with cM1:
+            motor_kw = st.number_input("Motor power (kW)", min_value=0.0, value=15.0, step=1.0)
+        with cM2:
+            motor_method = st.selectbox("Start method", list(MOTOR_START_METHODS.keys()), index=0)
+
+    res = size_feeder(
+        p_dem_kw=p_dem_kw,
+        v_ll=v_ll,
+        length_m=length_m,
+        max_vdrop_pct=max_vdrop,
+        add_motor=add_motor,
+        motor_kw=motor_kw,
+        motor_start_method=motor_method,
+    )
+
+    st.markdown("## Results")
 
-k1, k2, k3, k4 = st.columns(4)
-with k1:
-    st.metric("Demand power (kW)", f"{res['P_dem_kW']:.1f}")
-with k2:
-    st.metric("Design current (A)", f"{res['I_design_A']:.0f}")
-with k3:
-    st.metric("Suggested section (mm²)", f"{res['Section_mm2']:.0f}")
-with k4:
-    st.metric("Voltage drop (%)", f"{res['Vdrop_pct']:.2f}")
+    k1, k2, k3, k4 = st.columns(4)
+    with k1:
+        st.metric("Demand power (kW)", f"{res['P_dem_kW']:.1f}")
+    with k2:
+        st.metric("Design current (A)", f"{res['I_design_A']:.0f}")
+    with k3:
+        st.metric("Suggested section (mm²)", f"{res['Section_mm2']:.0f}")
+    with k4:
+        st.metric("Voltage drop (%)", f"{res['Vdrop_pct']:.2f}")
 
-st.dataframe(df, use_container_width=True)
+    st.dataframe(df, use_container_width=True)
 
-st.markdown("### Approx. short-circuit (very rough)")
-st.write(f"Estimated end short-circuit current: **{res['Ik_end_A_approx']:.0f} A** (indicative only)")
+    st.markdown("### Approx. short-circuit (very rough)")
+    st.write(f"Estimated end short-circuit current: **{res['Ik_end_A_approx']:.0f} A** (indicative only)")
 
-if res.get("motor"):
-    st.markdown("### Motor starting (informative)")
-    st.write(res["motor"])
+    if res.get("motor"):
+        st.markdown("### Motor starting (informative)")
+        st.write(res["motor"])
 
-for a in res.get("advisories", []):
-    if a.level == "danger":
-        st.error(a.text)
-    elif a.level == "warning":
-        st.warning(a.text)
-    else:
-        st.info(a.text)
+    for a in res.get("advisories", []):
+        if a.level == "danger":
+            st.error(a.text)
+        elif a.level == "warning":
+            st.warning(a.text)
+        else:
+            st.info(a.text)
+
+
+feeder_block(p_dem_kw, df)
 
 st.info(
     "Pre-sizing only. Final design must verify short-circuit withstand, selectivity, installation conditions, "
     "correction factors and applicable VDE/DIN requirements."
 )
+
+debug_panel()
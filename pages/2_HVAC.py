@@ -1,8 +1,9 @@
 
 import streamlit as st
-import pandas as pd
-from src.ui_common import sidebar
+from src.ui_common import sidebar, project_model, debug_panel
 from src.calcs_hvac import DEFAULT_LOADS_W_M2, VENT_CAT, hvac_predim, ventilation_flow, hvac_advisories
+from src.data_catalog import city_preset
+from src.project_presizing import estimate_hvac_capacities
 from src.utils import advisories_to_df
 from src.sources import SOURCES
 
@@ -35,15 +36,23 @@ cA.metric("Heating capacity (kW)", f"{loads['Q_heat_kW']:.1f}")
 cB.metric("Cooling capacity (kW)", f"{loads['Q_cool_kW']:.1f}")
 
 st.subheader("2) Ventilation (DIN EN 16798-1) — simple person + m² method")
-persons = st.number_input("Occupancy (persons)", min_value=0, value=100, step=5)
-category = st.selectbox("Indoor air quality category", list(VENT_CAT.keys()), index=1)
-vent = ventilation_flow(area, persons, category)
 
-v1, v2 = st.columns(2)
-v1.metric("Outdoor air flow (L/s)", f"{vent['q_outdoor_lps']:.0f}")
-v2.metric("Outdoor air flow (m³/h)", f"{vent['q_outdoor_m3h']:.0f}")
 
-st.caption("Note: values are typical examples by category; adjust per use/method/materials and applicable standard text.")
+@st.fragment
+def ventilation_block(area: float):
+    """Occupancy / category inputs rerun only this block."""
+    persons = st.number_input("Occupancy (persons)", min_value=0, value=100, step=5)
+    category = st.selectbox("Indoor air quality category", list(VENT_CAT.keys()), index=1)
+    vent = ventilation_flow(area, persons, category)
+
+    v1, v2 = st.columns(2)
+    v1.metric("Outdoor air flow (L/s)", f"{vent['q_outdoor_lps']:.0f}")
+    v2.metric("Outdoor air flow (m³/h)", f"{vent['q_outdoor_m3h']:.0f}")
+
+    st.caption("Note: values are typical examples by category; adjust per use/method/materials and applicable standard text.")
+
+
+ventilation_block(area)
 
 st.subheader("3) Alerts and out-of-scope")
 st.dataframe(advisories_to_df(hvac_advisories(use)), use_container_width=True)
@@ -57,7 +66,7 @@ st.warning("For final design: standards-based load calculations, equipment selec
 
 
 st.markdown("## Climate-aware ventilation (pre-sizing)")
-vent = estimate_ventilation_flow_m3h(float(ctx.get("area_above_m2", area)), int(ctx.get("persons", 0)), str(ctx.get("vent_cat", "Cat II")))
+vent = project_model()["ventilation"]
 st.write({
     "Indoor air category": vent["vent_cat"],
     "qp (L/s·person)": vent["qp_Ls_per_person"],
@@ -68,23 +77,17 @@ st.write({
 
 st.markdown("## HVAC capacities including ventilation sensitivity (pre-sizing)")
 # Winter design temperature uses city preset already present in app context.
-try:
-    import json
-    from pathlib import Path
-    _cp = json.load(open(Path(__file__).resolve().parent.parent / "data" / "city_presets.json", "r", encoding="utf-8"))
-    t_winter = float(_cp.get(ctx.get("city","Custom"), {}).get("design_temp_C", -10.0))
-except Exception:
-    t_winter = -10.0
-
-t_summer = float(ctx.get("design_summer_C", 32.0))
+t_winter = float(city_preset(ctx.get("city", "Custom")).get("design_temp_C", -10.0))
+
+t_summer = ctx["design_summer_C"]
 hv = estimate_hvac_capacities(
-    float(ctx.get("area_above_m2", area)),
+    ctx["area_above_m2"],
     {"heating_W_m2": heat_wm2, "cooling_W_m2": cool_wm2},
-    diversity=float(div),
-    design_temp_C=float(t_winter),
-    persons=int(ctx.get("persons", 0)),
-    vent_cat=str(ctx.get("vent_cat", "Cat II")),
-    design_summer_C=float(t_summer),
+    diversity=diversity,
+    design_temp_C=t_winter,
+    persons=ctx["persons"],
+    vent_cat=ctx["vent_cat"],
+    design_summer_C=t_summer,
 )
 
 st.write({
@@ -98,3 +101,5 @@ st.write({
 })
 
 st.caption("Ventilation flow is driven mainly by IAQ category and occupancy (EN 16798 example). Climate affects the energy to condition the outdoor air; this section applies a simplified sensitivity using design temperatures.")
+
+debug_panel()
@@ -1,8 +1,10 @@
 
 import streamlit as st
 import pandas as pd
-from src.ui_common import sidebar
+from src.ui_common import debug_panel, sidebar
 from src.calcs_plumbing import FIXTURE_DEFAULTS, peak_flow_lps, suggest_pipe_diameter_mm, acs_energy_kwh_per_day, plumbing_advisories
+from src.calcs_circulation import circulation_balance
+from src.project_presizing import estimate_fixtures_from_occupancy
 from src.utils import advisories_to_df
 from src.sources import SOURCES
 
@@ -11,9 +13,9 @@ ctx = sidebar()
 
 st.caption('Tip: you can seed fixtures from the project occupancy (rule-of-thumb).')
 if st.button('Apply suggested fixtures from occupancy'):
-    suggested = estimate_fixtures_from_occupancy(ctx.get('use_type','Office'), int(ctx.get('persons',0)))
+    suggested = estimate_fixtures_from_occupancy(ctx['use_type'], ctx['persons'])
     for k,v in suggested.items():
-        st.session_state[f'fix_{k}'] = int(v)
+        st.session_state[f'fix_{k}'] = v
 
 
 st.subheader("1) Fixtures and peak flow (simplified method)")
@@ -23,8 +25,9 @@ cols = st.columns(3)
 fixtures = {}
 keys=list(FIXTURE_DEFAULTS.keys())
 for i,k in enumerate(keys):
+    st.session_state.setdefault(f"fix_{k}", 10 if k=="WC cistern" else 5)
     with cols[i%3]:
-        fixtures[k] = st.number_input(k, min_value=0, value=10 if k=="WC cistern" else 5, step=1)
+        fixtures[k] = st.number_input(k, min_value=0, step=1, key=f"fix_{k}")
 
 sim = st.number_input("Global simultaneity factor (0.1–1.0)", min_value=0.1, max_value=1.0, value=0.35, step=0.05)
 flows = peak_flow_lps(fixtures, sim)
@@ -49,10 +52,35 @@ if acs_on:
     e = acs_energy_kwh_per_day(persons, lpp, deltaT, eff)
     st.metric("DHW energy (kWh/day)", f"{e:.0f}")
 
-st.subheader("4) Alerts and sources")
+st.subheader("4) DHW circulation (60/55 °C, W 553-style)")
+st.caption("One row per segment. `parent` is the row id (left column) of the upstream segment (-1 = leaving the heater); "
+           "ids are kept when rows are deleted. Incomplete rows are ignored. Return pipe assumed alongside supply.")
+seg_default = pd.DataFrame({
+    "parent": [-1, 0, 0, 1, 1],
+    "length_m": [25.0, 12.0, 18.0, 30.0, 30.0],
+    "d_inner_mm": [26.0, 20.0, 16.0, 13.0, 13.0],
+    "insulation_mm": [30.0, 20.0, 20.0, 20.0, 20.0],
+    "t_ambient_C": [20.0, 20.0, 20.0, 22.0, 22.0],
+})
+segments = st.data_editor(seg_default, num_rows="dynamic", use_container_width=True, key="circ_segments")
+try:
+    circ = circulation_balance(segments.dropna())
+except ValueError as e:
+    st.error(f"Invalid circulation network: {e}")
+else:
+    k1, k2, k3 = st.columns(3)
+    k1.metric("Heat loss total (W)", f"{circ['heat_loss_total_W']:.0f}")
+    k2.metric("Circulation flow (m³/h)", f"{circ['flow_total_m3h']:.3f}")
+    k3.metric("Pump head (kPa)", f"{circ['pump_head_kPa']:.1f}")
+    st.dataframe(circ["segments"], use_container_width=True)
+    st.dataframe(advisories_to_df(circ["advisories"]), use_container_width=True)
+
+st.subheader("5) Alerts and sources")
 st.dataframe(advisories_to_df(plumbing_advisories()), use_container_width=True)
 
 with st.expander("Sources (water)"):
     for sid in ["DIN1988_300_PDF","ZVSHK_T110_PDF","EN806_3_CATALOG"]:
         s=SOURCES[sid]
         st.write(f"- **{sid}** ({s.kind}): {s.title} — {s.url} — accessed {s.accessed}")
+
+debug_panel()
@@ -1,7 +1,12 @@
 
 import streamlit as st
-from src.ui_common import sidebar
-from src.calcs_drainage import rain_flow_lps, suggest_rain_pipe_d_mm, drainage_advisories
+import numpy as np
+import pandas as pd
+from src.ui_common import debug_panel, sidebar
+from src.calcs_drainage import rain_flow_lps, suggest_rain_pipe_d_mm, suggest_rain_pipe_dn, drainage_advisories
+from src.calcs_rain_tank import simulate_tanks
+from src.calcs_wastewater import DISCHARGE_UNITS, FREQUENCY_FACTOR_K, du_network
+from src.rainfall_grid import rain_grid_available, rain_intensity_l_s_ha
 from src.utils import advisories_to_df
 from src.sources import SOURCES
 
@@ -12,28 +17,124 @@ with st.expander('Project defaults'):
     st.write("Roof area (m²):", ctx.get("roof_area_m2"))
 
 
-tab1, tab2 = st.tabs(["Rainwater", "Wastewater (basic)"])
+tab1, tab2, tab3 = st.tabs(["Rainwater", "Wastewater (EN 12056-2 DU)", "Retention / harvesting tank"])
 
-with tab1:
+@st.fragment
+def rainwater_block():
+    """Roof flow and collector sizing; its inputs rerun only this block."""
     st.subheader("1) Rainwater flow")
     area = st.number_input("Effective roof area (m²)", min_value=0.0, value=800.0, step=10.0)
-    r = st.number_input("Rain intensity r (L/s·m²)", min_value=0.001, value=0.03, step=0.005,
-                        help="Local value per adopted method (e.g., KOSTRA/DWD). Here used as input.")
+    r_sources = ["Manual input"] + (["KOSTRA-style rain grid"] if rain_grid_available() else [])
+    r_source = st.radio("Rain intensity source", r_sources, horizontal=True,
+                        help="The rain grid is used when a local dataset is present in data/kostra/.")
+    if r_source == "Manual input":
+        r = st.number_input("Rain intensity r (L/s·m²)", min_value=0.001, value=0.03, step=0.005,
+                            help="Local value per adopted method (e.g., KOSTRA/DWD). Here used as input.")
+    else:
+        k1, k2, k3 = st.columns(3)
+        with k1:
+            loc = st.text_input("Postcode or 'lat, lon'", value="")
+        with k2:
+            dur = st.number_input("Duration D (min)", min_value=5.0, max_value=1440.0, value=5.0, step=5.0)
+        with k3:
+            tr = st.number_input("Return period T (a)", min_value=1.0, max_value=100.0, value=5.0, step=1.0)
+        r = 0.03
+        if loc.strip():
+            try:
+                location = tuple(float(x) for x in loc.split(",")) if "," in loc else loc.strip()
+                r = rain_intensity_l_s_ha(location, dur, tr) / 10000.0
+                st.caption(f"r({dur:.0f} min, {tr:.0f} a) = {r * 10000.0:.0f} L/(s·ha)")
+            except (KeyError, ValueError) as e:
+                st.error(f"Rain grid lookup failed: {e}")
     q = rain_flow_lps(area, r)
     st.metric("Rainwater flow (L/s)", f"{q:.1f}")
 
-    st.subheader("2) Indicative diameter")
-    v = st.number_input("Velocity (m/s) (indicative)", min_value=0.5, max_value=5.0, value=2.0, step=0.1)
-    d = suggest_rain_pipe_d_mm(q, v)
-    st.metric("Equivalent internal diameter (mm)", f"{d:.0f}")
+    st.subheader("2) Gravity collector (partial filling, Prandtl–Colebrook)")
+    g1, g2, g3 = st.columns(3)
+    with g1:
+        slope = st.number_input("Slope (%)", min_value=0.5, max_value=10.0, value=1.0, step=0.5, key="rain_slope")
+    with g2:
+        max_fill = st.number_input("Max filling ratio h/d", min_value=0.3, max_value=0.9, value=0.7, step=0.05)
+    with g3:
+        kb = st.number_input("Roughness kb (mm)", min_value=0.1, max_value=1.5, value=1.0, step=0.25)
+    gp = suggest_rain_pipe_dn(q, slope, max_fill, kb)
+    p1, p2, p3 = st.columns(3)
+    p1.metric("DN", f"{gp['DN']:.0f}" if gp["DN"] > 0 else "> DN 300")
+    p2.metric("Filling ratio h/d", f"{gp['filling_ratio']:.2f}")
+    p3.metric("Velocity (m/s)", f"{gp['velocity_m_s']:.2f}")
+
+    with st.expander("Full-flow equivalent diameter (siphonic / pressurised view)"):
+        v = st.number_input("Velocity (m/s) (indicative)", min_value=0.5, max_value=5.0, value=2.0, step=0.1)
+        d = suggest_rain_pipe_d_mm(q, v)
+        st.metric("Equivalent internal diameter (mm)", f"{d:.0f}")
     st.caption("Select a commercial DN and verify against the applicable standard (EN 12056 / DIN 1986-100) and the chosen solution (siphonic / gravity).")
 
+
+with tab1:
+    rainwater_block()
+
 with tab2:
-    st.subheader("Basic")
-    st.info("For internal wastewater, a detailed fixture-based method is required (EN 12056-2). This tab is limited to alerts and scope.")
-    st.dataframe(advisories_to_df(drainage_advisories()), use_container_width=True)
+    st.subheader("1) Fixtures (discharge units, System I)")
+    fx_default = pd.DataFrame({"fixture": list(DISCHARGE_UNITS.keys()), "count": [0] * len(DISCHARGE_UNITS)})
+    fx_default.loc[fx_default["fixture"] == "Washbasin", "count"] = 40
+    fx_default.loc[fx_default["fixture"] == "WC (6 L cistern)", "count"] = 40
+    fx_edit = st.data_editor(fx_default, use_container_width=True, key="du_fixtures", disabled=["fixture"])
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        k_use = st.selectbox("Frequency of use (K)", list(FREQUENCY_FACTOR_K.keys()), index=0)
+    with c2:
+        n_stacks = st.number_input("Number of stacks", min_value=1, value=2, step=1)
+    with c3:
+        slope = st.number_input("Collector slope (%)", min_value=0.5, max_value=5.0, value=1.0, step=0.5)
+
+    # Simple layout: one collector to the outlet, fixtures spread evenly over the stacks
+    n_stacks = int(n_stacks)
+    seg = pd.DataFrame({
+        "parent": [-1] + [0] * n_stacks,
+        "kind": ["collector"] + ["stack"] * n_stacks,
+        "slope_pct": [float(slope)] * (n_stacks + 1),
+    })
+    fx = fx_edit[fx_edit["count"] > 0]
+    fx_rows = pd.DataFrame({
+        "segment": [1 + i for i in range(n_stacks) for _ in range(len(fx))],
+        "fixture": list(fx["fixture"]) * n_stacks,
+        "count": list(fx["count"] / n_stacks) * n_stacks,
+    })
+    ww = du_network(seg, fx_rows, k=FREQUENCY_FACTOR_K[k_use])
+
+    st.subheader("2) Results")
+    m1, m2, m3 = st.columns(3)
+    m1.metric("ΣDU", f"{ww['sum_du']:.1f}")
+    m2.metric("Q outlet (L/s)", f"{ww['q_outlet_lps']:.2f}")
+    m3.metric("Collector DN", f"{int(ww['segments']['DN'][0])}")
+    st.dataframe(ww["segments"], use_container_width=True)
+    st.dataframe(advisories_to_df(ww["advisories"] + drainage_advisories()), use_container_width=True)
+
+with tab3:
+    st.subheader("Continuous tank simulation")
+    st.caption("Upload a rainfall series as CSV with columns `time` and `rain_mm` (rain depth per time step, e.g. 5-minute data). "
+               "All tank volumes are simulated in one pass.")
+    up = st.file_uploader("Rainfall series (CSV)", type=["csv"])
+    t1, t2, t3 = st.columns(3)
+    with t1:
+        tank_area = st.number_input("Connected area (m²)", min_value=0.0, value=float(ctx.get("roof_area_m2", 800.0)), step=10.0)
+        tank_c = st.number_input("Runoff coefficient C", min_value=0.1, max_value=1.0, value=0.9, step=0.05, key="tank_c")
+    with t2:
+        throttle = st.number_input("Throttled outflow (L/s)", min_value=0.0, value=0.0, step=0.5)
+        demand = st.number_input("Harvesting demand (L/day)", min_value=0.0, value=1000.0, step=100.0)
+    with t3:
+        dt = st.number_input("Time step (min)", min_value=1.0, value=5.0, step=1.0)
+        v_max = st.number_input("Largest tank volume (m³)", min_value=1.0, value=30.0, step=1.0)
+    if up is not None:
+        sim = simulate_tanks(up, tank_area, np.linspace(v_max / 20.0, v_max, 20), tank_c, throttle, demand, dt)
+        st.write(f"Simulated {sim['years']:.1f} years ({sim['steps']:,} steps).")
+        st.dataframe(sim["tanks"], use_container_width=True)
+        st.dataframe(advisories_to_df(sim["advisories"]), use_container_width=True)
 
 with st.expander("Sources (drainage)"):
     for sid in ["DIN1986_100_OVERVIEW_AENOR","EN12056_INTERTEK"]:
         s=SOURCES[sid]
         st.write(f"- **{sid}** ({s.kind}): {s.title} — {s.url} — accessed {s.accessed}")
+
+debug_panel()
@@ -1,12 +1,20 @@
 
 import streamlit as st
-from src.ui_common import sidebar
+import numpy as np
+import pandas as pd
+from src.ui_common import debug_panel, project_model, sidebar
 from src.calcs_fire import fire_predim
+from src.data_catalog import fire_rules
+from src.fire_rules import screen_buildings
+from src.calcs_sprinkler import HAZARD_CLASSES, grid_network, sprinkler_design
+from src.calcs_smoke import PRESSURIZATION_CLASSES, building_storeys, smoke_control
+from src.calcs_layout import DEVICE_RULES, layout_devices, load_floor_plates
 from src.utils import advisories_to_df
 from src.sources import SOURCES
 
 st.title("Fire protection / Brandschutz — pre-sizing (very limited)")
 ctx = sidebar()
+model = project_model()
 
 st.warning("This module does NOT replace a fire safety concept nor a specific design project. It only helps you decide when to escalate to a specialist.")
 
@@ -15,10 +23,19 @@ area = st.number_input("Approx. gross area (m²)", min_value=0.0, value=6000.0,
 stories = st.number_input("No. of above-ground storeys", min_value=1, value=8, step=1)
 und = st.checkbox("Basement/underground areas?", value=True)
 
-res = fire_predim(use, area, int(stories), und)
+res = fire_predim(use, area, int(stories), und, bundesland=ctx.get("bundesland", "Generic (Germany)"), persons=int(ctx.get("persons", 0)))
 
 st.subheader("Result")
+state = ctx.get("bundesland", "Generic (Germany)")
+entry = fire_rules()["states"].get(state, {})
+st.caption(f"Decision tables: {state} (data/fire_rules.json, indicative)"
+           + (f" — MBO table only, no {entry.get('code', state)} deviations encoded" if entry.get("extends") and not entry.get("rules") else ""))
 st.write("**Requires specialist:**", "Yes" if res["needs_specialist"] else "Most likely yes")
+f1, f2, f3, f4 = st.columns(4)
+f1.metric("Building class", res["building_class"] or "—")
+f2.metric("Sonderbau", "Yes" if res["sonderbau"] else "No")
+f3.metric("Sprinklers", "Required" if res["sprinkler"] else "Not triggered")
+f4.metric("Fire alarm (BMA)", "Required" if res["alarm"] else "Not triggered")
 st.write("**Reasons:**")
 for r in res["reasons"]:
     st.write(f"- {r}")
@@ -26,7 +43,110 @@ for r in res["reasons"]:
 st.subheader("Alerts")
 st.dataframe(advisories_to_df(res["advisories"]), use_container_width=True)
 
+st.subheader("Portfolio screening")
+st.caption("CSV with one row per building: bundesland, use, gross_area_m2, storeys, and optionally floors_below, height_m, "
+           "largest_storey_area_m2, max_unit_area_m2, units, persons, sales_area_m2, beds, max_room_persons.")
+up = st.file_uploader("Buildings (CSV)", type=["csv"])
+if up is not None:
+    portfolio = pd.read_csv(up)
+    screened = screen_buildings(portfolio)
+    screened["reasons"] = screened["reasons"].str.join("; ")
+    screened["matched"] = screened["matched"].str.join(", ")
+    st.dataframe(pd.concat([portfolio, screened], axis=1), use_container_width=True)
+
+st.subheader("Sprinkler hydraulics (pre-sizing)")
+st.caption("Gridded system: branch lines fed from mains at both ends. Upload your own network (nodes/pipes CSV) to replace the grid.")
+s1, s2, s3 = st.columns(3)
+hazard = s1.selectbox("Hazard class", list(HAZARD_CLASSES), index=3)
+k_factor = s2.number_input("K-factor (L/min·bar^0.5)", min_value=40.0, value=80.0, step=5.0)
+area_head = s3.number_input("Area per head (m²)", min_value=6.0, max_value=21.0, value=12.0, step=0.5)
+g1, g2, g3, g4 = st.columns(4)
+nx = g1.number_input("Heads per branch line", min_value=2, value=10, step=1)
+ny = g2.number_input("Branch lines", min_value=2, value=8, step=1)
+d_branch = g3.number_input("Branch DN (mm)", min_value=20.0, value=32.0, step=5.0)
+d_main = g4.number_input("Main DN (mm)", min_value=40.0, value=80.0, step=5.0)
+c1, c2 = st.columns(2)
+up_nodes = c1.file_uploader("Nodes (CSV: x, y, z_m, is_head[, k_factor])", type=["csv"])
+up_pipes = c2.file_uploader("Pipes (CSV: from, to, length_m, d_mm[, c])", type=["csv"])
+if up_nodes is not None and up_pipes is not None:
+    sp_nodes, sp_pipes = pd.read_csv(up_nodes), pd.read_csv(up_pipes)
+    sp_src = st.number_input("Source node (row)", min_value=0, max_value=len(sp_nodes) - 1, value=0, step=1)
+else:
+    sp_nodes, sp_pipes, sp_src = grid_network(int(nx), int(ny), spacing_m=area_head ** 0.5, d_branch_mm=d_branch, d_main_mm=d_main)
+spr = sprinkler_design(sp_nodes, sp_pipes, int(sp_src), hazard=hazard, area_per_head_m2=area_head, k_factor=k_factor)
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("Supply pressure (bar)", f"{spr['supply_pressure_bar']:.2f}")
+m2.metric("Design flow (m³/h)", f"{spr['flow_m3h']:.1f}")
+m3.metric("Water supply (m³)", f"{spr['tank_m3']:.0f}", help=f"{spr['duration_min']:.0f} min operating time")
+m4.metric("Max pipe velocity (m/s)", f"{spr['pipe_velocity_m_s'].max():.1f}")
+with st.expander("Design area heads"):
+    st.dataframe(spr["design_area_heads"], use_container_width=True)
+st.dataframe(advisories_to_df(spr["advisories"]), use_container_width=True)
+
+st.subheader("Detector & sprinkler head layout")
+st.caption("Floor plates in local metric coordinates: GeoJSON (Polygon/MultiPolygon with a 'storey' property) or CSV "
+           "(storey, polygon, ring, x, y). Without a file, each storey is a 2:1 rectangle of the project floor area.")
+l1, l2 = st.columns([2, 1])
+device = l1.selectbox("Device", list(DEVICE_RULES), index=0)
+up_plates = l2.file_uploader("Floor plates", type=["geojson", "json", "csv"])
+if up_plates is not None:
+    plates = load_floor_plates(up_plates)
+else:
+    fa = max(1, int(ctx.get("floors_above", int(stories))))
+    plate_m2 = float(ctx.get("area_above_m2", area)) / fa
+    w = max(1.0, (plate_m2 / 2.0) ** 0.5)
+    rect = np.array([[0.0, 0.0], [2 * w, 0.0], [2 * w, w], [0.0, w]])
+    plates = {f"L{i:02d}": [[rect]] for i in range(fa)}
+lay = layout_devices(plates, device)
+d1, d2 = st.columns(2)
+d1.metric("Devices (total)", f"{lay['total']:,}")
+d2.metric("Distinct floor plates", lay["unique_plates"])
+st.dataframe(lay["storeys"], use_container_width=True)
+with st.expander("Device positions (one storey)"):
+    show = st.selectbox("Storey", list(lay["positions"]))
+    st.scatter_chart(pd.DataFrame(lay["positions"][show], columns=["x", "y"]), x="x", y="y")
+st.dataframe(advisories_to_df(lay["advisories"]), use_container_width=True)
+
+st.subheader("Smoke extraction & stair pressurization (pre-sizing)")
+st.caption("Storeys from the project definition. Applied riser areas are added to the shaft allowance in the sidebar and summary.")
+h1, h2, h3, h4 = st.columns(4)
+storey_h = h1.number_input("Storey height (m)", min_value=2.5, value=3.5, step=0.1)
+perimeter = h2.number_input("Design fire perimeter (m)", min_value=4.0, value=12.0, step=1.0)
+p_class = h3.selectbox("Pressurization class (EN 12101-6)", list(PRESSURIZATION_CLASSES), index=2)
+smoke_all = h4.checkbox("Smoke extraction on all storeys", value=bool(res["sonderbau"]))
+storeys_df = building_storeys(ctx.get("area_above_m2", area), ctx.get("area_below_m2", 0.0),
+                              ctx.get("floors_above", int(stories)), ctx.get("floors_below", 0), storey_h)
+storeys_df["smoke_extraction"] = smoke_all | (storeys_df["level"] < 0)
+n_st = len(storeys_df)
+stairs_df = st.data_editor(pd.DataFrame({
+    "stair": ["Stair 1", "Stair 2"],
+    "from_storey": [0, 0],
+    "to_storey": [n_st - 1, n_st - 1],
+    "doors_per_storey": [1, 1],
+    "door_leak_m2": [0.01, 0.01],
+    "wall_leak_m2": [0.005, 0.005],
+    "door_area_m2": [2.0, 2.0],
+    "open_doors": [1, 1],
+}), num_rows="dynamic", use_container_width=True, key="stairs_editor")
+smoke = smoke_control(storeys_df, stairs_df.dropna(subset=["stair"]), fire_perimeter_m=perimeter, pressurization_class=p_class)
+k1, k2, k3 = st.columns(3)
+k1.metric("Smoke extract fan (m³/h)", f"{smoke['extract_fan_m3h']:,.0f}")
+k2.metric("Pressurization supply (m³/h)", f"{smoke['pressurization_m3h']:,.0f}")
+k3.metric("Risers per storey (m²)", f"{smoke['shaft_m2_per_floor']:.2f}")
+st.dataframe(smoke["stairs"], use_container_width=True)
+with st.expander("Per storey"):
+    st.dataframe(smoke["storeys"], use_container_width=True)
+st.dataframe(advisories_to_df(smoke["advisories"]), use_container_width=True)
+apply_risers = st.toggle("Apply riser areas to the project (shaft allowance)",
+                         value=model.get("fire_shafts_m2_per_floor") > 0, key="fire_apply_risers")
+risers_m2 = smoke["shaft_m2_per_floor"] if apply_risers else 0.0
+if abs(model.get("fire_shafts_m2_per_floor") - risers_m2) > 1e-6:
+    model.set(fire_shafts_m2_per_floor=risers_m2)
+    st.rerun()
+
 with st.expander("Sources (fire)"):
     for sid in ["VDS_DIN14675","VDS_SPRINKLER_GUIDELINE","VDS_CEA4001_PDF"]:
         s=SOURCES[sid]
         st.write(f"- **{sid}** ({s.kind}): {s.title} — {s.url} — accessed {s.accessed}")
+
+debug_panel()
@@ -3,14 +3,26 @@ import streamlit as st
 import pandas as pd
 import tempfile, os
 
-from src.ui_common import sidebar
-from src.reporting import build_pdf
+from src.ui_common import debug_panel, project_model, sidebar
 from src.sources import SOURCES
 
 st.title("Export (PDF / CSV)")
 ctx = sidebar()
 
-st.info("This module exports a simple PDF with an executive summary and a table you paste here. For complete results, export CSV from each module and attach them to your calculation note.")
+st.info("Export all module results of the current project (workbook / Parquet / Arrow), or a simple PDF with an executive summary and a table you paste here.")
+
+st.subheader("Project results (all modules)")
+formats = {"Workbook (.xlsx)": "xlsx", "Parquet dataset (.zip)": "parquet", "Arrow IPC (.zip)": "arrow"}
+fmt_label = st.radio("Format", list(formats), horizontal=True)
+if st.button("Prepare results export"):
+    from src.export import export_bytes, project_results  # pyarrow loads only when exporting
+
+    fmt = formats[fmt_label]
+    data = export_bytes([project_results(project_model().inputs())], fmt)
+    name, mime = ("mep_results.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet") if fmt == "xlsx" \
+        else (f"mep_results_{fmt}.zip", "application/zip")
+    st.download_button(f"Download {fmt_label}", data, file_name=name, mime=mime)
+st.caption("One table per module (project, electrical, HVAC, plumbing, drainage, fire). For a portfolio use `python -m src.batch projects.csv -o results.parquet` (or .arrow / .xlsx).")
 
 
 st.subheader("1) Paste a table (CSV) to export")
@@ -35,6 +47,8 @@ exec_summary = {
 }
 
 if st.button("Generate PDF"):
+    from src.reporting import build_pdf  # reportlab loads only when a PDF is requested
+
     with tempfile.TemporaryDirectory() as td:
         pdf_path = os.path.join(td, "predim_report.pdf")
         build_pdf(
@@ -47,3 +61,5 @@ if st.button("Generate PDF"):
             st.download_button("Download PDF", f, file_name="predim_report.pdf", mime="application/pdf")
 
 st.download_button("Download CSV", df.to_csv(index=False).encode("utf-8"), file_name="table.csv", mime="text/csv")
+
+debug_panel()
@@ -0,0 +1,83 @@
+
+import streamlit as st
+import pandas as pd
+
+from src import data_catalog
+from src.ui_common import apply_project_inputs, debug_panel, project_model, sidebar
+from src.project_store import DEFAULT_PATH, ProjectStore
+
+st.title("Project store — saved projects")
+ctx = sidebar()
+model = project_model()
+
+PAGE_SIZE = 200
+LIST_COLUMNS = ["name", "city", "use_type", "area_total_m2", "elec_demand_w_m2", "heating_w_m2", "cooling_w_m2",
+                "fire_building_class", "updated_at"]
+LABELS = {"id": "ID", "name": "Name", "city": "City", "use_type": "Use", "area_total_m2": "Area total (m²)",
+          "elec_demand_w_m2": "Electrical demand (W/m²)", "heating_w_m2": "Heating (W/m²)",
+          "cooling_w_m2": "Cooling (W/m²)", "fire_building_class": "Building class", "updated_at": "Saved (UTC)"}
+
+st.caption(f"Local SQLite file: {DEFAULT_PATH} (set MEP_PROJECT_DB to change). "
+           "Bulk import: `python -m src.project_store import projects.csv`.")
+
+with ProjectStore() as store:
+    st.subheader("1) Save the current project")
+    current_id = st.session_state.get("_store_project_id")
+    name = st.text_input("Project name", value=st.session_state.get("_store_name", f"{ctx['city']} {ctx['use_type']}"))
+    c1, c2 = st.columns(2)
+    save = c1.button("Save" if current_id else "Save new", help="Updates the loaded project; only changed fields are written.")
+    save_new = c2.button("Save as new project", disabled=current_id is None)
+    if save or save_new:
+        pid, changed = store.save(model.inputs(), name=name, project_id=None if save_new else current_id)
+        st.session_state["_store_project_id"] = pid
+        st.session_state["_store_name"] = name
+        st.session_state.pop("_store_rows", None)
+        if not changed:
+            st.info(f"Project #{pid}: no changes to save.")
+        elif save and current_id:
+            st.success(f"Project #{pid} updated: {', '.join(changed)}")
+        else:
+            st.success(f"Saved as project #{pid}.")
+    elif current_id:
+        st.caption(f"Loaded project: #{current_id}")
+
+    st.subheader("2) Find projects")
+    f1, f2, f3, f4 = st.columns(4)
+    city = f1.selectbox("City", ["Any"] + list(data_catalog.city_presets().keys()))
+    use = f2.selectbox("Use", ["Any"] + list(data_catalog.use_profiles().keys()))
+    min_area = f3.number_input("Min. area (m²)", min_value=0.0, value=0.0, step=1000.0)
+    max_area = f4.number_input("Max. area (m², 0 = no limit)", min_value=0.0, value=0.0, step=1000.0)
+    filters = {
+        "city": None if city == "Any" else city,
+        "use_type": None if use == "Any" else use,
+        "min_area": min_area or None,
+        "max_area": max_area or None,
+    }
+
+    # Rows are loaded in id-ordered batches and kept for the session; "Load more" fetches the next one
+    if st.session_state.get("_store_filters") != filters:
+        st.session_state["_store_filters"] = filters
+        st.session_state.pop("_store_rows", None)
+    if "_store_rows" not in st.session_state:
+        st.session_state["_store_rows"] = store.query(LIST_COLUMNS, limit=PAGE_SIZE, **filters)
+    rows = st.session_state["_store_rows"]
+    total = store.count(**filters)
+    if len(rows) < total and st.button(f"Load {min(PAGE_SIZE, total - len(rows))} more"):
+        rows.extend(store.query(LIST_COLUMNS, after_id=rows[-1]["id"], limit=PAGE_SIZE, **filters))
+
+    st.write(f"{total:,} matching projects, {len(rows):,} shown")
+    if rows:
+        df = pd.DataFrame(rows).rename(columns=LABELS)
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+        st.subheader("3) Open a stored project")
+        by_id = {r["id"]: r for r in rows}
+        pick = st.selectbox("Project", list(by_id), format_func=lambda i: f"#{i} — {by_id[i]['name']}")
+        if st.button("Load into sidebar"):
+            stored = store.load(pick)
+            apply_project_inputs(stored)
+            st.session_state["_store_project_id"] = pick
+            st.session_state["_store_name"] = stored["name"]
+            st.rerun()
+
+debug_panel()
@@ -0,0 +1,49 @@
+
+import streamlit as st
+import pandas as pd
+
+from src.ui_common import apply_project_inputs, debug_panel, scenarios, sidebar
+from src.scenarios import RESULTS, compare
+
+st.title("Scenarios — compare variants")
+ctx = sidebar()
+tree = scenarios()
+
+st.caption("Branch, switch and undo in the sidebar (“Scenario”). Every change to the project definition is "
+           "recorded in the current scenario; variants share everything they do not change.")
+
+names = st.multiselect("Scenarios", tree.names(), default=tree.names())
+if names:
+    st.subheader("Key results")
+    df = compare(tree, names)
+    if len(names) > 1:
+        base = df[names[0]]
+        for n in names[1:]:
+            df[f"{n} vs {names[0]} (%)"] = (df[n] / base.where(base != 0) - 1.0) * 100.0
+    st.dataframe(df.round(2), use_container_width=True, hide_index=True)
+
+    st.subheader("Inputs that differ")
+    rows = {}
+    for n in names[1:]:
+        for k, (a, b) in tree.diff(names[0], n).items():
+            rows.setdefault(k, {"Input": k, names[0]: a})[n] = b
+    if rows:
+        st.dataframe(pd.DataFrame(list(rows.values())).astype(str), use_container_width=True, hide_index=True)
+    else:
+        st.write("No differences." if len(names) > 1 else "Select two or more scenarios to compare inputs.")
+
+with st.expander("History and memory"):
+    st.write(pd.DataFrame([
+        {"Scenario": n, "Branched from": b.parent or "—", "Versions": len(b.history), "Redo": len(b.future)}
+        for n, b in tree.branches.items()
+    ]))
+    mem = tree.memory()
+    st.write(f"{mem['versions']:,} versions in {mem['bytes'] / 1e3:,.1f} kB of shared structure "
+             f"({mem['bytes_as_copies'] / 1e3:,.1f} kB as separate copies). "
+             f"Result cache: {RESULTS.hits:,} hits · {RESULTS.misses:,} computed · {len(RESULTS.values):,} entries.")
+    if st.button("Delete current scenario", disabled=len(tree.names()) == 1):
+        tree.delete(tree.current)
+        apply_project_inputs(tree.state())
+        st.rerun()
+
+debug_panel()
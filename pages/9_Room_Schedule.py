@@ -0,0 +1,68 @@
+
+import streamlit as st
+import pandas as pd
+
+from src.ui_common import apply_project_inputs, debug_panel, project_model, sidebar
+from src.room_schedule import COLUMNS, RoomSchedule
+
+st.title("Room schedule — import and roll-up")
+ctx = sidebar()
+model = project_model()
+
+if "_room_schedule" not in st.session_state:
+    st.session_state["_room_schedule"] = RoomSchedule()
+schedule = st.session_state["_room_schedule"]
+
+st.caption("CSV (comma, semicolon or tab; decimal comma and thousands separators accepted) or XLSX, first sheet. Required columns: storey and "
+           "area; optional: room, zone, use, persons. Persons left blank are estimated from the use profile. "
+           "Re-importing an edited file only reprocesses the rows that changed. "
+           "Large files: `python -m src.room_schedule rooms.xlsx --state rooms.state.json`.")
+with st.expander("Accepted column headers"):
+    st.write(pd.DataFrame([{"Field": k, "Headers": ", ".join(v)} for k, v in COLUMNS.items()]))
+
+up = st.file_uploader("Room schedule", type=["csv", "txt", "xlsx"])
+if up is not None and st.button("Re-import (changed rows only)" if schedule.rooms else "Import"):
+    try:
+        st.session_state["_room_stats"] = schedule.import_file(up, name=up.name)
+    except (ValueError, KeyError) as e:
+        st.error(f"Could not read {up.name}: {e}")
+
+stats = st.session_state.get("_room_stats")
+if stats:
+    st.success(f"{stats.rows:,} rows in {stats.seconds:.2f} s: {stats.validated:,} validated, "
+               f"{stats.unchanged + stats.reused:,} unchanged, {stats.removed:,} removed.")
+    if stats.invalid:
+        st.warning(f"{stats.invalid:,} rows skipped (not counted in the totals).")
+        st.dataframe(pd.DataFrame(stats.errors, columns=["Line", "Room", "Problem"]), use_container_width=True,
+                     hide_index=True)
+
+if schedule.rooms:
+    storeys = schedule.storeys()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Rooms", f"{schedule.rooms:,}")
+    c2.metric("Storeys", f"{len(storeys):,}")
+    c3.metric("Area (m²)", f"{storeys['area_m2'].sum():,.0f}")
+    c4.metric("Persons", f"{storeys['persons'].sum():,.0f}")
+
+    st.subheader("Per storey")
+    st.dataframe(storeys, use_container_width=True, hide_index=True)
+
+    st.subheader("Per zone (pre-sizing)")
+    st.caption(f"Profile of each zone's main use (else {ctx['use_type']}); {ctx['vent_cat']}, "
+               f"winter {model.get('design_temp_C'):.0f} °C / summer {ctx['design_summer_C']:.0f} °C.")
+    st.dataframe(schedule.zone_estimates(vent_cat=ctx["vent_cat"], design_temp_C=model.get("design_temp_C"),
+                                         design_summer_C=ctx["design_summer_C"], default_use=ctx["use_type"]).round(1),
+                 use_container_width=True, hide_index=True)
+
+    st.subheader("Per use")
+    st.dataframe(schedule.uses(), use_container_width=True, hide_index=True)
+
+    st.subheader("Project definition from the schedule")
+    inputs = schedule.project_inputs(default_use=ctx["use_type"])
+    st.dataframe(pd.DataFrame([{"Input": k, "From schedule": str(v), "Sidebar": str(model.get(k))}
+                               for k, v in inputs.items()]), use_container_width=True, hide_index=True)
+    if st.button("Use as project definition (sidebar)"):
+        apply_project_inputs(inputs)
+        st.rerun()
+
+debug_panel()
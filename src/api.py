@@ -0,0 +1,403 @@
+
+from __future__ import annotations
+from collections import deque
+from dataclasses import asdict, is_dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import inspect
+import json
+import math
+import time
+from urllib.parse import urlsplit
+import numpy as np
+from . import calcs_drainage, calcs_electrical, calcs_fire, calcs_hvac, calcs_plumbing, project_presizing
+from .batch import presize_records
+from .data_catalog import use_profile
+from .memo import CACHE
+from .models import BUILDINGS, validate_arguments, validate_each
+
+# Local JSON API over the pre-sizing functions: python -m src.api --port 8765 (localhost only by default).
+#
+# One asyncio server, standard library only. Concurrent requests to the same endpoint are collected
+# for a few milliseconds (MicroBatcher) and computed together in one executor hop: project pre-sizing
+# and fire screening run as one vectorized call per batch, gravity pipes as one array call per
+# (filling, roughness) group, scalar functions as a loop over the calls. Arguments are validated
+# per batch with one compiled call against the function's annotations (models), so JSON numbers,
+# strings and lists arrive typed and in range; an invalid item fails only its own caller. The
+# costly calculations that are memoized (network solvers, layout, fire screening) keep the
+# process-wide cache (src.memo) warm between requests.
+#
+#   GET  /health                      liveness
+#   GET  /stats                       per-endpoint latency (count, p50, p95, max) and cache counters
+#   GET  /functions                   callable functions and their parameters
+#   POST /presize                     project definition(s) with the sidebar fields -> full pipeline
+#   POST /fire/screen                 building(s) -> building class, Sonderbau / sprinkler / alarm flags
+#   POST /drainage/pipe               {q_lps, slope_pct, max_filling, kb_mm} -> gravity DN
+#   POST /calc/<function>             keyword arguments -> function result (compute_demand takes
+#                                     {"loads": [{"name", "kw", "simultaneity"}, ...]})
+#
+# POST bodies are one JSON object or a list of objects (answered with a list, with {"error": ...}
+# in place of each item that failed).
+
+MAX_BODY_BYTES = 1 << 20
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    f.__name__: f for f in (
+        project_presizing.estimate_ventilation_flow_m3h,
+        project_presizing.estimate_occupancy,
+        project_presizing.estimate_tech_rooms_and_shafts,
+        project_presizing.estimate_hvac_electrical_kw,
+        project_presizing.estimate_lifts_kw,
+        project_presizing.estimate_electrical_loads,
+        project_presizing.estimate_hvac_capacities,
+        project_presizing.estimate_rain_flow_lps,
+        project_presizing.estimate_fixtures_from_occupancy,
+        calcs_hvac.hvac_predim,
+        calcs_hvac.ventilation_flow,
+        calcs_electrical.compute_demand,
+        calcs_electrical.size_feeder,
+        calcs_plumbing.peak_flow_lps,
+        calcs_plumbing.suggest_pipe_diameter_mm,
+        calcs_plumbing.acs_energy_kwh_per_day,
+        calcs_drainage.suggest_rain_pipe_d_mm,
+        calcs_drainage.suggest_rain_pipe_dn,
+        calcs_drainage.wastewater_flow_lps,
+        calcs_fire.fire_predim,
+    )
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def to_json(x: Any) -> Any:
+    """JSON-compatible form of a calculation result (frames -> records, advisories -> dicts)."""
+    if x is None or isinstance(x, (bool, int, str)):
+        return x
+    if isinstance(x, float):
+        return x if math.isfinite(x) else None
+    if isinstance(x, np.generic):
+        return to_json(x.item())
+    if isinstance(x, np.ndarray):
+        return to_json(x.tolist())
+    if hasattr(x, "to_dict") and hasattr(x, "columns"):
+        return to_json(x.to_dict(orient="records"))
+    if hasattr(x, "to_dict"):
+        return to_json(x.to_dict())
+    if is_dataclass(x) and not isinstance(x, type):
+        return to_json(asdict(x))
+    if isinstance(x, dict) or hasattr(x, "items"):
+        return {str(k): to_json(v) for k, v in x.items()}
+    if isinstance(x, (list, tuple, set)):
+        return [to_json(v) for v in x]
+    return str(x)
+
+
+def _arguments(kwargs: Any) -> Any:
+    if not isinstance(kwargs, dict):
+        return ApiError(400, "Body must be a JSON object of keyword arguments")
+    if isinstance(kwargs.get("use_profile"), str):
+        return {**kwargs, "use_profile": use_profile(kwargs["use_profile"])}
+    return kwargs
+
+
+def call_batch(name: str, items: List[Any]) -> List[Any]:
+    """Results (or ApiError) for keyword-argument dicts of one function; arguments validated in one call."""
+    fn = FUNCTIONS.get(name)
+    if fn is None:
+        raise ApiError(404, f"Unknown function: {name}")
+    args = [_arguments(it) for it in items]
+    ok = [i for i, a in enumerate(args) if not isinstance(a, ApiError)]
+    for i, kw in zip(ok, validate_arguments(fn, [args[i] for i in ok])):
+        args[i] = ApiError(400, f"{name}: {kw}") if isinstance(kw, Exception) else kw
+    return _errors_per_item(lambda kw: kw if isinstance(kw, ApiError) else fn(**kw), args)
+
+
+def call_function(name: str, kwargs: Dict[str, Any]) -> Any:
+    res = call_batch(name, [kwargs])[0]
+    if isinstance(res, ApiError):
+        raise res
+    return res
+
+
+def _errors_per_item(fn: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+    out = []
+    for it in items:
+        try:
+            out.append(fn(it))
+        except ApiError as exc:
+            out.append(exc)
+        except Exception as exc:  # reported to that caller only
+            out.append(ApiError(422, f"{type(exc).__name__}: {exc}"))
+    return out
+
+
+def presize_batch(items: List[Dict[str, Any]]) -> List[Any]:
+    # A micro-batch mixes concurrent clients: a non-object body fails only its own position
+    ok = [i for i, it in enumerate(items) if isinstance(it, dict)]
+    out: List[Any] = [ApiError(400, "Project must be a JSON object")] * len(items)
+    for r in presize_records([{"row": i, "raw": items[i]} for i in ok]):
+        out[r["row"]] = ApiError(422, r["error"]) if r.get("error") else r
+    return out
+
+
+def fire_screen_batch(items: List[Dict[str, Any]]) -> List[Any]:
+    import pandas as pd
+    from .fire_rules import screen_buildings
+    objects = [i for i, it in enumerate(items) if isinstance(it, dict)]
+    out: List[Any] = [ApiError(400, "Building must be a JSON object")] * len(items)
+    ok = []
+    for i, b in zip(objects, validate_each(BUILDINGS, [items[i] for i in objects])):
+        if isinstance(b, Exception):
+            out[i] = ApiError(400, str(b))
+        else:
+            ok.append((i, b.model_dump(exclude_none=True)))
+    if ok:
+        screen = screen_buildings(pd.DataFrame([b for _, b in ok]))
+        for (i, _), rec in zip(ok, screen.to_dict(orient="records")):
+            out[i] = rec
+    return out
+
+
+def drainage_pipe_batch(items: List[Dict[str, Any]]) -> List[Any]:
+    from .gravity_pipes import size_gravity_pipes
+    out: List[Any] = [None] * len(items)
+    groups: Dict[Tuple[float, float], List[Tuple[int, float, float]]] = {}
+    for i, it in enumerate(items):
+        try:
+            key = (float(it.get("max_filling", 0.7)), float(it.get("kb_mm", 1.0)))
+            q, slope = float(it["q_lps"]), float(it.get("slope_pct", 1.0))
+        except (KeyError, TypeError, ValueError, AttributeError) as exc:
+            out[i] = ApiError(400, f"Expected q_lps, slope_pct, max_filling, kb_mm: {exc}")
+            continue
+        if not (q > 0 and slope > 0):       # also rejects NaN
+            out[i] = ApiError(400, f"q_lps and slope_pct must be positive (got {q}, {slope})")
+            continue
+        groups.setdefault(key, []).append((i, q, slope))
+    for (fill, kb), rows in groups.items():
+        idx, q, slope = zip(*rows)
+        r = size_gravity_pipes(np.asarray(q), np.asarray(slope), max_filling=fill, kb_mm=kb)
+        for j, i in enumerate(idx):
+            out[i] = {"DN": float(r["DN"][j]), "filling_ratio": float(r["filling_ratio"][j]),
+                      "velocity_m_s": float(r["velocity_m_s"][j])}
+    return out
+
+
+class MicroBatcher:
+    """Collects concurrent submissions for up to `max_wait_ms` (or `max_batch` items) and runs
+    `fn(items) -> results` once per batch in the default executor."""
+
+    def __init__(self, fn: Callable[[List[Any]], List[Any]], max_batch: int = 128, max_wait_ms: float = 2.0):
+        self.fn = fn
+        self.max_batch = int(max_batch)
+        self.max_wait = float(max_wait_ms) / 1000.0
+        self.batches = 0
+        self.items = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, item: Any) -> Any:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, fut))
+        res = await fut
+        if isinstance(res, ApiError):
+            raise res
+        return res
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            items = [b[0] for b in batch]
+            try:
+                results = await loop.run_in_executor(None, self.fn, items)
+            except Exception as exc:
+                results = [ApiError(500, f"{type(exc).__name__}: {exc}")] * len(items)
+            self.batches += 1
+            self.items += len(items)
+            for (_, fut), res in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(res)
+
+
+class LatencyStats:
+    """Rolling per-endpoint latency window (ms)."""
+
+    def __init__(self, window: int = 10_000):
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = {}
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, endpoint: str, ms: float, error: bool) -> None:
+        self.samples.setdefault(endpoint, deque(maxlen=self.window)).append(ms)
+        self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+        self.errors[endpoint] = self.errors.get(endpoint, 0) + int(error)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for ep, s in sorted(self.samples.items()):
+            a = np.fromiter(s, dtype=float)
+            out[ep] = {"count": self.counts[ep], "errors": self.errors[ep],
+                       "p50_ms": float(np.percentile(a, 50)), "p95_ms": float(np.percentile(a, 95)),
+                       "max_ms": float(a.max())}
+        return out
+
+
+class PresizingApi:
+    """Routing, micro-batching and latency bookkeeping; `handle` is transport-independent."""
+
+    def __init__(self, max_batch: int = 128, max_wait_ms: float = 2.0):
+        self.latency = LatencyStats()
+        self.batchers = {
+            "/presize": MicroBatcher(presize_batch, max_batch, max_wait_ms),
+            "/fire/screen": MicroBatcher(fire_screen_batch, max_batch, max_wait_ms),
+            "/drainage/pipe": MicroBatcher(drainage_pipe_batch, max_batch, max_wait_ms),
+        }
+        self.calc_batchers: Dict[str, MicroBatcher] = {}
+
+    def _calc_batcher(self, name: str) -> MicroBatcher:
+        if name not in FUNCTIONS:
+            raise ApiError(404, f"Unknown function: {name}")
+        if name not in self.calc_batchers:
+            first = next(iter(self.batchers.values()))
+            self.calc_batchers[name] = MicroBatcher(lambda items: call_batch(name, items),
+                                                    first.max_batch, first.max_wait * 1000.0)
+        return self.calc_batchers[name]
+
+    async def _post(self, path: str, body: Any) -> Any:
+        if path.startswith("/calc/"):
+            batcher = self._calc_batcher(path[len("/calc/"):])
+        elif path in self.batchers:
+            batcher = self.batchers[path]
+        else:
+            raise ApiError(404, f"Not found: {path}")
+        if isinstance(body, list):
+            # Answered per item: a failed item becomes {"error": ...}, the others keep their result
+            results = await asyncio.gather(*(batcher.submit(b) for b in body), return_exceptions=True)
+            return [{"error": str(r)} if isinstance(r, Exception) else r for r in results]
+        return await batcher.submit(body)
+
+    def _get(self, path: str) -> Any:
+        if path == "/health":
+            return {"status": "ok"}
+        if path == "/stats":
+            all_batchers = {**self.batchers, **{f"/calc/{k}": v for k, v in self.calc_batchers.items()}}
+            return {
+                "endpoints": self.latency.summary(),
+                "batches": {k: {"batches": b.batches, "items": b.items} for k, b in all_batchers.items() if b.batches},
+                "cache": CACHE.summary(),
+            }
+        if path == "/functions":
+            return {name: list(inspect.signature(fn).parameters) for name, fn in FUNCTIONS.items()}
+        raise ApiError(404, f"Not found: {path}")
+
+    async def handle(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        path = urlsplit(target).path.rstrip("/") or "/"
+        endpoint = "/calc/*" if path.startswith("/calc/") else path
+        t0 = time.perf_counter()
+        status = 200
+        try:
+            if method == "GET":
+                payload = self._get(path)
+            elif method == "POST":
+                try:
+                    data = json.loads(body or b"null")
+                except ValueError as exc:
+                    raise ApiError(400, f"Invalid JSON: {exc}")
+                payload = to_json(await self._post(path, data))
+            else:
+                raise ApiError(405, f"Method not allowed: {method}")
+        except ApiError as exc:
+            status, payload = exc.status, {"error": str(exc)}
+        if path != "/stats":
+            self.latency.record(f"{method} {endpoint}", (time.perf_counter() - t0) * 1000.0, status >= 400)
+        return status, payload
+
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+
+async def _serve_connection(api: PresizingApi, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            parts = line.decode("latin-1").split()
+            if len(parts) != 3:
+                break
+            method, target, version = parts
+            headers: Dict[str, str] = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = h.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+            n = int(headers.get("content-length", "0") or 0)
+            if n > MAX_BODY_BYTES:
+                status, payload = 413, {"error": f"Body larger than {MAX_BODY_BYTES} bytes"}
+                keep_alive = False
+            else:
+                body = await reader.readexactly(n) if n else b""
+                status, payload = await api.handle(method.upper(), target, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(host: str = "127.0.0.1", port: int = 8765, api: Optional[PresizingApi] = None) -> asyncio.AbstractServer:
+    api = api or PresizingApi()
+    return await asyncio.start_server(lambda r, w: _serve_connection(api, r, w), host, port)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(prog="python -m src.api", description="Local JSON API for MEP pre-sizing.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--max-batch", type=int, default=128, help="largest micro-batch")
+    ap.add_argument("--max-wait-ms", type=float, default=2.0, help="how long a batch collects requests")
+    args = ap.parse_args(argv)
+
+    async def run() -> None:
+        server = await start_server(args.host, args.port, PresizingApi(args.max_batch, args.max_wait_ms))
+        print(f"Serving on http://{args.host}:{args.port} (GET /functions, /stats)", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
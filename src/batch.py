@@ -0,0 +1,223 @@
+
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TextIO
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from .memo import memo_disabled
+from .models import PROJECTS, PresizeResult, validate_each
+from .project_model import ProjectModel
+
+# Headless portfolio pre-sizing: python -m src.batch projects.csv -o results.jsonl
+#
+# Input rows carry the sidebar fields (project_model.INPUTS; missing fields take the sidebar
+# defaults) plus an optional id. Rows are read lazily, grouped into chunks and sent to a process
+# pool; at most a few chunks per worker are in flight, and each finished chunk is written out at
+# once, so memory stays flat for any portfolio size. Output order is completion order (see "row").
+# Each chunk is validated with one call (models.PROJECTS); an invalid row gets its error, not a
+# result, and does not stop the chunk.
+# Nothing on this path imports Streamlit.
+
+# Demand diversity per load group (Electrical page defaults)
+DIVERSITY = {"lighting": 0.9, "sockets": 0.8, "other": 0.8, "hvac": 0.9, "lifts": 0.6}
+PLUMBING_SIMULTANEITY = 0.35
+
+RESULT_COLUMNS = list(PresizeResult.model_fields)
+
+
+def read_projects(path: Path) -> Iterator[Dict[str, Any]]:
+    """Project rows from CSV, JSON (list of objects) or JSON lines, read lazily where possible."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if suffix == ".csv":
+            yield from csv.DictReader(f)
+        elif suffix in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            data = json.load(f)
+            yield from (data.get("projects", []) if isinstance(data, dict) else data)
+
+
+def presize_chunk(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Worker task: presize_records with the calculation cache bypassed.
+
+    Portfolio rows rarely repeat, so keying and copying results would cost more than it saves.
+    """
+    with memo_disabled():
+        return presize_records(chunk)
+
+
+def presize_records(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Full pre-sizing pipeline for (row, raw input) records; fire screening runs once for all of them."""
+    import pandas as pd
+    from .calcs_drainage import suggest_rain_pipe_dn
+    from .calcs_electrical import LoadItem, compute_demand, size_feeder
+    from .calcs_plumbing import acs_energy_kwh_per_day, peak_flow_lps, suggest_pipe_diameter_mm
+    from .fire_rules import screen_buildings
+
+    out: List[Dict[str, Any]] = []
+    fire_rows: List[Dict[str, Any]] = []
+    for rec, inputs in zip(chunk, validate_each(PROJECTS, [rec["raw"] for rec in chunk])):
+        raw = rec["raw"]
+        res: Dict[str, Any] = {"row": rec["row"], "id": raw.get("id", raw.get("name", rec["row"]))}
+        try:
+            if isinstance(inputs, Exception):
+                raise inputs
+            m = ProjectModel(inputs)
+            v = m.values
+            e = m["electrical_loads"]
+            p_dem, _ = compute_demand([
+                LoadItem("Lighting", e["lighting_kw"], DIVERSITY["lighting"]),
+                LoadItem("Sockets / small power", e["sockets_kw"], DIVERSITY["sockets"]),
+                LoadItem("HVAC", e["hvac_kw"], DIVERSITY["hvac"]),
+                LoadItem("Lifts", e["lifts_kw"], DIVERSITY["lifts"]),
+                LoadItem("Other", e["other_kw"], DIVERSITY["other"]),
+            ])
+            feeder = size_feeder(p_dem)
+            hv = m["hvac_capacities"]
+            water = peak_flow_lps(m["fixtures"], PLUMBING_SIMULTANEITY)
+            rain_q = float(m["rain_flow_lps"])
+            rain_dn = suggest_rain_pipe_dn(rain_q) if rain_q > 0 else {"DN": 0.0}
+            res.update({
+                "city": v["city"], "use_type": v["use_type"],
+                "area_above_m2": v["area_above_m2"], "area_below_m2": v["area_below_m2"],
+                "floors_above": v["floors_above"], "floors_below": v["floors_below"],
+                "persons": m["persons"], "roof_area_m2": m["roof_area_m2"],
+                "elec_connected_kw": m["electrical_connected_kw"], "elec_demand_kw": float(p_dem),
+                "feeder_current_A": feeder["I_design_A"], "feeder_section_mm2": feeder["Section_mm2"],
+                "hvac_heating_kw": hv["heating_kw"], "hvac_cooling_kw": hv["cooling_kw"],
+                "ventilation_m3h": m["ventilation"]["q_m3h"],
+                "hvac_electric_kw": m["hvac_electrical"][0], "lifts_kw": m["lifts"][0],
+                "tech_rooms_m2": m["allowances"]["tech_rooms_m2"], "shafts_m2": m["allowances"]["shafts_m2"],
+                "water_peak_lps": water["q_peak_lps"],
+                "water_main_d_mm": suggest_pipe_diameter_mm(water["q_peak_lps"]),
+                "dhw_kwh_day": acs_energy_kwh_per_day(m["persons"], m["use_profile"].get("dhw_l_per_person_day", 0.0)),
+                "rain_flow_lps": rain_q, "rain_collector_DN": rain_dn["DN"],
+                "error": "",
+            })
+            fire_rows.append({
+                "i": len(out), "bundesland": v["bundesland"], "use": v["use_type"],
+                "gross_area_m2": m["area_total_m2"], "storeys": v["floors_above"],
+                "floors_below": v["floors_below"], "persons": m["persons"],
+            })
+        except Exception as exc:  # one bad row must not stop the portfolio
+            res["error"] = f"{type(exc).__name__}: {exc}"
+        out.append(res)
+
+    if fire_rows:
+        screen = screen_buildings(pd.DataFrame(fire_rows).drop(columns="i"))
+        for fr, (_, s) in zip(fire_rows, screen.iterrows()):
+            out[fr["i"]].update({
+                "fire_building_class": s["building_class"], "fire_sonderbau": bool(s["sonderbau"]),
+                "fire_sprinkler": bool(s["sprinkler"]), "fire_alarm": bool(s["alarm"]),
+                "fire_reasons": list(s["reasons"]),
+            })
+    return out
+
+
+class ResultWriter:
+    """Streams result rows to .csv or JSON lines (anything else)."""
+
+    def __init__(self, f: TextIO, fmt: str):
+        self.f = f
+        self.fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(f, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for r in rows:
+            if self._csv is not None:
+                self._csv.writerow({**r, "fire_reasons": "; ".join(r.get("fire_reasons") or [])})
+            else:
+                self.f.write(json.dumps(r, ensure_ascii=False, default=float) + "\n")
+        self.f.flush()
+
+
+def _chunks(projects: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    for i, raw in enumerate(projects):
+        chunk.append({"row": i, "raw": raw})
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(projects: Iterable[Dict[str, Any]], writer: ResultWriter, workers: Optional[int] = None,
+              chunk_size: int = 32, max_pending: int = 4) -> Dict[str, Any]:
+    """Pre-size all projects, writing each finished chunk immediately. Returns run statistics.
+
+    workers=1 runs in-process (no pool); default is one worker per CPU.
+    """
+    workers = int(workers or os.cpu_count() or 1)
+    t0 = time.perf_counter()
+    n = errors = 0
+
+    def emit(rows: List[Dict[str, Any]]) -> None:
+        nonlocal n, errors
+        writer.write(rows)
+        n += len(rows)
+        errors += sum(1 for r in rows if r.get("error"))
+
+    chunks = _chunks(projects, max(1, int(chunk_size)))
+    if workers == 1:
+        for chunk in chunks:
+            emit(presize_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: Set[Future] = set()
+            for chunk in chunks:
+                # Bounded window: keep every worker busy without reading the whole input up front
+                if len(pending) >= workers * max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        emit(fut.result())
+                pending.add(pool.submit(presize_chunk, chunk))
+            for fut in wait(pending).done:
+                emit(fut.result())
+
+    dt = time.perf_counter() - t0
+    return {"projects": n, "errors": errors, "seconds": dt, "projects_per_s": n / dt if dt > 0 else float("nan"),
+            "workers": workers}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m src.batch", description="Headless MEP pre-sizing of a project portfolio.")
+    ap.add_argument("input", type=Path, help="CSV, JSON or JSON lines with the sidebar fields (and an optional id)")
+    ap.add_argument("-o", "--output", type=Path,
+                    help="results file (.csv, .jsonl, .xlsx) or directory (.parquet, .arrow); default stdout as JSON lines")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    ap.add_argument("--chunk-size", type=int, default=32, help="projects per task (default 32)")
+    args = ap.parse_args(argv)
+
+    suffix = args.output.suffix.lower() if args.output is not None else ""
+    if suffix in (".parquet", ".arrow", ".xlsx"):
+        from .export import open_writer
+        with open_writer(args.output) as writer:
+            stats = run_batch(read_projects(args.input), writer, args.workers, args.chunk_size)
+    else:
+        f = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        try:
+            stats = run_batch(read_projects(args.input), ResultWriter(f, "csv" if suffix == ".csv" else "jsonl"),
+                              args.workers, args.chunk_size)
+        finally:
+            if args.output:
+                f.close()
+    print(f"{stats['projects']} projects ({stats['errors']} errors) in {stats['seconds']:.1f} s "
+          f"with {stats['workers']} workers: {stats['projects_per_s']:.0f} projects/s", file=sys.stderr)
+    return 0 if stats["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
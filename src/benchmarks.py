@@ -0,0 +1,427 @@
+
+from __future__ import annotations
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import gc
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from .memo import memo_clear, memo_disabled
+
+# Performance benchmarks with stored baselines.
+#
+# Every case builds synthetic input for n items (1 / 1k / 100k by default), then times its run
+# like timeit.autorange: a sample repeats the run until it takes >= 50 ms, the best of several
+# samples is kept (garbage collector paused, as in timeit). Calculations run with the memo cache
+# disabled, so the numbers are compute cost, not cache lookups.
+#
+# Results are compared against benchmarks/baseline.json. A case regresses when it is slower than
+# its baseline by more than its threshold (relative) AND by more than MIN_DELTA_S (absolute, to
+# ignore timer noise on microsecond cases). Baseline times are rescaled by a fixed pure-Python
+# calibration loop, so a baseline recorded on a faster / slower machine still compares sensibly.
+# Run the gate on an otherwise idle machine; shared / throttled VMs vary by more than 25 %.
+#
+#   python -m src.benchmarks                       # run 1 / 1k items, compare, exit 1 on regression
+#   python -m src.benchmarks --scales 1 1000 100000 --save     # record / update the baseline
+#   python -m src.benchmarks --only build_pdf --threshold build_pdf=0.5
+
+BASELINE_PATH = Path(__file__).resolve().parent.parent / "benchmarks" / "baseline.json"
+DEFAULT_SCALES = (1, 1_000)
+DEFAULT_THRESHOLD = 0.25
+MIN_DELTA_S = 50e-6
+SAMPLE_S = 0.05
+TIME_FIELDS = ("seconds", "median_s", "per_item_us")     # rescaled together with the calibration
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    setup: Callable[[int, np.random.Generator], Any]      # synthetic input for n items
+    run: Callable[[Any], Any]
+    max_items: int = 100_000
+    threshold: float = DEFAULT_THRESHOLD
+    memo: bool = False                                     # keep the memo cache enabled (cleared per sample)
+
+
+# ----------------------------------------------------------------------------------------------
+# Synthetic inputs and runs
+
+_TMP: List[tempfile.TemporaryDirectory] = []
+
+
+def _tmpdir() -> str:
+    if not _TMP:
+        _TMP.append(tempfile.TemporaryDirectory(prefix="mep_bench_"))    # removed at exit
+    return _TMP[0].name
+
+
+def _feeders(n: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    return [{"p_dem_kw": float(p), "length_m": float(l), "max_vdrop_pct": float(v), "add_motor": bool(m),
+             "motor_kw": 15.0 if m else 0.0}
+            for p, l, v, m in zip(rng.uniform(5, 800, n), rng.uniform(10, 250, n), rng.choice([2.0, 3.0, 5.0], n),
+                                  rng.random(n) < 0.2)]
+
+
+def _run_feeders(items: List[Dict[str, Any]]) -> None:
+    from .calcs_electrical import size_feeder
+    for kw in items:
+        size_feeder(**kw)
+
+
+def _cables(n: int, rng: np.random.Generator) -> List[Tuple[float, float, float]]:
+    return list(zip(rng.uniform(1, 900, n).tolist(), rng.choice([2.0, 3.0, 5.0], n).tolist(),
+                    rng.uniform(5, 300, n).tolist()))
+
+
+def _run_cables(items: List[Tuple[float, float, float]]) -> None:
+    from .utils import pick_cable_section
+    for i, vd, length in items:
+        pick_cable_section(i, vd, length)
+
+
+def _loads(n: int, rng: np.random.Generator) -> list:
+    from .calcs_electrical import LoadItem
+    return [LoadItem(f"Load {i}", float(kw), float(s))
+            for i, (kw, s) in enumerate(zip(rng.uniform(0.5, 120, n), rng.uniform(0.3, 1.0, n)))]
+
+
+def _run_demand(loads: list) -> None:
+    from .calcs_electrical import compute_demand
+    compute_demand(loads)
+
+
+def _hvac(n: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    from .data_catalog import use_profiles
+    profiles = list(use_profiles().values())
+    return [{"area_above_m2": float(a), "use_profile": profiles[int(u)], "design_temp_C": float(t),
+             "persons": int(a / 10), "vent_cat": str(c), "design_summer_C": float(s)}
+            for a, u, t, c, s in zip(rng.uniform(200, 60_000, n), rng.integers(0, len(profiles), n),
+                                     rng.uniform(-16, -8, n), rng.choice(["Cat I", "Cat II", "Cat III"], n),
+                                     rng.uniform(28, 36, n))]
+
+
+def _run_hvac(items: List[Dict[str, Any]]) -> None:
+    from .project_presizing import estimate_hvac_capacities
+    for kw in items:
+        estimate_hvac_capacities(**kw)
+
+
+def _fixtures(n: int, rng: np.random.Generator) -> List[Tuple[Dict[str, int], float]]:
+    from .calcs_plumbing import FIXTURE_DEFAULTS
+    kinds = list(FIXTURE_DEFAULTS)
+    counts = rng.integers(0, 200, (n, len(kinds)))
+    return [({k: int(c) for k, c in zip(kinds, row)}, float(s)) for row, s in zip(counts, rng.uniform(0.1, 0.6, n))]
+
+
+def _run_fixtures(items: List[Tuple[Dict[str, int], float]]) -> None:
+    from .calcs_plumbing import peak_flow_lps
+    for fixtures, simultaneity in items:
+        peak_flow_lps(fixtures, simultaneity)
+
+
+def _pdf_table(n: int, rng: np.random.Generator) -> Dict[str, Any]:
+    import pandas as pd
+    df = pd.DataFrame({"Item": [f"Room {i}" for i in range(n)], "Area (m²)": rng.uniform(10, 400, n).round(1),
+                       "Heating (kW)": rng.uniform(0.5, 40, n).round(2), "Cooling (kW)": rng.uniform(0.5, 60, n).round(2),
+                       "Airflow (m³/h)": rng.uniform(50, 5000, n).round(0)})
+    return df
+
+
+def _run_pdf(df) -> None:
+    from .reporting import build_pdf
+    build_pdf(io.BytesIO(), executive={"Benchmark": "build_pdf"}, tables=[{"title": "Rooms", "df": df}], source_ids=[])
+
+
+def _json_file(n: int, rng: np.random.Generator) -> Path:
+    from .data_catalog import use_profiles
+    template = dict(next(iter(use_profiles().values())))
+    path = Path(_tmpdir()) / f"use_profiles_{n}.json"
+    path.write_text(json.dumps({f"Use {i}": {**template, "occupancy_m2_per_person": float(o)}
+                                for i, o in enumerate(rng.uniform(5, 30, n))}), encoding="utf-8")
+    return path
+
+
+def _run_json(path: Path) -> None:
+    from .data_catalog import clear_cache, load_json_file
+    clear_cache()
+    load_json_file(path)
+
+
+def _reruns(n: int, rng: np.random.Generator):
+    from streamlit.logger import set_log_level
+    from streamlit.testing.v1 import AppTest
+    set_log_level("error")          # page deprecation notices would flood the report
+    root = Path(__file__).resolve().parent.parent
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+    at = AppTest.from_file(str(root / "pages" / "0_Project_Summary.py"), default_timeout=120).run()
+    return at, rng.uniform(1_000, 50_000, n).round(0).tolist()
+
+
+def _run_reruns(data) -> None:
+    at, areas = data
+    for a in areas:
+        at.sidebar.number_input(key="_sidebar_area_above_m2_0").set_value(a).run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+
+def _sprinkler_grid(n: int, rng: np.random.Generator):
+    from .calcs_sprinkler import grid_network
+    side = max(2, int(np.ceil(np.sqrt(n))))
+    return grid_network(side, side)
+
+
+def _run_sprinkler(grid) -> None:
+    from .calcs_sprinkler import sprinkler_design
+    nodes, pipes, source = grid
+    sprinkler_design(nodes, pipes, source, hazard="OH3", area_per_head_m2=12.0, k_factor=80.0)
+
+
+def _floor_plates(n: int, rng: np.random.Generator) -> Dict[str, Any]:
+    th = np.linspace(0, 2 * np.pi, 73)[:-1]
+    core = np.array([[-6, -6], [6, -6], [6, 6], [-6, 6]], float)
+    plates = {}
+    for i in range(n):
+        rr = 30 + 6 * np.sin(5 * th + rng.uniform(0, 2 * np.pi))
+        plates[f"L{i:04d}"] = [[np.column_stack([rr * np.cos(th), rr * np.sin(th)]), core]]
+    return plates
+
+
+def _run_layout(plates: Dict[str, Any]) -> None:
+    from .calcs_layout import layout_devices
+    layout_devices(plates, "Smoke detector (DIN VDE 0833-2)")
+
+
+STARTUP_MODULES = ("src.ui_common", "src.project_model", "src.reporting")
+
+
+def _startup(n: int, rng: np.random.Generator) -> int:
+    import streamlit            # loaded before the timing: only our own startup cost is measured
+    return n
+
+
+def _run_startup(n: int) -> None:
+    """n cold imports of what every page imports first; the loaded src modules are put back after."""
+    import importlib
+
+    def ours() -> List[str]:
+        return [k for k in sys.modules if k == "src" or k.startswith("src.")]
+
+    saved = {k: sys.modules[k] for k in ours()}
+    try:
+        for _ in range(n):
+            for k in ours():
+                del sys.modules[k]
+            for name in STARTUP_MODULES:
+                importlib.import_module(name)
+    finally:
+        for k in ours():
+            del sys.modules[k]
+        sys.modules.update(saved)
+
+
+CASES: Tuple[Case, ...] = (
+    Case("size_feeder", _feeders, _run_feeders),
+    Case("pick_cable_section", _cables, _run_cables),
+    Case("compute_demand", _loads, _run_demand),
+    Case("estimate_hvac_capacities", _hvac, _run_hvac),
+    Case("peak_flow_lps", _fixtures, _run_fixtures),
+    Case("build_pdf", _pdf_table, _run_pdf, threshold=0.35),
+    Case("load_json", _json_file, _run_json),
+    # One item = one head of a square looped grid (nonlinear network solve)
+    Case("sprinkler_design", _sprinkler_grid, _run_sprinkler, max_items=10_000, threshold=0.35),
+    # One item = one distinct storey plate (rasterized, then covered with detectors)
+    Case("layout_devices", _floor_plates, _run_layout, max_items=1_000, threshold=0.35),
+    # One item = one cold import of the page startup modules (dependencies stay loaded)
+    Case("startup_imports", _startup, _run_startup, max_items=100, threshold=0.5),
+    # AppTest script runs: one item = one sidebar change and full page rerun (memo cache on);
+    # ~50 ms each, so larger scales are skipped
+    Case("page_rerun", _reruns, _run_reruns, max_items=100, threshold=0.5, memo=True),
+)
+
+
+# ----------------------------------------------------------------------------------------------
+# Measurement
+
+def calibration_s() -> float:
+    """Best-of-25 time of a fixed pure-Python loop; used to rescale baselines between machines."""
+    best = float("inf")
+    for _ in range(25):
+        t = time.perf_counter()
+        sum(i * i for i in range(100_000))
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def measure(case: Case, n: int, samples: int = 7, budget_s: float = 10.0, seed: int = 0) -> Dict[str, Any]:
+    """Best seconds per run of `case` on n synthetic items."""
+    data = case.setup(n, np.random.default_rng(seed))
+
+    def sample(loops: int) -> float:
+        if case.memo:
+            memo_clear()
+        gc.collect()
+        gc.disable()            # as timeit: collector pauses depend on unrelated heap state
+        try:
+            with nullcontext() if case.memo else memo_disabled():
+                t = time.perf_counter()
+                for _ in range(loops):
+                    case.run(data)
+                return time.perf_counter() - t
+        finally:
+            gc.enable()
+
+    loops = 1
+    first = sample(loops)
+    while first < SAMPLE_S:
+        loops *= 10 if first * 10 < SAMPLE_S else 2
+        first = sample(loops)
+    times = [first / loops]
+    started = time.perf_counter()
+    while len(times) < samples and (time.perf_counter() - started) + times[-1] * loops < budget_s:
+        times.append(sample(loops) / loops)
+    best = min(times)
+    return {"seconds": best, "median_s": statistics.median(times), "per_item_us": best / n * 1e6,
+            "samples": len(times), "loops": loops}
+
+
+def run_suite(scales: Sequence[int] = DEFAULT_SCALES, only: Optional[Sequence[str]] = None,
+              samples: int = 7, progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """{"calibration_s", "results": {"case@n": measurement}} for the selected cases and scales."""
+    unknown = set(only or ()) - {c.name for c in CASES}
+    if unknown:
+        raise KeyError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+    results: Dict[str, Any] = {}
+    calibration = calibration_s()
+    for case in CASES:
+        if only and case.name not in only:
+            continue
+        for n in scales:
+            if n > case.max_items:
+                continue
+            results[f"{case.name}@{n}"] = measure(case, n, samples=samples)
+            if progress:
+                progress(f"{case.name}@{n}: {results[f'{case.name}@{n}']['seconds'] * 1e3:.3f} ms")
+    return {"calibration_s": min(calibration, calibration_s()), "results": results}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], thresholds: Optional[Dict[str, float]] = None,
+            default_threshold: Optional[float] = None, normalize: bool = True) -> List[Dict[str, Any]]:
+    """One row per current result: expected (rescaled baseline) seconds, ratio and status."""
+    per_case = {c.name: c.threshold for c in CASES}
+    per_case.update(baseline.get("thresholds", {}))
+    if default_threshold is not None:
+        per_case = {k: default_threshold for k in per_case}
+    per_case.update(thresholds or {})
+    scale = 1.0
+    if normalize and baseline.get("calibration_s") and current.get("calibration_s"):
+        scale = current["calibration_s"] / baseline["calibration_s"]
+    rows = []
+    for key, cur in current["results"].items():
+        name, _, n = key.partition("@")
+        threshold = per_case.get(name, DEFAULT_THRESHOLD if default_threshold is None else default_threshold)
+        base = baseline.get("results", {}).get(key)
+        row = {"case": name, "items": int(n), "seconds": cur["seconds"], "expected_s": None, "ratio": None,
+               "threshold": threshold, "status": "new"}
+        if base:
+            expected = base["seconds"] * scale
+            ratio = cur["seconds"] / expected
+            slower = cur["seconds"] - expected
+            status = "ok"
+            if ratio > 1.0 + threshold and slower > MIN_DELTA_S:
+                status = "REGRESSION"
+            elif ratio < 1.0 / (1.0 + threshold) and -slower > MIN_DELTA_S:
+                status = "faster"
+            row.update(expected_s=expected, ratio=ratio, status=status)
+        rows.append(row)
+    return rows
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, Any]:
+    path = Path(path)
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def save_baseline(current: Dict[str, Any], path: Path = BASELINE_PATH) -> Dict[str, Any]:
+    """Merge `current` into the baseline file (other cases / scales are kept) and write it."""
+    path = Path(path)
+    baseline = load_baseline(path)
+    old_cal = baseline.get("calibration_s")
+    results = baseline.get("results", {})
+    if old_cal:
+        # Keep older entries comparable under the new calibration
+        factor = current["calibration_s"] / old_cal
+        results = {k: {**v, **{f: v[f] * factor for f in TIME_FIELDS if f in v}} for k, v in results.items()}
+    results.update(current["results"])
+    out = {
+        "recorded": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "calibration_s": current["calibration_s"],
+        "thresholds": baseline.get("thresholds", {}),
+        "results": {k: {kk: float(f"{vv:.9g}") if isinstance(vv, float) else vv for kk, vv in v.items()}
+                    for k, v in sorted(results.items())},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(out, indent=1) + "\n", encoding="utf-8")
+    return out
+
+
+def _fmt_s(s: Optional[float]) -> str:
+    if s is None:
+        return "-"
+    return f"{s * 1e6:.1f} us" if s < 1e-3 else f"{s * 1e3:.2f} ms" if s < 1.0 else f"{s:.2f} s"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Run the performance benchmarks and compare them with the baseline.")
+    ap.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES), help="items per case")
+    ap.add_argument("--only", nargs="+", metavar="CASE", help=f"cases to run ({', '.join(c.name for c in CASES)})")
+    ap.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    ap.add_argument("--save", action="store_true", help="write the results into the baseline file")
+    ap.add_argument("--threshold", action="append", default=[], metavar="[CASE=]FRACTION",
+                    help="allowed slowdown, e.g. 0.25 for all cases or build_pdf=0.5 for one")
+    ap.add_argument("--samples", type=int, default=7)
+    ap.add_argument("--no-normalize", action="store_true", help="compare raw times (no machine calibration)")
+    args = ap.parse_args(argv)
+
+    default, per_case = None, {}
+    for t in args.threshold:
+        name, sep, value = t.rpartition("=")
+        if sep:
+            per_case[name] = float(value)
+        else:
+            default = float(value)
+
+    current = run_suite(args.scales, args.only, samples=args.samples, progress=lambda m: print(m, file=sys.stderr))
+    rows = compare(current, load_baseline(args.baseline), per_case, default, normalize=not args.no_normalize)
+    print(f"{'case':<26}{'items':>8}{'time':>12}{'per item':>12}{'baseline':>12}{'ratio':>8}  status")
+    for r in rows:
+        ratio = "-" if r["ratio"] is None else f"{r['ratio']:.2f}"
+        print(f"{r['case']:<26}{r['items']:>8}{_fmt_s(r['seconds']):>12}{_fmt_s(r['seconds'] / r['items']):>12}"
+              f"{_fmt_s(r['expected_s']):>12}{ratio:>8}  {r['status']}")
+    if args.save:
+        save_baseline(current, args.baseline)
+        print(f"Baseline written: {args.baseline}")
+        return 0
+    regressions = [r for r in rows if r["status"] == "REGRESSION"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) over threshold", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
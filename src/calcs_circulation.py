@@ -0,0 +1,130 @@
+
+from __future__ import annotations
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from .utils import Advisory
+from .hydraulics import (
+    WATER_DENSITY_KG_M3, WATER_CP_KJ_KGK,
+    velocity_m_s, pressure_drop_pa, parent_positions, tree_depth, subtree_sum, path_sum, is_leaf,
+)
+from .memo import memoize
+from .profiling import profile_functions
+
+# DHW circulation pre-sizing in the spirit of DVGW W 551 / W 553 and DIN 1988-300:
+# heat losses per segment -> circulation flows (60/55 °C) -> pump head -> balancing valves.
+# Not a substitute for a detailed W 553 calculation with manufacturer valve data.
+
+INSULATION_LAMBDA_W_MK = 0.035
+SURFACE_HTC_W_M2K = 10.0  # combined convection + radiation at the outer surface
+
+SEGMENT_COLUMNS = ["parent", "length_m", "d_inner_mm"]
+
+
+def heat_loss_w_per_m(d_outer_mm, insulation_mm, t_water_C, t_ambient_C,
+                      lambda_ins: float = INSULATION_LAMBDA_W_MK, h_out: float = SURFACE_HTC_W_M2K) -> np.ndarray:
+    """Linear heat loss (W/m) of an insulated pipe: ΔT / (R_insulation + R_surface)."""
+    d_o = np.asarray(d_outer_mm, dtype=float) / 1000.0
+    s = np.maximum(0.0, np.asarray(insulation_mm, dtype=float)) / 1000.0
+    d_ins = d_o + 2.0 * s
+    r_ins = np.log(d_ins / d_o) / (2.0 * np.pi * lambda_ins)
+    r_surf = 1.0 / (h_out * np.pi * d_ins)
+    dt = np.asarray(t_water_C, dtype=float) - np.asarray(t_ambient_C, dtype=float)
+    return np.maximum(0.0, dt) / (r_ins + r_surf)
+
+
+@memoize
+def circulation_balance(
+    segments: pd.DataFrame,
+    t_supply_C: float = 60.0,
+    t_return_C: float = 55.0,
+    t_ambient_C: float = 20.0,
+    roughness_mm: float = 0.0015,
+    local_loss_factor: float = 0.3,
+    loop_factor: float = 2.0,
+    dp_fixed_kPa: float = 0.0,
+) -> Dict[str, object]:
+    """Circulation flows, pump head and balancing valve settings for a DHW tree.
+
+    `segments` holds one row per pipe segment with columns:
+    - parent: row label (segment id) of the upstream segment (-1 for the segment leaving the heater);
+      ids survive dropped rows, a parent id that is not a row raises ValueError
+    - length_m, d_inner_mm
+    - optional: d_outer_mm (default d_inner + 2 mm), insulation_mm (default 0),
+      t_ambient_C (default `t_ambient_C`)
+
+    Flows carry the heat losses of each segment and everything downstream
+    (V = ΣQ / (ρ·cp·ΔT)). `loop_factor` accounts for the return pipe running alongside
+    the supply. Balancing valves sit at the end of every branch (leaf) and absorb the
+    difference between pump head and that branch's path pressure drop.
+    """
+    missing = [c for c in SEGMENT_COLUMNS if c not in segments.columns]
+    if missing:
+        raise ValueError(f"Missing segment columns: {missing}")
+    adv: List[Advisory] = []
+
+    parent = parent_positions(segments.index, segments["parent"].to_numpy(dtype=np.int64))
+    length = np.maximum(0.0, segments["length_m"].to_numpy(dtype=float))
+    d_in = segments["d_inner_mm"].to_numpy(dtype=float)
+    d_out = segments["d_outer_mm"].to_numpy(dtype=float) if "d_outer_mm" in segments else d_in + 2.0
+    ins = segments["insulation_mm"].to_numpy(dtype=float) if "insulation_mm" in segments else np.zeros(len(segments))
+    t_amb = segments["t_ambient_C"].to_numpy(dtype=float) if "t_ambient_C" in segments else np.full(len(segments), float(t_ambient_C))
+
+    dT = float(t_supply_C) - float(t_return_C)
+    if dT <= 0:
+        raise ValueError("t_supply_C must be above t_return_C")
+    t_mean = (float(t_supply_C) + float(t_return_C)) / 2.0
+
+    depth = tree_depth(parent)
+    q_w_m = heat_loss_w_per_m(d_out, ins, t_mean, t_amb)
+    q_seg_w = q_w_m * length * loop_factor
+    q_sub_w = subtree_sum(parent, q_seg_w, depth)
+    flow_lps = q_sub_w / (WATER_CP_KJ_KGK * 1000.0 * dT) / WATER_DENSITY_KG_M3 * 1000.0
+
+    v = velocity_m_s(flow_lps, d_in)
+    dp_seg = pressure_drop_pa(flow_lps, d_in, length * loop_factor, roughness_mm, local_loss_factor)
+    dp_path = path_sum(parent, dp_seg, depth)
+
+    leaf = is_leaf(parent)
+    head_pa = float(dp_path[leaf].max(initial=0.0)) + float(dp_fixed_kPa) * 1000.0
+    critical = segments.index.tolist()[np.flatnonzero(leaf)[np.argmax(dp_path[leaf])]] if leaf.any() else -1
+
+    valve_dp_pa = np.where(leaf, head_pa - float(dp_fixed_kPa) * 1000.0 - dp_path, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kv = np.where(leaf & (valve_dp_pa > 0), flow_lps * 3.6 / np.sqrt(valve_dp_pa / 1e5), np.nan)
+
+    df = pd.DataFrame({
+        "Segment": segments.index,
+        "Parent": segments["parent"].to_numpy(dtype=np.int64),
+        "Heat loss (W/m)": q_w_m,
+        "Heat loss (W)": q_seg_w,
+        "Circulation flow (L/s)": flow_lps,
+        "Velocity (m/s)": v,
+        "Δp segment (kPa)": dp_seg / 1000.0,
+        "Δp path (kPa)": dp_path / 1000.0,
+        "Valve Δp (kPa)": valve_dp_pa / 1000.0,
+        "Valve kv (m³/h)": kv,
+    })
+
+    if (v > 1.0).any():
+        adv.append(Advisory("warning",
+            f"{int((v > 1.0).sum())} segment(s) exceed 1.0 m/s in circulation; check noise and erosion (W 553 guidance: ~0.5 m/s)."))
+    if (ins <= 0).any():
+        adv.append(Advisory("warning", "Uninsulated segments present; GEG requires DHW and circulation pipe insulation."))
+    adv.append(Advisory("info",
+        "Simplified W 553-style method: valve settings are indicative. Final balancing uses manufacturer kv curves or thermostatic valves."))
+
+    total_flow = float(flow_lps[parent < 0].sum())
+    return {
+        "segments": df,
+        "heat_loss_total_W": float(q_seg_w.sum()),
+        "flow_total_lps": total_flow,
+        "flow_total_m3h": total_flow * 3.6,
+        "pump_head_kPa": head_pa / 1000.0,
+        "pump_head_m": head_pa / (WATER_DENSITY_KG_M3 * 9.81),
+        "critical_segment": critical,
+        "advisories": adv,
+    }
+
+
+profile_functions(globals())
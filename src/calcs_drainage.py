@@ -3,23 +3,32 @@ from __future__ import annotations
 from typing import Dict, List
 import math
 from .utils import Advisory
+from .gravity_pipes import size_gravity_pipes
+from .profiling import profile_functions
 
 def rain_flow_lps(area_m2: float, r_lps_m2: float) -> float:
     return area_m2 * r_lps_m2
 
 def suggest_rain_pipe_d_mm(q_lps: float, v: float = 2.0) -> float:
-    # Simplified full-flow circular pipe
+    # Simplified full-flow circular pipe (pressurised/siphonic view). For gravity pipes use suggest_rain_pipe_dn.
     q = q_lps / 1000.0
     d = math.sqrt(4*q/(math.pi*v))
     return d*1000.0
 
-def wastewater_flow_lps(dfus: float, k: float=0.5) -> float:
-    # Placeholder: dfus is "equivalent fixture flow sum" in L/s.
-    # k is a crude simultaneity factor.
-    return dfus * k
+def suggest_rain_pipe_dn(q_lps: float, slope_pct: float = 1.0, max_filling: float = 0.7, kb_mm: float = 1.0) -> Dict[str, float]:
+    # Gravity pipe at slope J and filling ratio h/d (DIN 1986-100: h/d = 0.7 inside buildings)
+    r = size_gravity_pipes(q_lps, slope_pct, max_filling=max_filling, kb_mm=kb_mm)
+    return {k: float(v[0]) for k, v in r.items()}
+
+def wastewater_flow_lps(sum_du: float, k: float=0.5) -> float:
+    # EN 12056-2: Qww = K * sqrt(sum DU). For whole networks see calcs_wastewater.du_network.
+    return k * math.sqrt(max(0.0, sum_du))
 
 def drainage_advisories() -> List[Advisory]:
     return [
         Advisory("warning", "For final design: DIN EN 12056 (gravity drainage) and DIN 1986-100 (German scope for private ground drainage)."),
         Advisory("info", "Rain intensity r must come from local datasets (e.g., KOSTRA/DWD) per the adopted method."),
     ]
+
+
+profile_functions(globals())
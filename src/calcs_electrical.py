@@ -6,6 +6,9 @@ import math
 import pandas as pd
 
 from .utils import current_3ph_from_kw, pick_cable_section, Advisory
+from .memo import memoize
+from .models import Efficiency, Fraction, NonNegative, Positive
+from .profiling import profile_functions
 
 MOTOR_START_METHODS = {
     "Direct on line (DOL)": 6.0,
@@ -17,9 +20,10 @@ MOTOR_START_METHODS = {
 @dataclass
 class LoadItem:
     name: str
-    kw: float
-    simultaneity: float
+    kw: NonNegative
+    simultaneity: Fraction
 
+@memoize
 def compute_demand(loads: List[LoadItem]) -> Tuple[float, pd.DataFrame]:
     rows=[]
     total_inst=0.0
@@ -45,14 +49,14 @@ def motor_design_current(kw: float, v_ll: float, pf: float, eff: float, start_me
     return {"I_nom_A": i_nom, "I_start_A": i_start, "mult": mult}
 
 def size_feeder(
-    p_dem_kw: float,
-    v_ll: float = 400.0,
-    pf: float = 0.9,
-    eff: float = 0.95,
-    length_m: float = 50.0,
-    max_vdrop_pct: float = 3.0,
+    p_dem_kw: NonNegative,
+    v_ll: Positive = 400.0,
+    pf: Efficiency = 0.9,
+    eff: Efficiency = 0.95,
+    length_m: Positive = 50.0,
+    max_vdrop_pct: Positive = 3.0,
     add_motor: bool = False,
-    motor_kw: float = 0.0,
+    motor_kw: NonNegative = 0.0,
     motor_start_method: str = "Direct on line (DOL)",
 ) -> Dict[str, object]:
     adv=[]
@@ -91,3 +95,6 @@ def size_feeder(
         "motor": motor_info,
         "advisories": adv,
     }
+
+
+profile_functions(globals())
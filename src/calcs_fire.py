@@ -1,20 +1,29 @@
 
 from __future__ import annotations
 from typing import Dict, List
+import pandas as pd
 from .utils import Advisory
+from .data_catalog import file_stamp
+from .fire_rules import FIRE_RULES_PATH, GENERIC_STATE, screen_buildings
+from .memo import memoize
+from .profiling import profile_functions
 
-def fire_predim(building_use: str, gross_area_m2: float, stories: int, underground: bool) -> Dict[str, object]:
+@memoize(depends=lambda: file_stamp(FIRE_RULES_PATH))
+def fire_predim(building_use: str, gross_area_m2: float, stories: int, underground: bool,
+                bundesland: str = GENERIC_STATE, persons: int = 0) -> Dict[str, object]:
     adv=[]
     # Not a real code checker. Provide a "decision helper" for when a specialist plan is required.
     needs_specialist = True
-    reasons = []
-    if gross_area_m2 > 5000:
-        reasons.append("Area > 5.000 m² (umbral indicative interno)")
-    if stories >= 6:
-        reasons.append("High-rise building (>=6 storeys, indicative)")
-    if underground:
-        reasons.append("Espacios below ground presentes")
-    if not reasons:
+    screen = screen_buildings(pd.DataFrame([{
+        "bundesland": bundesland,
+        "use": building_use,
+        "gross_area_m2": float(gross_area_m2),
+        "storeys": int(stories),
+        "floors_below": 1 if underground else 0,
+        "persons": int(persons),
+    }])).iloc[0]
+    reasons = list(screen["reasons"])
+    if not screen["sonderbau"]:
         reasons.append("Requirements depend on the Landesbauordnung, building use, and the fire safety concept.")
 
     adv.append(Advisory("danger",
@@ -25,6 +34,13 @@ def fire_predim(building_use: str, gross_area_m2: float, stories: int, undergrou
 
     return {
         "needs_specialist": needs_specialist,
+        "building_class": screen["building_class"],
+        "sonderbau": bool(screen["sonderbau"]),
+        "sprinkler": bool(screen["sprinkler"]),
+        "alarm": bool(screen["alarm"]),
         "reasons": reasons,
         "advisories": adv,
     }
+
+
+profile_functions(globals())
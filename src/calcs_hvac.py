@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from typing import Dict, List
 import pandas as pd
 from .utils import Advisory, clamp
+from .profiling import profile_functions
 
 # Very simplified benchmark ranges (user can override)
 DEFAULT_LOADS_W_M2 = {
@@ -41,3 +42,6 @@ def hvac_advisories(use: str) -> List[Advisory]:
     if use.lower().startswith("data"):
         adv.append(Advisory("warning", "IT rooms: heat loads and N+1 redundancy typically require detailed engineering."))
     return adv
+
+
+profile_functions(globals())
@@ -0,0 +1,194 @@
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+from .utils import Advisory
+from .memo import memoize
+from .profiling import profile_functions
+
+# Detector / sprinkler head counts from floor-plate polygons (local metric coordinates).
+# Each storey is rasterized (even-odd scanline fill) and covered with a square grid of devices:
+# one device per grid block that contains floor, moved to the centroid of that block's floor cells,
+# then any cell left outside the coverage radius gets an extra device (greedy). Several grid phases
+# are tried and the cheapest kept. Identical plates (typical floors) are laid out once.
+
+Ring = np.ndarray             # (k, 2) vertices
+Polygon = List[Ring]          # outer ring + holes
+FloorPlates = Dict[str, List[Polygon]]
+
+# Coverage radius (m), maximum spacing (m) and maximum area per device (m²) — indicative values
+DEVICE_RULES = {
+    "Smoke detector (DIN VDE 0833-2)": {"radius_m": 6.5, "spacing_m": 9.0, "area_m2": 80.0},
+    "Heat detector (DIN VDE 0833-2)": {"radius_m": 4.4, "spacing_m": 6.0, "area_m2": 30.0},
+    "Sprinkler LH (EN 12845)": {"radius_m": 3.25, "spacing_m": 4.6, "area_m2": 21.0},
+    "Sprinkler OH (EN 12845)": {"radius_m": 2.85, "spacing_m": 4.0, "area_m2": 12.0},
+    "Sprinkler HHP (EN 12845)": {"radius_m": 2.6, "spacing_m": 3.7, "area_m2": 9.0},
+}
+
+
+def load_floor_plates(path, storey_field: str = "storey") -> FloorPlates:
+    """Floor plates from GeoJSON (Polygon / MultiPolygon features with a storey property)
+    or CSV (storey, [polygon], [ring], x, y — vertices in order, ring 0 = outline, others = holes).
+    Accepts a path or an uploaded file object."""
+    plates: FloorPlates = {}
+    if Path(getattr(path, "name", str(path))).suffix.lower() in (".geojson", ".json"):
+        if hasattr(path, "read"):
+            data = json.load(path)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        for feat in data.get("features", []):
+            geom = feat.get("geometry") or {}
+            storey = str((feat.get("properties") or {}).get(storey_field, "L00"))
+            polys = [geom["coordinates"]] if geom.get("type") == "Polygon" else geom.get("coordinates", [])
+            for poly in polys:
+                plates.setdefault(storey, []).append([np.asarray(r, dtype=float)[:, :2] for r in poly])
+        return plates
+    df = pd.read_csv(path)
+    return floor_plates_from_frame(df, storey_field)
+
+
+def floor_plates_from_frame(df: pd.DataFrame, storey_field: str = "storey") -> FloorPlates:
+    df = df.copy()
+    for c, default in (("polygon", 0), ("ring", 0)):
+        if c not in df:
+            df[c] = default
+    plates: FloorPlates = {}
+    for (storey, _), poly in df.groupby([storey_field, "polygon"], sort=False):
+        rings = [g[["x", "y"]].to_numpy(dtype=float) for _, g in poly.groupby("ring", sort=True)]
+        plates.setdefault(str(storey), []).append(rings)
+    return plates
+
+
+def polygon_area_m2(polygon: Polygon) -> float:
+    """Shoelace area: outline minus holes."""
+    def ring_area(r: Ring) -> float:
+        x, y = r[:, 0], r[:, 1]
+        return 0.5 * abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))))
+    return ring_area(polygon[0]) - sum(ring_area(h) for h in polygon[1:])
+
+
+def rasterize(polygons: List[Polygon], cell_m: float = 0.5) -> Tuple[np.ndarray, float, float]:
+    """Boolean floor mask (rows = y, cols = x) of cell centres inside the plate; returns (mask, x0, y0)."""
+    pts = np.concatenate([r for poly in polygons for r in poly])
+    x0, y0 = pts.min(axis=0) - cell_m
+    nx = int(np.ceil((pts[:, 0].max() - x0) / cell_m)) + 2
+    ny = int(np.ceil((pts[:, 1].max() - y0) / cell_m)) + 2
+    yc = y0 + (np.arange(ny) + 0.5) * cell_m
+    mask = np.zeros((ny, nx), dtype=bool)
+    for poly in polygons:
+        # Even-odd over all rings of one polygon (holes), union across polygons
+        ax = np.concatenate([r[:, 0] for r in poly])
+        ay = np.concatenate([r[:, 1] for r in poly])
+        bx = np.concatenate([np.roll(r[:, 0], -1) for r in poly])
+        by = np.concatenate([np.roll(r[:, 1], -1) for r in poly])
+        lo, hi = np.minimum(ay, by), np.maximum(ay, by)
+        cross = (yc[:, None] >= lo[None, :]) & (yc[:, None] < hi[None, :])     # (rows, edges)
+        row, edge = np.nonzero(cross)
+        t = (yc[row] - ay[edge]) / (by[edge] - ay[edge])
+        xi = ax[edge] + t * (bx[edge] - ax[edge])
+        col = np.clip(np.ceil((xi - x0) / cell_m - 0.5).astype(np.int64), 0, nx)
+        toggles = np.zeros((ny, nx + 1), dtype=np.int64)
+        np.add.at(toggles, (row, col), 1)
+        mask |= (np.cumsum(toggles, axis=1)[:, :nx] % 2).astype(bool)
+    return mask, float(x0), float(y0)
+
+
+def device_pitch_m(radius_m: float, spacing_m: float, area_m2: float) -> float:
+    """Square-grid pitch: within spacing, area per device, and every point within the radius (pitch ≤ r·√2)."""
+    return float(min(spacing_m, radius_m * np.sqrt(2.0), np.sqrt(area_m2)))
+
+
+def _grid_cover(mask: np.ndarray, cell_m: float, radius_m: float, spacing_m: float, area_m2: float,
+                phases: int = 3) -> np.ndarray:
+    """Device positions (in cell units, col/row) covering every floor cell within radius_m."""
+    k = max(1, int(np.floor(device_pitch_m(radius_m, spacing_m, area_m2) / cell_m + 1e-9)))
+    r_cells = radius_m / cell_m
+    rows, cols = np.nonzero(mask)
+    if not len(rows):
+        return np.zeros((0, 2))
+    best: Optional[np.ndarray] = None
+    for oy in np.linspace(0, k, phases, endpoint=False).astype(int):
+        for ox in np.linspace(0, k, phases, endpoint=False).astype(int):
+            by = (rows + oy) // k
+            bx = (cols + ox) // k
+            nbx = int(bx.max()) + 1
+            block, inv = np.unique(by * nbx + bx, return_inverse=True)
+            cnt = np.bincount(inv)
+            dev = np.column_stack([np.bincount(inv, weights=cols + 0.5) / cnt,
+                                   np.bincount(inv, weights=rows + 0.5) / cnt])
+            # Cells outside the radius of their own block's device
+            d2 = (cols + 0.5 - dev[inv, 0]) ** 2 + (rows + 0.5 - dev[inv, 1]) ** 2
+            far = np.flatnonzero(d2 > r_cells**2)
+            if len(far):
+                fx, fy = cols[far] + 0.5, rows[far] + 0.5
+                near = ((fx[:, None] - dev[None, :, 0]) ** 2 + (fy[:, None] - dev[None, :, 1]) ** 2 <= r_cells**2).any(axis=1)
+                fx, fy = fx[~near], fy[~near]
+                extra = []
+                while len(fx):
+                    extra.append((fx[0], fy[0]))
+                    keep = (fx - fx[0]) ** 2 + (fy - fy[0]) ** 2 > r_cells**2
+                    fx, fy = fx[keep], fy[keep]
+                if extra:
+                    dev = np.vstack([dev, np.asarray(extra)])
+            if best is None or len(dev) < len(best):
+                best = dev
+    return best if best is not None else np.zeros((0, 2))
+
+
+@memoize
+def layout_devices(
+    plates: FloorPlates,
+    device: str = "Smoke detector (DIN VDE 0833-2)",
+    radius_m: Optional[float] = None,
+    spacing_m: Optional[float] = None,
+    area_m2: Optional[float] = None,
+    cell_m: float = 0.5,
+) -> Dict[str, object]:
+    """Place detectors / sprinkler heads on every storey and count them.
+
+    Returns a per-storey table, the total count and device coordinates (m) per storey.
+    """
+    rule = DEVICE_RULES.get(device, DEVICE_RULES["Smoke detector (DIN VDE 0833-2)"])
+    radius = float(radius_m or rule["radius_m"])
+    spacing = float(spacing_m or rule["spacing_m"])
+    max_area = float(area_m2 or rule["area_m2"])
+    # Snap the raster so the device pitch is a whole number of cells
+    pitch = device_pitch_m(radius, spacing, max_area)
+    cell_m = pitch / np.ceil(pitch / float(cell_m))
+    cache: Dict[str, np.ndarray] = {}
+    positions: Dict[str, np.ndarray] = {}
+    rows = []
+    for storey, polys in plates.items():
+        key = hashlib.sha1(b"".join(np.ascontiguousarray(r, dtype=float).tobytes() for p in polys for r in p)).hexdigest()
+        if key not in cache:
+            mask, x0, y0 = rasterize(polys, cell_m)
+            dev = _grid_cover(mask, cell_m, radius, spacing, max_area)
+            cache[key] = np.column_stack([x0 + dev[:, 0] * cell_m, y0 + dev[:, 1] * cell_m])
+            if not len(dev) and polys:
+                # Plate thinner than a raster cell: one device per polygon, at its outline's centre
+                cache[key] = np.array([np.asarray(p[0], dtype=float).mean(axis=0) for p in polys])
+        positions[storey] = cache[key]
+        area = sum(polygon_area_m2(p) for p in polys)
+        n = len(cache[key])
+        rows.append({"Storey": storey, "Floor area (m²)": area, "Devices": n,
+                     "m² per device": area / n if n else float("nan")})
+    df = pd.DataFrame(rows, columns=["Storey", "Floor area (m²)", "Devices", "m² per device"])
+    adv: List[Advisory] = [
+        Advisory("info", f"{device}: coverage radius {radius:.2f} m, max spacing {spacing:.2f} m, max {max_area:.0f} m² per device. "
+                         "Open-plan estimate; walls, beams, ceiling voids and room subdivision add devices."),
+    ]
+    return {
+        "storeys": df,
+        "total": int(df["Devices"].sum()),
+        "positions": positions,
+        "unique_plates": len(cache),
+        "advisories": adv,
+    }
+
+
+profile_functions(globals())
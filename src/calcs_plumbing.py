@@ -4,6 +4,8 @@ from dataclasses import dataclass
 from typing import Dict, List
 import pandas as pd
 from .utils import Advisory, clamp
+from .models import Count, FixtureCounts, NonNegative
+from .profiling import profile_functions
 
 # Simplified fixture unit approach (not a substitute for DIN 1988-300 / EN 806-3)
 FIXTURE_DEFAULTS = {
@@ -14,7 +16,7 @@ FIXTURE_DEFAULTS = {
     "Urinal": {"q_lps": 0.10},
 }
 
-def peak_flow_lps(fixtures: Dict[str,int], simultaneity: float) -> Dict[str, float]:
+def peak_flow_lps(fixtures: FixtureCounts, simultaneity: float) -> Dict[str, float]:
     simultaneity = clamp(simultaneity, 0.1, 1.0)
     q_sum = 0.0
     for k,n in fixtures.items():
@@ -31,7 +33,7 @@ def suggest_pipe_diameter_mm(q_lps: float, v_max: float = 2.0) -> float:
     d = math.sqrt(4*q/(math.pi*v_max))
     return d*1000.0  # mm
 
-def acs_energy_kwh_per_day(persons: int, liters_per_person_day: float, deltaT_K: float = 35.0, eff: float=0.9) -> float:
+def acs_energy_kwh_per_day(persons: Count, liters_per_person_day: NonNegative, deltaT_K: float = 35.0, eff: float=0.9) -> float:
     # E = m*cp*ΔT ; m~liters kg ; cp 4.186 kJ/kgK
     m = persons * liters_per_person_day
     e_kj = m * 4.186 * deltaT_K
@@ -43,3 +45,6 @@ def plumbing_advisories() -> List[Advisory]:
         Advisory("warning", "This module uses a simplified method. For final sizing: DIN 1988-300 and EN 806-3 (and DVGW requirements)."),
         Advisory("info", "Typical internal network velocities are usually limited (e.g., 2 m/s as a reference)."),
     ]
+
+
+profile_functions(globals())
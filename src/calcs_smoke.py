@@ -0,0 +1,187 @@
+
+from __future__ import annotations
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .utils import Advisory
+from .memo import memoize
+from .profiling import profile_functions
+
+# Early airflow figures for smoke extraction (per storey) and stair pressurization (per stair core),
+# to reserve fan and shaft space. Indicative only; the fire safety concept governs.
+#
+# Smoke extraction: axisymmetric plume entrainment (DIN 18232-2 / EN 12101-5 style)
+#   M = 0.188 · P · y^1.5 (kg/s), P = fire perimeter (m), y = smoke-free height (m)
+#   V = M / ρ_smoke,  ρ_smoke = 353 / T_smoke(K)
+# Pressurization (EN 12101-6): leakage through closed paths Q = 0.83 · A · ΔP^0.5 (m³/s),
+# supply = max(pressure criterion, open-door airflow criterion) · allowance.
+# All storeys × stair cores are evaluated as one array; risers are sized for the governing storey.
+
+LEAKAGE_COEFF = 0.83
+SMOKE_ZONE_MAX_M2 = 1600.0  # largest smoke compartment (DIN 18232)
+
+# Leakage area per leaf (m²) at closed doors, EN 12101-6 typical values
+DOOR_LEAKAGE_M2 = {
+    "Single leaf, into stair": 0.01,
+    "Single leaf, out of stair": 0.02,
+    "Double leaf": 0.03,
+    "Lift landing door": 0.06,
+}
+
+# EN 12101-6 system classes: pressure difference (Pa), door velocity (m/s)
+PRESSURIZATION_CLASSES = {
+    "A (residential, stay put)": {"dp_pa": 50.0, "v_door_m_s": 0.75},
+    "B (fire fighting)": {"dp_pa": 45.0, "v_door_m_s": 2.0},
+    "C (simultaneous evacuation)": {"dp_pa": 50.0, "v_door_m_s": 0.75},
+    "D (sleeping risk)": {"dp_pa": 50.0, "v_door_m_s": 0.75},
+    "E (phased evacuation)": {"dp_pa": 50.0, "v_door_m_s": 0.75},
+}
+
+
+def plume_mass_flow_kg_s(perimeter_m, smoke_free_height_m) -> np.ndarray:
+    """Entrained plume mass flow M = 0.188·P·y^1.5 (kg/s)."""
+    p = np.maximum(0.0, np.asarray(perimeter_m, dtype=float))
+    y = np.maximum(0.0, np.asarray(smoke_free_height_m, dtype=float))
+    return 0.188 * p * y**1.5
+
+
+def leakage_flow_m3s(area_m2, dp_pa) -> np.ndarray:
+    """Q = 0.83·A·ΔP^0.5 (m³/s)."""
+    return LEAKAGE_COEFF * np.asarray(area_m2, dtype=float) * np.sqrt(np.maximum(0.0, np.asarray(dp_pa, dtype=float)))
+
+
+def building_storeys(area_above_m2: float, area_below_m2: float, floors_above: int, floors_below: int,
+                     storey_height_m: float = 3.5) -> pd.DataFrame:
+    """Storey table from the project definition: equal floor plates above and below ground."""
+    fa = max(1, int(floors_above or 1))
+    fb = max(0, int(floors_below or 0))
+    level = np.arange(-fb, fa)
+    area = np.where(level < 0, float(area_below_m2) / max(1, fb), float(area_above_m2) / fa)
+    return pd.DataFrame({
+        "storey": [f"{'B' if lv < 0 else 'L'}{abs(lv) if lv < 0 else lv:02d}" for lv in level],
+        "level": level,
+        "area_m2": area,
+        "height_m": float(storey_height_m),
+    })
+
+
+def _col(df: pd.DataFrame, name: str, default) -> np.ndarray:
+    if name in df:
+        return df[name].fillna(pd.Series(default, index=df.index) if np.ndim(default) else default).to_numpy()
+    return np.broadcast_to(np.asarray(default), (len(df),)).copy()
+
+
+@memoize
+def smoke_control(
+    storeys: pd.DataFrame,
+    stairs: Optional[pd.DataFrame] = None,
+    fire_perimeter_m: float = 12.0,
+    smoke_temp_C: float = 300.0,
+    pressurization_class: str = "C (simultaneous evacuation)",
+    relief_dp_pa: float = 10.0,
+    allowance: float = 1.25,
+    v_extract_shaft_m_s: float = 10.0,
+    v_supply_shaft_m_s: float = 8.0,
+    shaft_gross_factor: float = 1.3,
+) -> Dict[str, object]:
+    """Smoke-extraction rates per storey and pressurization supply per stair core.
+
+    storeys: one row per storey with area_m2, height_m and optionally smoke_extraction (bool),
+    smoke_zone_m2 (default min(area, 1600)) and smoke_free_height_m (default half the storey height, ≥ 2.5 m).
+    stairs: one row per stair core with optionally stair, from_storey / to_storey (row positions),
+    doors_per_storey, door_leak_m2, wall_leak_m2 (per storey), door_area_m2, open_doors.
+
+    The extract riser serves one fire storey at a time (largest storey flow); each stair has its own
+    supply riser. shaft_m2_per_floor is the gross riser area to reserve on a typical floor.
+    """
+    n = len(storeys)
+    area = np.maximum(0.0, _col(storeys, "area_m2", 0.0).astype(float))
+    height = np.maximum(0.0, _col(storeys, "height_m", 3.5).astype(float))
+    extract = _col(storeys, "smoke_extraction", True).astype(bool)
+    zone = np.minimum(area, _col(storeys, "smoke_zone_m2", SMOKE_ZONE_MAX_M2).astype(float))
+    zone = np.where(zone > 0, zone, np.minimum(area, SMOKE_ZONE_MAX_M2))
+    y = np.minimum(height, _col(storeys, "smoke_free_height_m", np.maximum(2.5, 0.5 * height)).astype(float))
+    labels = storeys["storey"].to_numpy() if "storey" in storeys else storeys.index.to_numpy()
+    adv: List[Advisory] = []
+
+    # --- Smoke extraction per storey (one zone in fire at a time)
+    rho_smoke = 353.0 / (float(smoke_temp_C) + 273.15)
+    mass = np.where(extract, plume_mass_flow_kg_s(fire_perimeter_m, y), 0.0)
+    v_ext = mass / rho_smoke                                  # m³/s
+    n_zones = np.where(area > 0, np.ceil(area / np.maximum(zone, 1e-9)), 0).astype(np.int64)
+    ext_shaft = v_ext / float(v_extract_shaft_m_s) * float(shaft_gross_factor)
+
+    # --- Stair pressurization: storeys × stairs leakage matrix
+    if stairs is None:
+        stairs = pd.DataFrame({"stair": ["Stair 1"]})
+    cls = PRESSURIZATION_CLASSES.get(pressurization_class, PRESSURIZATION_CLASSES["C (simultaneous evacuation)"])
+    first = np.clip(_col(stairs, "from_storey", 0).astype(np.int64), 0, max(0, n - 1))
+    last = np.clip(_col(stairs, "to_storey", n - 1).astype(np.int64), 0, max(0, n - 1))
+    doors = np.maximum(0.0, _col(stairs, "doors_per_storey", 1.0).astype(float))
+    door_leak = np.maximum(0.0, _col(stairs, "door_leak_m2", DOOR_LEAKAGE_M2["Single leaf, into stair"]).astype(float))
+    wall_leak = np.maximum(0.0, _col(stairs, "wall_leak_m2", 0.005).astype(float))
+    door_area = np.maximum(0.0, _col(stairs, "door_area_m2", 2.0).astype(float))
+    open_doors = np.maximum(0.0, _col(stairs, "open_doors", 1.0).astype(float))
+
+    pos = np.arange(n)[:, None]
+    served = (pos >= first[None, :]) & (pos <= last[None, :])          # (storeys, stairs)
+    leak_storey = np.where(served, doors * door_leak + wall_leak, 0.0)  # m² per storey and stair
+    q_leak = leakage_flow_m3s(leak_storey, cls["dp_pa"])                # m³/s at design ΔP
+    n_served = served.sum(axis=0)
+    a_closed = leak_storey.sum(axis=0)
+
+    q_pressure = leakage_flow_m3s(a_closed, cls["dp_pa"])
+    # Airflow criterion: open door(s) on the fire storey, remaining paths at the relief pressure
+    q_door = cls["v_door_m_s"] * door_area * open_doors
+    a_rest = np.maximum(0.0, a_closed - open_doors * door_leak)
+    q_airflow = q_door + leakage_flow_m3s(a_rest, relief_dp_pa)
+    q_supply = np.maximum(q_pressure, q_airflow) * float(allowance)
+    q_supply = np.where(n_served > 0, q_supply, 0.0)
+    injection_points = np.where(n_served > 0, np.ceil(n_served / 3.0), 0).astype(np.int64)
+    relief_m2 = q_door / (LEAKAGE_COEFF * np.sqrt(max(relief_dp_pa, 1e-9)))
+    sup_shaft = q_supply / float(v_supply_shaft_m_s) * float(shaft_gross_factor)
+
+    storey_df = pd.DataFrame({
+        "Storey": labels,
+        "Area (m²)": area,
+        "Smoke zones": n_zones,
+        "Smoke-free height (m)": np.where(extract, y, np.nan),
+        "Plume mass flow (kg/s)": mass,
+        "Extraction (m³/h)": v_ext * 3600.0,
+        "Extract shaft (m²)": ext_shaft,
+        "Stair leakage @ΔP (m³/h)": q_leak.sum(axis=1) * 3600.0,
+        "Stairs served": served.sum(axis=1),
+    })
+    stair_df = pd.DataFrame({
+        "Stair": stairs["stair"].to_numpy() if "stair" in stairs else stairs.index.to_numpy(),
+        "Storeys served": n_served,
+        "Leakage area (m²)": a_closed,
+        "Pressure criterion (m³/h)": q_pressure * 3600.0,
+        "Airflow criterion (m³/h)": q_airflow * 3600.0,
+        "Supply incl. allowance (m³/h)": q_supply * 3600.0,
+        "Injection points": injection_points,
+        "Fire-storey relief (m²)": relief_m2,
+        "Supply shaft (m²)": sup_shaft,
+    })
+
+    extract_fan = float(v_ext.max()) * 3600.0 if n else 0.0
+    extract_riser = float(ext_shaft.max()) if n else 0.0
+    shaft_per_floor = extract_riser + float(sup_shaft.sum())
+
+    if (n_served > 11).any():
+        adv.append(Advisory("warning", "Stairs serving more than 11 storeys: check stack effect and pressure relief (EN 12101-6 multi-point injection)."))
+    if (extract & (area > SMOKE_ZONE_MAX_M2)).any():
+        adv.append(Advisory("info", f"Storeys above {SMOKE_ZONE_MAX_M2:.0f} m² need several smoke zones; extraction is sized for one zone in fire."))
+    adv.append(Advisory("info", "Indicative plume / leakage method (DIN 18232, EN 12101-6). Final values follow the fire safety concept and system certification."))
+
+    return {
+        "storeys": storey_df,
+        "stairs": stair_df,
+        "extract_fan_m3h": extract_fan,
+        "pressurization_m3h": float(q_supply.sum()) * 3600.0,
+        "shaft_m2_per_floor": shaft_per_floor,
+        "advisories": adv,
+    }
+
+
+profile_functions(globals())
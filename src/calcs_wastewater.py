@@ -0,0 +1,161 @@
+
+from __future__ import annotations
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from .utils import Advisory
+from .hydraulics import parent_positions, tree_depth, subtree_sum, subtree_max
+from .gravity_pipes import DN, size_gravity_pipes
+from .memo import memoize
+from .profiling import profile_functions
+
+# Discharge-unit (DU) method per EN 12056-2, System I (single discharge stack, partially filled branches).
+# Values are the commonly published System I figures; verify against the standard text.
+
+DISCHARGE_UNITS = {
+    "Washbasin": 0.5,
+    "Shower (no plug)": 0.6,
+    "Shower (with plug)": 0.8,
+    "Urinal (cistern)": 0.8,
+    "Urinal (pressure valve)": 0.5,
+    "Bath": 0.8,
+    "Kitchen sink": 0.8,
+    "Dishwasher (domestic)": 0.8,
+    "Washing machine (6 kg)": 0.8,
+    "Washing machine (12 kg)": 1.5,
+    "WC (6 L cistern)": 2.0,
+    "WC (9 L cistern)": 2.5,
+    "Floor gully DN 50": 0.8,
+    "Floor gully DN 70": 1.5,
+    "Floor gully DN 100": 2.0,
+}
+WC_FIXTURES = {k for k in DISCHARGE_UNITS if k.startswith("WC")}
+
+# Frequency factor K (EN 12056-2 Table 3)
+FREQUENCY_FACTOR_K = {
+    "Intermittent use (dwelling, guesthouse, office)": 0.5,
+    "Frequent use (hospital, school, restaurant, hotel)": 0.7,
+    "Congested use (public toilets and/or showers)": 1.0,
+    "Special use (laboratory)": 1.2,
+}
+
+# Hydraulic capacities Qmax (L/s) by DN; NaN where the DN is not tabulated for that element, so it
+# never fits: flows beyond the table are flagged undersized instead of landing on an untabulated DN.
+# Ventilated branches, System I (EN 12056-2 Table 5)
+BRANCH_QMAX_LPS = np.array([0.75, 1.5, 2.25, 3.0, 3.4, 3.75] + [np.nan] * 6)
+# Stacks with primary ventilation, System I, swept entries (EN 12056-2 Table 11)
+STACK_QMAX_LPS = np.array([np.nan, 0.7, 2.0, 2.6, 3.5, 5.2, 7.6, 12.4, 21.0, np.nan, np.nan, np.nan])
+WC_MIN_DN = 100
+WASTEWATER_ROUGHNESS_MM = 1.0  # operational roughness kb for building drains
+
+
+def wastewater_flow_lps(sum_du, k: float = 0.5) -> np.ndarray:
+    """Qww = K·√ΣDU (L/s)."""
+    return float(k) * np.sqrt(np.maximum(0.0, np.asarray(sum_du, dtype=float)))
+
+
+def _pick_dn(q_lps: np.ndarray, qmax_table: np.ndarray) -> np.ndarray:
+    """Smallest DN whose Qmax >= q for each row (table columns = DN, NaN never fits). Returns 0 if none fits."""
+    ok = qmax_table >= q_lps[:, None]
+    idx = np.argmax(ok, axis=1)
+    return np.where(ok.any(axis=1), DN[idx], 0)
+
+
+@memoize
+def du_network(
+    segments: pd.DataFrame,
+    fixtures: pd.DataFrame,
+    k: float = 0.5,
+    filling_ratio: float = 0.5,
+) -> Dict[str, object]:
+    """Accumulate DU through a drainage tree and size every segment.
+
+    `segments`: one row per pipe with columns
+    - parent: row label (segment id) of the downstream segment (-1 for the building outlet);
+      ids survive dropped rows, a parent id that is not a row raises ValueError
+    - kind: "branch" | "stack" | "collector"
+    - optional: slope_pct (collectors/branches, default 1.0), q_cont_lps, q_pump_lps
+
+    `fixtures`: rows of (segment id, fixture, count) — fixtures are looked up in DISCHARGE_UNITS.
+
+    Per segment: Qww = K·√ΣDU, not less than the largest single DU downstream of it,
+    plus continuous and pumped flows. DN never decreases in flow direction.
+    """
+    for c in ("parent", "kind"):
+        if c not in segments.columns:
+            raise ValueError(f"Missing segment column: {c}")
+    n = len(segments)
+    parent = parent_positions(segments.index, segments["parent"].to_numpy(dtype=np.int64))
+    kind = segments["kind"].astype(str).str.lower().to_numpy()
+    slope = segments["slope_pct"].to_numpy(dtype=float) if "slope_pct" in segments else np.full(n, 1.0)
+    q_cont = segments["q_cont_lps"].to_numpy(dtype=float) if "q_cont_lps" in segments else np.zeros(n)
+    q_pump = segments["q_pump_lps"].to_numpy(dtype=float) if "q_pump_lps" in segments else np.zeros(n)
+    adv: List[Advisory] = []
+
+    fx_name = fixtures["fixture"].astype(str)
+    unknown = sorted(set(fx_name) - set(DISCHARGE_UNITS))
+    if unknown:
+        adv.append(Advisory("warning", f"Unknown fixture types ignored: {', '.join(unknown)}"))
+    du_each = fx_name.map(DISCHARGE_UNITS).fillna(0.0).to_numpy(dtype=float)
+    count = np.maximum(0, fixtures["count"].to_numpy(dtype=float))
+    seg_idx = segments.index.get_indexer(fixtures["segment"].to_numpy(dtype=np.int64))
+    if (seg_idx < 0).any():
+        raise ValueError("fixture segment not among the segment ids")
+    du_own = np.bincount(seg_idx, weights=du_each * count, minlength=n)
+    du_max_own = np.zeros(n)
+    np.maximum.at(du_max_own, seg_idx, np.where(count > 0, du_each, 0.0))
+    wc_own = np.bincount(seg_idx, weights=np.where(fx_name.isin(WC_FIXTURES), count, 0.0), minlength=n)
+
+    depth = tree_depth(parent)
+    du_sum = subtree_sum(parent, du_own, depth)
+    du_max = subtree_max(parent, du_max_own, depth)
+    wc_sum = subtree_sum(parent, wc_own, depth)
+    q_ww = np.maximum(wastewater_flow_lps(du_sum, k), du_max)
+    q_tot = q_ww + subtree_sum(parent, q_cont, depth) + subtree_sum(parent, q_pump, depth)
+
+    is_branch = kind == "branch"
+    is_stack = kind == "stack"
+    is_coll = ~(is_branch | is_stack)
+    dn = np.zeros(n, dtype=np.int64)
+    if is_branch.any():
+        dn[is_branch] = _pick_dn(q_tot[is_branch], BRANCH_QMAX_LPS[None, :])
+    if is_stack.any():
+        dn[is_stack] = _pick_dn(q_tot[is_stack], STACK_QMAX_LPS[None, :])
+    fill = np.full(n, np.nan)
+    if is_coll.any():
+        coll = size_gravity_pipes(q_tot[is_coll], slope[is_coll], max_filling=filling_ratio,
+                                  kb_mm=WASTEWATER_ROUGHNESS_MM, min_dn=np.where(wc_sum[is_coll] > 0, WC_MIN_DN, 0))
+        dn[is_coll] = coll["DN"]
+        fill[is_coll] = coll["filling_ratio"]
+
+    undersized = dn == 0
+    dn = np.where(undersized, DN[-1], dn)
+    dn = np.where(wc_sum > 0, np.maximum(dn, WC_MIN_DN), dn)
+    dn = subtree_max(parent, dn, depth).astype(np.int64)
+
+    if undersized.any():
+        adv.append(Advisory("danger",
+            f"{int(undersized.sum())} segment(s) exceed the largest tabulated capacity; split the network or use multiple stacks."))
+    adv.append(Advisory("info", "EN 12056-2 System I DU method (pre-sizing). Check ventilation, stack offsets and DIN 1986-100 for ground drainage."))
+
+    df = pd.DataFrame({
+        "Segment": segments.index,
+        "Parent": segments["parent"].to_numpy(dtype=np.int64),
+        "Kind": kind,
+        "ΣDU": du_sum,
+        "Qww (L/s)": q_ww,
+        "Qtot (L/s)": q_tot,
+        "DN": dn,
+        "h/d (collector)": fill,
+    })
+    outlet = parent < 0
+    return {
+        "segments": df,
+        "sum_du": float(du_sum[outlet].sum()),
+        "q_outlet_lps": float(q_tot[outlet].sum()),
+        "k": float(k),
+        "advisories": adv,
+    }
+
+
+profile_functions(globals())
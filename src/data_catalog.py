@@ -0,0 +1,124 @@
+
+from __future__ import annotations
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Mapping, Tuple, TypedDict
+import json
+import os
+from .profiling import profile_functions
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# One process-wide catalog for the files in data/. Each file is parsed once and shared by every
+# session as a read-only view (mappings are MappingProxyType, lists become tuples). A file is
+# re-parsed only when its mtime or size changes, so a page rerun costs one os.stat per file.
+# pandas is imported on the first CSV load only (cold start of pages that never read a CSV).
+
+DATA_PATH = Path(__file__).resolve().parent.parent / "data"
+
+
+class UseProfile(TypedDict, total=False):
+    lighting_W_m2: float
+    sockets_W_m2: float
+    other_W_m2: float
+    heating_W_m2: float
+    cooling_W_m2: float
+    occupancy_m2_per_person: float
+    dhw_l_per_person_day: float
+    hvac_eer_cooling: float
+    hvac_fans_W_m2: float
+    lift_area_m2_per_lift: float
+    lift_power_kW_per_lift: float
+    lift_diversity: float
+    tech_rooms_ratio: float
+    shafts_ratio: float
+
+
+class CityPreset(TypedDict, total=False):
+    design_temp_C: float
+    rain_r_l_s_ha: float
+    design_summer_C: float
+
+
+def freeze(obj: Any) -> Any:
+    """Recursively convert parsed JSON into read-only containers."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj: Any) -> Any:
+    """Plain dict / list copy of a frozen view (e.g. for json.dumps or editing)."""
+    if isinstance(obj, Mapping):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+def file_stamp(path: Path) -> Tuple[str, int, int]:
+    """(path, mtime_ns, size): the cache key of a data file version."""
+    st = os.stat(path)
+    return str(path), st.st_mtime_ns, st.st_size
+
+
+@lru_cache(maxsize=32)
+def _parse_json(path: str, mtime_ns: int, size: int) -> Mapping[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return freeze(json.load(f))
+
+
+@lru_cache(maxsize=8)
+def _parse_csv(path: str, mtime_ns: int, size: int) -> pd.DataFrame:
+    import pandas as pd
+    return pd.read_csv(path)
+
+
+def load_json_file(path: Path) -> Mapping[str, Any]:
+    """Parsed, read-only JSON file (cached per process, invalidated on mtime/size change)."""
+    return _parse_json(*file_stamp(Path(path)))
+
+
+def load_json(name: str, data_path: Path = DATA_PATH) -> Mapping[str, Any]:
+    return load_json_file(Path(data_path) / name)
+
+
+def load_csv(name: str, data_path: Path = DATA_PATH) -> pd.DataFrame:
+    """Parsed CSV data file (cached per process). Treat as read-only; copy before modifying."""
+    return _parse_csv(*file_stamp(Path(data_path) / name))
+
+
+def use_profiles() -> Mapping[str, UseProfile]:
+    return load_json("use_profiles.json")
+
+
+def use_profile(use_type: str) -> UseProfile:
+    return use_profiles().get(use_type, MappingProxyType({}))
+
+
+def city_presets() -> Mapping[str, CityPreset]:
+    return load_json("city_presets.json")
+
+
+def city_preset(city: str) -> CityPreset:
+    return city_presets().get(city, MappingProxyType({}))
+
+
+def fire_rules() -> Mapping[str, Any]:
+    return load_json("fire_rules.json")
+
+
+def sources_matrix() -> pd.DataFrame:
+    return load_csv("sources_matrix.csv")
+
+
+def clear_cache() -> None:
+    _parse_json.cache_clear()
+    _parse_csv.cache_clear()
+
+
+profile_functions(globals())
@@ -0,0 +1,371 @@
+
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, List, Sequence, Tuple, Union
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+import math
+import re
+import shutil
+import tempfile
+import zipfile
+from .models import PresizeResult, field_kind
+from .profiling import profile_functions
+
+# Columnar export of pre-sizing results (batch.presize_records rows, one per project).
+#
+# Each row is split into one table per module (project, electrical, HVAC, plumbing, drainage,
+# fire), every table keyed by row / id / city / use_type, and written without going through text:
+#
+#   ParquetDatasetWriter  <dir>/<module>/city=<value>/part-0.parquet (hive partitions), row groups
+#                         flushed whenever `row_group_rows` projects are buffered
+#   ArrowIpcWriter        <dir>/<module>.arrow (Arrow IPC file), one record batch per flush
+#   WorkbookWriter        .xlsx with one sheet per module; rows are streamed to a temporary sheet
+#                         file as they arrive and zipped on close (standard library only)
+#
+# All three take rows through write(rows) like batch.ResultWriter, so run_batch streams a portfolio
+# straight into them; memory is bounded by the buffered row groups. pyarrow is imported only by the
+# Arrow-based writers.
+
+KEY_COLUMNS = ["row", "id", "city", "use_type"]
+
+MODULES: Dict[str, List[str]] = {
+    "project": ["area_above_m2", "area_below_m2", "floors_above", "floors_below", "persons", "roof_area_m2", "error"],
+    "electrical": ["elec_connected_kw", "elec_demand_kw", "feeder_current_A", "feeder_section_mm2"],
+    "hvac": ["hvac_heating_kw", "hvac_cooling_kw", "ventilation_m3h", "hvac_electric_kw", "lifts_kw",
+             "tech_rooms_m2", "shafts_m2"],
+    "plumbing": ["water_peak_lps", "water_main_d_mm", "dhw_kwh_day"],
+    "drainage": ["rain_flow_lps", "rain_collector_DN"],
+    "fire": ["fire_building_class", "fire_sonderbau", "fire_sprinkler", "fire_alarm", "fire_reasons"],
+}
+
+# Column kinds from the result model; columns it does not know are float64
+_KINDS = {c: field_kind(PresizeResult, c) for c in PresizeResult.model_fields}
+
+XLSX_MAX_ROWS = 1_048_576
+
+
+def module_columns(module: str) -> List[str]:
+    return KEY_COLUMNS + MODULES[module]
+
+
+def column_kind(col: str) -> str:
+    """Value kind of a result column: "str", "int", "bool", "list" or "float"."""
+    return _KINDS.get(col, "float")
+
+
+def _value(col: str, v: Any) -> Any:
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return None
+    kind = column_kind(col)
+    if kind == "str":
+        return str(v)
+    if kind == "int":
+        return int(v)
+    if kind == "bool":
+        return bool(v)
+    if kind == "list":
+        return [str(x) for x in v]
+    return float(v)
+
+
+def _schema(module: str, drop: Sequence[str] = ()):
+    import pyarrow as pa
+    types = {"str": pa.string(), "int": pa.int64(), "bool": pa.bool_(), "list": pa.list_(pa.string()), "float": pa.float64()}
+    return pa.schema([(c, types[column_kind(c)]) for c in module_columns(module) if c not in drop])
+
+
+class _ArrowWriter(ABC):
+    """Buffers rows per (module, partition) and hands them to _flush as record batches.
+
+    All buffers are flushed once `row_group_rows` projects are held, whatever the number of
+    partitions, so memory stays bounded; with many partitions the row groups get smaller.
+    """
+
+    partition_by: Tuple[str, ...] = ()
+
+    def __init__(self, row_group_rows: int = 20_000):
+        self.row_group_rows = max(1, int(row_group_rows))
+        self._buffers: Dict[Tuple[str, Tuple[Any, ...]], Dict[str, List[Any]]] = {}
+        self._held = 0
+        self.rows = 0
+
+    def write(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for r in rows:
+            part = tuple(_value(c, r.get(c)) for c in self.partition_by)
+            for module in MODULES:
+                key = (module, part)
+                buf = self._buffers.get(key)
+                if buf is None:
+                    buf = self._buffers[key] = {c: [] for c in module_columns(module) if c not in self.partition_by}
+                for c, col in buf.items():
+                    col.append(_value(c, r.get(c)))
+            self.rows += 1
+            self._held += 1
+            if self._held >= self.row_group_rows:
+                self._emit_all()
+
+    def _emit_all(self) -> None:
+        for key in list(self._buffers):
+            self._emit(key)
+        self._held = 0
+
+    def _emit(self, key: Tuple[str, Tuple[Any, ...]]) -> None:
+        import pyarrow as pa
+        module, part = key
+        buf = self._buffers.pop(key)
+        self._flush(module, part, pa.RecordBatch.from_pydict(buf, schema=_schema(module, self.partition_by)))
+
+    @abstractmethod
+    def _flush(self, module: str, part: Tuple[Any, ...], batch) -> None:
+        """Write one record batch of `module` (partition values `part`)."""
+
+    def close(self) -> None:
+        self._emit_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ParquetDatasetWriter(_ArrowWriter):
+    """Hive-partitioned Parquet dataset per module; read back with read_dataset(<dir>, <module>)."""
+
+    def __init__(self, directory: Union[str, Path], partition_by: Sequence[str] = ("city",),
+                 row_group_rows: int = 20_000, compression: str = "zstd"):
+        super().__init__(row_group_rows)
+        unknown = set(partition_by) - set(KEY_COLUMNS)
+        if unknown:
+            raise ValueError(f"can only partition by {KEY_COLUMNS}, not {sorted(unknown)}")
+        self.directory = Path(directory)
+        self.partition_by = tuple(partition_by)
+        self.compression = compression
+        self._files: Dict[Tuple[str, Tuple[Any, ...]], Any] = {}
+
+    def _flush(self, module, part, batch) -> None:
+        import pyarrow.parquet as pq
+        writer = self._files.get((module, part))
+        if writer is None:
+            folder = self.directory / module
+            for col, v in zip(self.partition_by, part):
+                folder = folder / f"{col}={quote('__HIVE_DEFAULT_PARTITION__' if v is None else str(v), safe='')}"
+            folder.mkdir(parents=True, exist_ok=True)
+            writer = self._files[(module, part)] = pq.ParquetWriter(folder / "part-0.parquet", batch.schema,
+                                                                    compression=self.compression)
+        writer.write_batch(batch)
+
+    def close(self) -> None:
+        super().close()
+        for writer in self._files.values():
+            writer.close()
+        self._files.clear()
+
+
+def read_dataset(directory: Union[str, Path], module: str, partition_by: Sequence[str] = ("city",), **filters: Any):
+    """One module table of a ParquetDatasetWriter output as a DataFrame (optionally city="Berlin", ...).
+
+    The partition schema is given explicitly: inferred hive partitions become dictionary columns
+    that pandas cannot combine once a partition is null (rows that failed before city was known).
+    """
+    import pyarrow.dataset as ds
+    schema = _schema(module)
+    part = ds.partitioning(schema=_schema_of(schema, partition_by), flavor="hive")
+    dataset = ds.dataset(Path(directory) / module, format="parquet", partitioning=part)
+    expr = None
+    for col, v in filters.items():
+        e = ds.field(col) == v
+        expr = e if expr is None else expr & e
+    return dataset.to_table(filter=expr).select(schema.names).to_pandas()
+
+
+def _schema_of(schema, names: Sequence[str]):
+    import pyarrow as pa
+    return pa.schema([schema.field(n) for n in names])
+
+
+class ArrowIpcWriter(_ArrowWriter):
+    """One Arrow IPC file per module; read back with pyarrow.ipc.open_file or pd.read_feather."""
+
+    def __init__(self, directory: Union[str, Path], row_group_rows: int = 20_000, compression: str = "zstd"):
+        super().__init__(row_group_rows)
+        self.directory = Path(directory)
+        self.compression = compression
+        self._files: Dict[str, Any] = {}
+
+    def _flush(self, module, part, batch) -> None:
+        import pyarrow as pa
+        writer = self._files.get(module)
+        if writer is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            writer = self._files[module] = pa.ipc.new_file(str(self.directory / f"{module}.arrow"), batch.schema,
+                                                           options=pa.ipc.IpcWriteOptions(compression=self.compression))
+        writer.write_batch(batch)
+
+    def close(self) -> None:
+        super().close()
+        for writer in self._files.values():
+            writer.close()
+        self._files.clear()
+
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _cell(v: Any) -> str:
+    if v is None:
+        return "<c/>"
+    if isinstance(v, bool):
+        return f'<c t="b"><v>{int(v)}</v></c>'
+    if isinstance(v, (int, float)):
+        return f"<c><v>{v!r}</v></c>" if math.isfinite(v) else "<c/>"
+    if isinstance(v, list):
+        v = "; ".join(v)
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_XML_ILLEGAL.sub("", str(v)))}</t></is></c>'
+
+
+_SHEET_HEAD = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+               '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+               '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" state="frozen"/>'
+               '</sheetView></sheetViews><sheetData>')
+_SHEET_TAIL = "</sheetData></worksheet>"
+_STYLES = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+           '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+           '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+           '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+           '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+           '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+           '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+           '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+           '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+           '</styleSheet>')
+
+
+class WorkbookWriter:
+    """Write-only .xlsx with one sheet per module (continued on "<module> (2)" past Excel's row limit)."""
+
+    def __init__(self, target: Union[str, Path, IO[bytes]]):
+        self.target = target
+        self._tmp = tempfile.TemporaryDirectory(prefix="mep-xlsx-")
+        self._sheets: List[Tuple[str, Path, Any]] = []     # (sheet name, temp file, open handle)
+        self._current: Dict[str, Tuple[Any, int]] = {}     # module -> (handle, rows written)
+        self.rows = 0
+
+    def _open_sheet(self, module: str) -> Any:
+        n = sum(1 for name, _, _ in self._sheets if name.split(" (")[0] == module)
+        name = module if n == 0 else f"{module} ({n + 1})"
+        path = Path(self._tmp.name) / f"sheet{len(self._sheets) + 1}.xml"
+        f = open(path, "w", encoding="utf-8")
+        f.write(_SHEET_HEAD)
+        f.write('<row>' + "".join(_cell(c).replace("<c ", '<c s="1" ') for c in module_columns(module)) + "</row>")
+        self._sheets.append((name, path, f))
+        self._current[module] = (f, 1)
+        return f
+
+    def write(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for r in rows:
+            for module in MODULES:
+                f, n = self._current.get(module) or (None, XLSX_MAX_ROWS)
+                if n >= XLSX_MAX_ROWS:
+                    f = self._open_sheet(module)
+                    n = 1
+                f.write("<row>" + "".join(_cell(_value(c, r.get(c))) for c in module_columns(module)) + "</row>")
+                self._current[module] = (f, n + 1)
+            self.rows += 1
+
+    def close(self) -> None:
+        if self._tmp is None:
+            return
+        for module in MODULES:          # a workbook needs at least one sheet; keep all modules present
+            if module not in self._current:
+                self._open_sheet(module)
+        for _, _, f in self._sheets:
+            f.write(_SHEET_TAIL)
+            f.close()
+        ns = 'xmlns="http://schemas.openxmlformats.org/package/2006/relationships"'
+        sheet_type = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+        with zipfile.ZipFile(self.target, "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("[Content_Types].xml",
+                       '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                       '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                       '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                       '<Default Extension="xml" ContentType="application/xml"/>'
+                       '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                       '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                       + "".join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                                 for i in range(1, len(self._sheets) + 1))
+                       + "</Types>")
+            z.writestr("_rels/.rels",
+                       f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships {ns}>'
+                       '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+                       "</Relationships>")
+            z.writestr("xl/workbook.xml",
+                       '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                       '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                       'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+                       + "".join(f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>'
+                                 for i, (name, _, _) in enumerate(self._sheets, 1))
+                       + "</sheets></workbook>")
+            z.writestr("xl/_rels/workbook.xml.rels",
+                       f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships {ns}>'
+                       + "".join(f'<Relationship Id="rId{i}" Type="{sheet_type}" Target="worksheets/sheet{i}.xml"/>'
+                                 for i in range(1, len(self._sheets) + 1))
+                       + f'<Relationship Id="rId{len(self._sheets) + 1}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+                       "</Relationships>")
+            z.writestr("xl/styles.xml", _STYLES)
+            for i, (_, path, _) in enumerate(self._sheets, 1):
+                with open(path, "rb") as src, z.open(f"xl/worksheets/sheet{i}.xml", "w", force_zip64=True) as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+        self._tmp.cleanup()
+        self._tmp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+COLUMNAR_SUFFIXES = {".parquet": ParquetDatasetWriter, ".arrow": ArrowIpcWriter, ".xlsx": WorkbookWriter}
+
+
+def open_writer(path: Union[str, Path], **options: Any):
+    """Writer for an output path by suffix: results.parquet/ (dataset dir), results.arrow/ (dir), results.xlsx."""
+    path = Path(path)
+    try:
+        cls = COLUMNAR_SUFFIXES[path.suffix.lower()]
+    except KeyError:
+        raise ValueError(f"no columnar writer for {path.suffix!r} (use {', '.join(COLUMNAR_SUFFIXES)})") from None
+    return cls(path, **options)
+
+
+def project_results(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Result row for one project (the sidebar state) through the batch pipeline."""
+    from .batch import presize_records
+    raw = {"id": inputs.get("id", "project"), **inputs}
+    return presize_records([{"row": 0, "raw": raw}])[0]
+
+
+def export_bytes(rows: Iterable[Dict[str, Any]], fmt: str) -> bytes:
+    """Results as a downloadable file: "xlsx" workbook, or a zip of the "parquet" / "arrow" directory."""
+    import io
+    with tempfile.TemporaryDirectory(prefix="mep-export-") as td:
+        if fmt == "xlsx":
+            buf = io.BytesIO()
+            with WorkbookWriter(buf) as w:
+                w.write(rows)
+            return buf.getvalue()
+        out = Path(td) / f"results.{fmt}"
+        with open_writer(out) as w:
+            w.write(rows)
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as z:   # Parquet/Arrow are compressed already
+            for p in sorted(out.rglob("*")):
+                if p.is_file():
+                    z.write(p, p.relative_to(td).as_posix())
+        return buf.getvalue()
+
+
+profile_functions(globals())
@@ -0,0 +1,160 @@
+
+from __future__ import annotations
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+import numpy as np
+import pandas as pd
+from .data_catalog import DATA_PATH, file_stamp, load_json_file
+
+# Per-Bundesland fire-safety decision tables (data/fire_rules.json), compiled into vectorized
+# predicates over a DataFrame of buildings. Indicative screening only — not a code check.
+# Only the generic MBO table is encoded so far; the Bundesland entries inherit it unchanged.
+
+FIRE_RULES_PATH = DATA_PATH / "fire_rules.json"
+GENERIC_STATE = "Generic (Germany)"
+STOREY_HEIGHT_M = 3.5
+
+_OPS: Dict[str, Callable[[np.ndarray, Any], np.ndarray]] = {
+    ">": lambda col, v: col > v,
+    ">=": lambda col, v: col >= v,
+    "<": lambda col, v: col < v,
+    "<=": lambda col, v: col <= v,
+    "==": lambda col, v: col == v,
+    "!=": lambda col, v: col != v,
+    "in": lambda col, v: np.isin(col, v),
+    "not in": lambda col, v: ~np.isin(col, v),
+}
+
+Predicate = Callable[[pd.DataFrame], np.ndarray]
+
+
+def load_fire_rules(path: Path = FIRE_RULES_PATH) -> Mapping[str, Any]:
+    return load_json_file(path)
+
+
+def state_rules(state: str, tables: Mapping[str, Any], _seen: Tuple[str, ...] = ()) -> List[Mapping[str, Any]]:
+    """Resolve a state's rule list: inherited rules, replaced by id, extended, or removed."""
+    if state in _seen:
+        raise ValueError(f"Fire rules: 'extends' cycle {' -> '.join(_seen + (state,))}")
+    states = tables["states"]
+    entry = states.get(state) or states[GENERIC_STATE]
+    base = state_rules(entry["extends"], tables, _seen + (state,)) if entry.get("extends") else []
+    rules = {r["id"]: r for r in base}
+    for r in entry.get("rules", []):
+        if r.get("remove"):
+            rules.pop(r["id"], None)
+        else:
+            rules[r["id"]] = r
+    return list(rules.values())
+
+
+def _compile_condition(field: str, op: str, value: Any) -> Predicate:
+    fn = _OPS[op]
+    return lambda df: fn(df[field].to_numpy(), value)
+
+
+def _compile_rule(rule: Mapping[str, Any]) -> Predicate:
+    conds = [_compile_condition(*c) for c in rule.get("when", [])]
+
+    def pred(df: pd.DataFrame) -> np.ndarray:
+        out = np.ones(len(df), dtype=bool)
+        for c in conds:
+            out &= c(df)
+        return out
+    return pred
+
+
+@lru_cache(maxsize=64)
+def _compiled(state: str, stamp: Tuple[str, int, int]) -> Tuple[Tuple[Mapping[str, Any], ...], Tuple[Predicate, ...]]:
+    rules = state_rules(state, load_fire_rules(Path(stamp[0])))
+    return tuple(rules), tuple(_compile_rule(r) for r in rules)
+
+
+def compile_state(state: str, path: Path = FIRE_RULES_PATH):
+    """Compiled (rules, predicates) for a state; recompiled only when the rules file changes."""
+    return _compiled(state, file_stamp(path))
+
+
+def prepare_buildings(buildings: pd.DataFrame) -> pd.DataFrame:
+    """Fill derived screening fields with indicative defaults where not provided."""
+    df = buildings.copy()
+
+    def col(name, default):
+        if name not in df:
+            df[name] = default
+        else:
+            df[name] = df[name].fillna(pd.Series(default, index=df.index) if np.ndim(default) else default)
+
+    col("bundesland", GENERIC_STATE)
+    col("use", "Office")
+    col("gross_area_m2", 0.0)
+    col("storeys", 1)
+    col("floors_below", 0)
+    storeys = np.maximum(1, df["storeys"].to_numpy(dtype=float))
+    area = np.maximum(0.0, df["gross_area_m2"].to_numpy(dtype=float))
+    use = df["use"].astype(str).to_numpy()
+    col("height_m", (storeys - 1) * STOREY_HEIGHT_M)
+    col("largest_storey_area_m2", area / storeys)
+    col("max_unit_area_m2", df["largest_storey_area_m2"].to_numpy(dtype=float))
+    col("units", storeys)
+    col("units_area_m2", area)
+    col("freestanding", False)
+    col("persons", 0)
+    col("sales_area_m2", np.where(use == "Retail", 0.7 * area, 0.0))
+    col("beds", np.where(use == "Hotel", df["persons"].to_numpy(dtype=float), 0.0))
+    col("max_room_persons", 0)
+    df["freestanding"] = df["freestanding"].astype(bool)
+    return df
+
+
+def screen_buildings(buildings: pd.DataFrame, path: Path = FIRE_RULES_PATH) -> pd.DataFrame:
+    """Screen a portfolio of buildings against their state's decision tables in one call.
+
+    Returns one row per building with building class, Sonderbau / sprinkler / alarm flags
+    and the matched rule ids and reasons.
+    """
+    df = prepare_buildings(buildings).reset_index(drop=True)
+    n = len(df)
+    building_class = np.full(n, "", dtype=object)
+    flags = {cat: np.zeros(n, dtype=bool) for cat in ("sonderbau", "sprinkler", "alarm")}
+    matched: List[List[str]] = [[] for _ in range(n)]
+    reasons: List[List[str]] = [[] for _ in range(n)]
+
+    for state, idx in df.groupby("bundesland").indices.items():
+        rules, preds = compile_state(str(state), path)
+        if not rules:
+            continue
+        sub = df.iloc[idx]
+        hits = np.column_stack([p(sub) for p in preds])
+        cats = np.array([r.get("category", "info") for r in rules])
+
+        # Building class: the first matching class rule governs; other class rules are not reported
+        cls_cols = np.flatnonzero(cats == "class")
+        if len(cls_cols):
+            cls_hits = hits[:, cls_cols]
+            has_cls = cls_hits.any(axis=1)
+            governing = cls_cols[np.argmax(cls_hits, axis=1)]
+            values = np.array([r.get("value", r["id"]) for r in rules], dtype=object)
+            building_class[idx] = np.where(has_cls, values[governing], "")
+            hits[:, cls_cols] = False
+            hits[np.flatnonzero(has_cls), governing[has_cls]] = True
+        for cat, arr in flags.items():
+            arr[idx] = hits[:, cats == cat].any(axis=1)
+
+        ids = [r["id"] for r in rules]
+        texts = [r.get("reason", r["id"]) for r in rules]
+        rows, cols = np.nonzero(hits)
+        bounds = np.searchsorted(rows, np.arange(len(idx) + 1))
+        cols = cols.tolist()
+        for i, pos in enumerate(idx.tolist()):
+            js = cols[bounds[i]:bounds[i + 1]]
+            matched[pos] = [ids[j] for j in js]
+            reasons[pos] = [texts[j] for j in js]
+
+    return pd.DataFrame({
+        "building_class": building_class,
+        **flags,
+        "matched": matched,
+        "reasons": reasons,
+    }, index=buildings.index)
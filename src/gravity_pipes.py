@@ -0,0 +1,124 @@
+
+from __future__ import annotations
+from typing import Dict
+import numpy as np
+
+# Partially filled circular gravity pipes (Prandtl-Colebrook with the hydraulic diameter of the
+# wetted section, as used for EN 12056 / DIN 1986-100 / DWA-A 110 capacity tables).
+# Capacities for the standard DN series are tabulated once at import over
+# (roughness, DN, slope, filling ratio); sizing a network is then array interpolation.
+
+G = 9.81
+KIN_VISCOSITY_M2_S = 1.31e-6  # water at 10°C
+
+# Nominal diameters and minimum internal diameters (mm)
+DN = np.array([50, 60, 70, 80, 90, 100, 125, 150, 200, 225, 250, 300])
+DN_INNER_MM = np.array([44, 56, 68, 75, 79, 96, 113, 146, 184, 207, 230, 290], dtype=float)
+
+FILL_GRID = np.linspace(0.0, 0.94, 95)             # h/d; Q(h/d) is monotonic up to ~0.94
+SLOPE_GRID_PCT = np.geomspace(0.1, 20.0, 49)       # 1 mm/m .. 200 mm/m
+KB_GRID_MM = np.array([0.1, 0.25, 0.5, 1.0, 1.5])  # operational roughness kb
+
+
+def section_geometry(d_inner_mm, filling_ratio):
+    """Flow area (m²) and hydraulic diameter (m) of a partially filled circular section."""
+    d = np.asarray(d_inner_mm, dtype=float) / 1000.0
+    y = np.clip(np.asarray(filling_ratio, dtype=float), 0.0, 1.0)
+    theta = 2.0 * np.arccos(1.0 - 2.0 * y)
+    area = d**2 / 8.0 * (theta - np.sin(theta))
+    perim = d * theta / 2.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d_h = np.where(perim > 0, 4.0 * area / perim, 0.0)
+    return area, d_h
+
+
+def partial_flow_lps(d_inner_mm, slope_pct, filling_ratio, kb_mm: float = 1.0) -> np.ndarray:
+    """Capacity (L/s) at a given filling ratio, evaluated directly (no table)."""
+    area, d_h = section_geometry(d_inner_mm, filling_ratio)
+    j = np.maximum(np.asarray(slope_pct, dtype=float), 1e-9) / 100.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.sqrt(2.0 * G * d_h * j)
+        v = -2.0 * np.log10(2.51 * KIN_VISCOSITY_M2_S / (d_h * s) + np.asarray(kb_mm, dtype=float) / 1000.0 / (3.71 * d_h)) * s
+    return np.where(area > 0, v * area * 1000.0, 0.0)
+
+
+def _build_table() -> np.ndarray:
+    kb = KB_GRID_MM[:, None, None, None]
+    d = DN_INNER_MM[None, :, None, None]
+    j = SLOPE_GRID_PCT[None, None, :, None]
+    y = FILL_GRID[None, None, None, :]
+    return partial_flow_lps(d, j, y, kb).astype(np.float32)
+
+
+# CAPACITY_TABLE_LPS[kb, dn, slope, fill]
+CAPACITY_TABLE_LPS = _build_table()
+_LOG_SLOPES = np.log(SLOPE_GRID_PCT)
+
+
+def _interp_weights(grid: np.ndarray, x: np.ndarray):
+    x = np.clip(x, grid[0], grid[-1])
+    i = np.clip(np.searchsorted(grid, x, side="right") - 1, 0, len(grid) - 2)
+    w = (x - grid[i]) / (grid[i + 1] - grid[i])
+    return i, w
+
+
+def _table_for_kb(kb_mm: float) -> np.ndarray:
+    i, w = _interp_weights(KB_GRID_MM, np.asarray([float(kb_mm)]))
+    return (1.0 - w[0]) * CAPACITY_TABLE_LPS[i[0]] + w[0] * CAPACITY_TABLE_LPS[i[0] + 1]
+
+
+def _curves_at_slope(table: np.ndarray, slope_pct) -> np.ndarray:
+    """Q(DN, h/d) curves at each pipe's slope, shape (n, n_dn, n_fill)."""
+    i, w = _interp_weights(_LOG_SLOPES, np.log(np.maximum(np.atleast_1d(np.asarray(slope_pct, dtype=float)), 1e-9)))
+    return (1.0 - w)[:, None, None] * table[:, i, :].transpose(1, 0, 2) + w[:, None, None] * table[:, i + 1, :].transpose(1, 0, 2)
+
+
+def capacity_lps(slope_pct, filling_ratio: float = 0.5, kb_mm: float = 1.0) -> np.ndarray:
+    """Table capacities for every standard DN at each slope, shape (n, len(DN))."""
+    curves = _curves_at_slope(_table_for_kb(kb_mm), slope_pct)
+    j, w = _interp_weights(FILL_GRID, np.asarray([float(filling_ratio)]))
+    return (1.0 - w[0]) * curves[:, :, j[0]] + w[0] * curves[:, :, j[0] + 1]
+
+
+def size_gravity_pipes(
+    q_lps,
+    slope_pct,
+    max_filling: float = 0.5,
+    kb_mm: float = 1.0,
+    min_dn=0,
+) -> Dict[str, np.ndarray]:
+    """Smallest standard DN carrying q at the given slope without exceeding `max_filling`.
+
+    Returns DN, actual filling ratio h/d and flow velocity per pipe. DN is 0 where no
+    tabulated size is large enough.
+    """
+    q = np.atleast_1d(np.asarray(q_lps, dtype=float))
+    slope = np.broadcast_to(np.asarray(slope_pct, dtype=float), q.shape)
+    min_dn = np.broadcast_to(np.asarray(min_dn), q.shape)
+    curves = _curves_at_slope(_table_for_kb(kb_mm), slope)
+    j, w = _interp_weights(FILL_GRID, np.asarray([float(max_filling)]))
+    cap = (1.0 - w[0]) * curves[:, :, j[0]] + w[0] * curves[:, :, j[0] + 1]
+
+    ok = (cap >= q[:, None]) & (DN[None, :] >= min_dn[:, None])
+    fits = ok.any(axis=1)
+    k = np.where(fits, np.argmax(ok, axis=1), len(DN) - 1)
+    rows = np.arange(len(q))
+
+    # Invert Q(h/d) along the filling axis for the chosen DN
+    curve = curves[rows, k, :]
+    m = np.clip((curve < q[:, None]).sum(axis=1), 1, len(FILL_GRID) - 1)
+    q0, q1 = curve[rows, m - 1], curve[rows, m]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(q1 > q0, (q - q0) / (q1 - q0), 0.0)
+    fill = FILL_GRID[m - 1] + np.clip(frac, 0.0, 1.0) * (FILL_GRID[m] - FILL_GRID[m - 1])
+    fill = np.where(q > 0, fill, 0.0)
+
+    area, _ = section_geometry(DN_INNER_MM[k], fill)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v = np.where(area > 0, q / 1000.0 / area, 0.0)
+    return {
+        "DN": np.where(fits, DN[k], 0),
+        "d_inner_mm": DN_INNER_MM[k],
+        "filling_ratio": fill,
+        "velocity_m_s": v,
+    }
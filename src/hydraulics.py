@@ -0,0 +1,140 @@
+
+from __future__ import annotations
+from typing import Sequence
+import numpy as np
+import pandas as pd
+
+# Vectorized per-segment pipe hydraulics and tree helpers (pre-sizing).
+# All functions accept scalars or arrays and return numpy arrays.
+
+WATER_DENSITY_KG_M3 = 983.0       # approx at 60°C
+WATER_CP_KJ_KGK = 4.18
+WATER_KIN_VISCOSITY_M2_S = 0.47e-6  # approx at 60°C
+
+PIPE_ROUGHNESS_MM = {
+    "Copper": 0.0015,
+    "Stainless steel": 0.0015,
+    "PE-X / multilayer": 0.007,
+    "Galvanised steel": 0.15,
+    "Cast iron": 0.25,
+    "PVC / PP": 0.007,
+}
+
+
+def velocity_m_s(q_lps, d_inner_mm) -> np.ndarray:
+    q = np.asarray(q_lps, dtype=float) / 1000.0
+    d = np.asarray(d_inner_mm, dtype=float) / 1000.0
+    area = np.pi * d**2 / 4.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(area > 0, q / area, np.nan)
+
+
+def friction_factor(re, rel_roughness) -> np.ndarray:
+    """Darcy friction factor: 64/Re (laminar) or Swamee-Jain (turbulent, explicit Colebrook fit)."""
+    re = np.asarray(re, dtype=float)
+    k = np.asarray(rel_roughness, dtype=float)
+    re_safe = np.maximum(re, 1e-9)
+    lam = 64.0 / re_safe
+    turb = 0.25 / np.log10(k / 3.7 + 5.74 / np.maximum(re_safe, 2300.0) ** 0.9) ** 2
+    return np.where(re < 2300.0, lam, turb)
+
+
+def pressure_drop_pa(
+    q_lps,
+    d_inner_mm,
+    length_m,
+    roughness_mm=0.0015,
+    local_loss_factor: float = 0.3,
+    rho: float = WATER_DENSITY_KG_M3,
+    nu: float = WATER_KIN_VISCOSITY_M2_S,
+) -> np.ndarray:
+    """Darcy-Weisbach pressure drop per segment (Pa).
+
+    Local losses (fittings, valves) are lumped as a fraction of the friction loss,
+    a common simplification for pre-sizing.
+    """
+    v = velocity_m_s(q_lps, d_inner_mm)
+    d = np.asarray(d_inner_mm, dtype=float) / 1000.0
+    re = np.abs(v) * d / nu
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lam = friction_factor(re, np.asarray(roughness_mm, dtype=float) / 1000.0 / d)
+        dp = lam * np.asarray(length_m, dtype=float) / d * rho * v * np.abs(v) / 2.0
+    dp = np.where(np.abs(v) > 0, dp, 0.0)
+    return dp * (1.0 + float(local_loss_factor))
+
+
+def parent_positions(ids: pd.Index, parent_ids) -> np.ndarray:
+    """Map parent ids (row labels of `ids`, -1 for roots) to row positions for the tree helpers.
+
+    Keyed by label, so dropping or reordering rows keeps every link; a parent id that is not a
+    row (an orphaned segment) raises ValueError.
+    """
+    if not ids.is_unique:
+        raise ValueError("segment ids (row labels) must be unique")
+    parent_ids = np.asarray(parent_ids)
+    pos = ids.get_indexer(parent_ids)
+    orphan = (pos < 0) & (parent_ids != -1)
+    if orphan.any():
+        rows = ", ".join(str(x) for x in ids[orphan][:10])
+        raise ValueError(f"parent not among the segment ids for segment(s) {rows}")
+    return pos.astype(np.int64)
+
+
+def tree_depth(parent: Sequence[int]) -> np.ndarray:
+    """Depth of every node in a tree given as parent indices (-1 for roots).
+
+    Runs one vectorized pass per tree level. Raises ValueError on cycles or bad indices.
+    """
+    parent = np.asarray(parent, dtype=np.int64)
+    n = len(parent)
+    if n and (parent.max() >= n or parent.min() < -1):
+        raise ValueError("parent indices out of range")
+    depth = np.zeros(n, dtype=np.int64)
+    cur = parent.copy()
+    for _ in range(n + 1):
+        active = cur >= 0
+        if not active.any():
+            return depth
+        depth[active] += 1
+        cur[active] = parent[cur[active]]
+    raise ValueError("parent indices contain a cycle")
+
+
+def subtree_sum(parent: Sequence[int], values, depth: np.ndarray | None = None) -> np.ndarray:
+    """Sum of `values` over each node and all its descendants (leaf-to-root accumulation)."""
+    parent = np.asarray(parent, dtype=np.int64)
+    acc = np.array(values, dtype=float, copy=True)
+    depth = tree_depth(parent) if depth is None else depth
+    for d in range(int(depth.max(initial=0)), 0, -1):
+        idx = np.flatnonzero(depth == d)
+        np.add.at(acc, parent[idx], acc[idx])
+    return acc
+
+
+def path_sum(parent: Sequence[int], values, depth: np.ndarray | None = None) -> np.ndarray:
+    """Sum of `values` from the root down to (and including) each node."""
+    parent = np.asarray(parent, dtype=np.int64)
+    acc = np.array(values, dtype=float, copy=True)
+    depth = tree_depth(parent) if depth is None else depth
+    for d in range(1, int(depth.max(initial=0)) + 1):
+        idx = np.flatnonzero(depth == d)
+        acc[idx] += acc[parent[idx]]
+    return acc
+
+
+def is_leaf(parent: Sequence[int]) -> np.ndarray:
+    parent = np.asarray(parent, dtype=np.int64)
+    has_child = np.zeros(len(parent), dtype=bool)
+    has_child[parent[parent >= 0]] = True
+    return ~has_child
+
+
+def subtree_max(parent: Sequence[int], values, depth: np.ndarray | None = None) -> np.ndarray:
+    """Maximum of `values` over each node and all its descendants."""
+    parent = np.asarray(parent, dtype=np.int64)
+    acc = np.array(values, dtype=float, copy=True)
+    depth = tree_depth(parent) if depth is None else depth
+    for d in range(int(depth.max(initial=0)), 0, -1):
+        idx = np.flatnonzero(depth == d)
+        np.maximum.at(acc, parent[idx], acc[idx])
+    return acc
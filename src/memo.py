@@ -0,0 +1,250 @@
+
+from __future__ import annotations
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields, is_dataclass
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterator, Mapping, Optional, Tuple
+import copy
+import hashlib
+import inspect
+import os
+import sys
+import threading
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Process-wide memoization for the pure pre-sizing calculations. Every Streamlit session runs in
+# the same process, so one session's result serves all others. Keys are normalized argument
+# tuples (defaults applied, arrays / frames reduced to content hashes); values are kept in one
+# LRU bounded by entry count and estimated bytes. Callers always receive a private copy.
+#
+# Size limit: MEP_MEMO_MAX_MB (default 256).
+#
+# A hit costs keying plus a deep copy, some 20-70 µs (python -m src.benchmarks). Only calculations
+# well above that are wrapped: the network solvers (circulation, DU network, sprinkler, smoke
+# control), device layout, fire screening and the demand table. The estimate_* rules of thumb and
+# single-formula calcs take 1-3 µs and run uncached.
+#
+# pandas is never imported here: an argument can only be a DataFrame / Series if the caller
+# already loaded pandas, so the module is looked up in sys.modules when needed.
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _digest(b: bytes) -> str:
+    return hashlib.sha1(b).hexdigest()
+
+
+def _pandas():
+    return sys.modules.get("pandas")
+
+
+def normalize(x: Any) -> Hashable:
+    """Hashable, type-tagged canonical form of a calculation argument."""
+    if x is None or isinstance(x, (bool, str, bytes)):
+        return x
+    if hasattr(x, "__memo_key__"):
+        return ("K", type(x).__qualname__, normalize(x.__memo_key__()))
+    if isinstance(x, (int, np.integer)):
+        return ("i", int(x))
+    if isinstance(x, (float, np.floating)):
+        return ("f", float(x))
+    if isinstance(x, Mapping):
+        return ("M", tuple(sorted(((repr(k), normalize(v)) for k, v in x.items()), key=lambda kv: kv[0])))
+    if isinstance(x, (list, tuple)):
+        return ("L", tuple(normalize(v) for v in x))
+    if isinstance(x, (set, frozenset)):
+        return ("S", tuple(sorted(repr(normalize(v)) for v in x)))
+    if isinstance(x, np.ndarray):
+        if x.dtype == object:
+            return ("A", x.shape, normalize(x.tolist()))
+        return ("A", x.dtype.str, x.shape, _digest(np.ascontiguousarray(x).tobytes()))
+    pd = _pandas()
+    if pd is not None and isinstance(x, pd.DataFrame):
+        rows = pd.util.hash_pandas_object(x, index=True).to_numpy()
+        return ("D", tuple(map(str, x.columns)), tuple(map(str, x.dtypes)), _digest(rows.tobytes()))
+    if pd is not None and isinstance(x, pd.Series):
+        rows = pd.util.hash_pandas_object(x, index=True).to_numpy()
+        return ("R", str(x.name), str(x.dtype), _digest(rows.tobytes()))
+    if is_dataclass(x) and not isinstance(x, type):
+        return ("C", type(x).__qualname__, tuple(normalize(getattr(x, f.name)) for f in fields(x)))
+    raise _Uncacheable(type(x).__name__)
+
+
+def sizeof(obj: Any) -> int:
+    """Estimated memory footprint of a result (bytes)."""
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes) + 112
+    pd = _pandas()
+    if pd is not None and isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage)
+    if isinstance(obj, Mapping):
+        return sys.getsizeof(obj) + sum(sizeof(k) + sizeof(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(sizeof(v) for v in obj)
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return sys.getsizeof(obj) + sum(sizeof(getattr(obj, f.name)) for f in fields(obj))
+    return sys.getsizeof(obj)
+
+
+@dataclass
+class FunctionStats:
+    hits: int = 0
+    misses: int = 0
+    uncacheable: int = 0
+
+
+class MemoCache:
+    """Thread-safe LRU bounded by entries and bytes, with per-function counters."""
+
+    def __init__(self, max_bytes: int, max_entries: int = 20_000):
+        self.max_bytes = int(max_bytes)
+        self.max_entries = int(max_entries)
+        self.enabled = True
+        self._data: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, threading.Lock] = {}
+        self.stats: Dict[str, FunctionStats] = {}
+
+    def _get(self, key: Hashable):
+        item = self._data.get(key)
+        if item is not None:
+            self._data.move_to_end(key)
+        return item
+
+    def _put(self, key: Hashable, value: Any, size: int) -> None:
+        if size > self.max_bytes // 4:
+            return
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._data[key] = (value, size)
+        self._bytes += size
+        while self._data and (self._bytes > self.max_bytes or len(self._data) > self.max_entries):
+            _, (_, s) = self._data.popitem(last=False)
+            self._bytes -= s
+            self._evictions += 1
+
+    def call(self, name: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            st = self.stats.setdefault(name, FunctionStats())
+            item = self._get(key)
+            if item is not None:
+                st.hits += 1
+                return item[0]
+            gate = self._inflight.setdefault(key, threading.Lock())
+        # One computation per key: concurrent sessions asking for the same inputs wait for it
+        with gate:
+            with self._lock:
+                item = self._get(key)
+                if item is not None:
+                    st.hits += 1
+                    return item[0]
+                st.misses += 1
+            try:
+                value = compute()
+                size = sizeof(value)
+                with self._lock:
+                    self._put(key, value, size)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self._evictions = 0
+            self.stats.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(s.hits for s in self.stats.values())
+            misses = sum(s.misses for s in self.stats.values())
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else float("nan"),
+            }
+
+    def stats_frame(self) -> pd.DataFrame:
+        with self._lock:
+            rows = [{"Function": k, "Hits": s.hits, "Misses": s.misses, "Uncacheable": s.uncacheable}
+                    for k, s in sorted(self.stats.items())]
+        import pandas as pd
+        return pd.DataFrame(rows, columns=["Function", "Hits", "Misses", "Uncacheable"])
+
+
+CACHE = MemoCache(max_bytes=int(float(os.environ.get("MEP_MEMO_MAX_MB", "256")) * 1024 * 1024))
+
+# Caches bypassed in the current thread / task (memo_disabled); other sessions keep using them
+_BYPASSED: ContextVar[Tuple[MemoCache, ...]] = ContextVar("memo_bypassed", default=())
+
+
+def memoize(fn: Optional[Callable] = None, *, depends: Optional[Callable[[], Hashable]] = None,
+            cache: Optional[MemoCache] = None):
+    """Memoize a pure calculation without changing its signature.
+
+    `depends` returns extra key material evaluated per call (e.g. the stamp of a data file the
+    result depends on). Arguments that cannot be normalized bypass the cache.
+    """
+    def deco(f: Callable) -> Callable:
+        sig = inspect.signature(f)
+        name = f"{f.__module__}.{f.__qualname__}"
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            c = cache or CACHE
+            if not c.enabled or c in _BYPASSED.get():
+                return f(*args, **kwargs)
+            try:
+                bound = sig.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = (name, normalize(tuple(bound.arguments.items())),
+                       depends() if depends is not None else None)
+            except (_Uncacheable, TypeError):
+                with c._lock:
+                    c.stats.setdefault(name, FunctionStats()).uncacheable += 1
+                return f(*args, **kwargs)
+            return copy.deepcopy(c.call(name, key, lambda: f(*args, **kwargs)))
+
+        wrapper.uncached = f
+        return wrapper
+
+    return deco(fn) if fn is not None else deco
+
+
+@contextmanager
+def memo_disabled(cache: Optional[MemoCache] = None) -> Iterator[None]:
+    """Bypass the cache, e.g. for batch runs where every input is unique (no key / copy overhead).
+
+    Only calls made in the current thread (or asyncio task) are affected; concurrent sessions
+    keep hitting the cache.
+    """
+    token = _BYPASSED.set(_BYPASSED.get() + (cache or CACHE,))
+    try:
+        yield
+    finally:
+        _BYPASSED.reset(token)
+
+
+def memo_stats() -> Dict[str, Any]:
+    return CACHE.summary()
+
+
+def memo_clear() -> None:
+    CACHE.clear()
@@ -0,0 +1,187 @@
+
+from __future__ import annotations
+from functools import lru_cache
+from typing import (
+    Annotated, Any, Callable, Dict, List, Literal, Mapping, Optional, Sequence, get_args, get_origin, get_type_hints,
+)
+import inspect
+from annotated_types import Ge, Gt, Interval
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError, create_model, model_validator
+
+# Typed input / result models and compiled validators (pydantic v2).
+#
+# Raw values are validated once, where they enter: batch and store rows, API bodies, the sidebar
+# (ProjectModel.set). Behind that boundary the calculation functions take their arguments as given:
+# their signatures carry the constraints below instead of float() / int() / max(0, ...) on every
+# call. The constraint aliases are plain typing.Annotated metadata, free at call time.
+#
+# Lists are validated with one compiled TypeAdapter call (validate_each), not one model per row:
+#
+#   PROJECTS                 project definitions (ProjectInputs; blanks take the defaults)
+#   BUILDINGS                fire-screening rows (BuildingInputs; missing fields are derived by
+#                            fire_rules.prepare_buildings)
+#   arguments_adapter(fn)    keyword-argument dicts of a calculation function (API /calc); loads
+#                            (calcs_electrical.LoadItem), fixture counts and feeder parameters are
+#                            validated through the annotations of the functions that take them
+
+NonNegative = Annotated[float, Ge(0)]
+Positive = Annotated[float, Gt(0)]
+Fraction = Annotated[float, Interval(ge=0, le=1)]
+Efficiency = Annotated[float, Interval(gt=0, le=1)]
+Count = Annotated[int, Ge(0)]
+VentCat = Literal["Cat I", "Cat II", "Cat III"]
+FixtureCounts = Dict[str, Count]
+
+_CONFIG = ConfigDict(extra="ignore", allow_inf_nan=False)
+
+
+class ProjectInputs(BaseModel):
+    """Project definition (the sidebar fields). Missing or blank values take the defaults."""
+
+    model_config = _CONFIG
+
+    city: str = "Berlin"
+    bundesland: str = "Generic (Germany)"
+    use_type: str = "Office"
+    area_above_m2: NonNegative = 10000.0
+    area_below_m2: NonNegative = 0.0
+    floors_above: Count = 8
+    floors_below: Count = 0
+    auto_occupancy: bool = True
+    persons_manual: Count = 0
+    auto_roof_area: bool = True
+    roof_area_manual: NonNegative = 0.0
+    vent_cat: VentCat = "Cat II"
+    design_summer_C: float = 32.0
+    fire_shafts_m2_per_floor: NonNegative = 0.0
+
+    @model_validator(mode="before")
+    @classmethod
+    def _drop_blanks(cls, data: Any) -> Any:
+        # CSV rows carry "" for empty cells; the membership tests keep complete rows copy-free
+        if isinstance(data, Mapping) and ("" in data.values() or None in data.values()):
+            return {k: v for k, v in data.items() if v is not None and v != ""}
+        return data
+
+
+class PresizeResult(BaseModel):
+    """One row of the pre-sizing pipeline (batch.presize_records); None where a row failed."""
+
+    model_config = _CONFIG
+
+    row: Optional[int] = None
+    id: Optional[str] = None
+    city: Optional[str] = None
+    use_type: Optional[str] = None
+    area_above_m2: Optional[float] = None
+    area_below_m2: Optional[float] = None
+    floors_above: Optional[int] = None
+    floors_below: Optional[int] = None
+    persons: Optional[int] = None
+    roof_area_m2: Optional[float] = None
+    elec_connected_kw: Optional[float] = None
+    elec_demand_kw: Optional[float] = None
+    feeder_current_A: Optional[float] = None
+    feeder_section_mm2: Optional[float] = None
+    hvac_heating_kw: Optional[float] = None
+    hvac_cooling_kw: Optional[float] = None
+    ventilation_m3h: Optional[float] = None
+    hvac_electric_kw: Optional[float] = None
+    lifts_kw: Optional[float] = None
+    tech_rooms_m2: Optional[float] = None
+    shafts_m2: Optional[float] = None
+    water_peak_lps: Optional[float] = None
+    water_main_d_mm: Optional[float] = None
+    dhw_kwh_day: Optional[float] = None
+    rain_flow_lps: Optional[float] = None
+    rain_collector_DN: Optional[float] = None
+    fire_building_class: Optional[str] = None
+    fire_sonderbau: Optional[bool] = None
+    fire_sprinkler: Optional[bool] = None
+    fire_alarm: Optional[bool] = None
+    fire_reasons: Optional[List[str]] = None
+    error: Optional[str] = None
+
+
+class BuildingInputs(BaseModel):
+    """One building for fire_rules.screen_buildings. None (or missing) takes the indicative default."""
+
+    model_config = _CONFIG
+
+    bundesland: Optional[str] = None
+    use: Optional[str] = None
+    gross_area_m2: Optional[NonNegative] = None
+    storeys: Optional[Count] = None
+    floors_below: Optional[Count] = None
+    height_m: Optional[NonNegative] = None
+    largest_storey_area_m2: Optional[NonNegative] = None
+    max_unit_area_m2: Optional[NonNegative] = None
+    units: Optional[Count] = None
+    units_area_m2: Optional[NonNegative] = None
+    freestanding: Optional[bool] = None
+    persons: Optional[Count] = None
+    sales_area_m2: Optional[NonNegative] = None
+    beds: Optional[Count] = None
+    max_room_persons: Optional[Count] = None
+
+
+def field_kind(model: type, name: str) -> str:
+    """Value kind of a model field: "str", "int", "bool", "list" or "float"."""
+    ann = model.model_fields[name].annotation
+    args = [a for a in get_args(ann) if a is not type(None)]
+    if get_origin(ann) is not None and get_origin(ann) is not list and len(args) == 1:
+        ann = args[0]           # Optional[X] -> X
+    if get_origin(ann) is list:
+        return "list"
+    return {str: "str", int: "int", bool: "bool"}.get(ann, "float")
+
+
+PROJECTS = TypeAdapter(List[ProjectInputs])
+BUILDINGS = TypeAdapter(List[BuildingInputs])
+
+
+def _messages(exc: ValidationError) -> Dict[int, str]:
+    out: Dict[int, List[str]] = {}
+    for e in exc.errors(include_url=False):
+        i, *field = e["loc"]
+        out.setdefault(i, []).append(f"{'.'.join(map(str, field)) or 'value'}: {e['msg']}")
+    return {i: "; ".join(m) for i, m in out.items()}
+
+
+def validate_each(adapter: TypeAdapter, items: Sequence[Any]) -> List[Any]:
+    """Validate a list with one call of a List[...] adapter.
+
+    Valid items come back validated, invalid ones as a ValueError naming the fields, in input order.
+    A list with invalid items costs one more call (for the valid rest), never one call per item.
+    """
+    items = list(items)
+    try:
+        return adapter.validate_python(items)
+    except ValidationError as exc:
+        bad = _messages(exc)
+    good = iter(adapter.validate_python([it for i, it in enumerate(items) if i not in bad]))
+    return [ValueError(bad[i]) if i in bad else next(good) for i in range(len(items))]
+
+
+@lru_cache(maxsize=None)
+def arguments_adapter(fn: Callable[..., Any]) -> TypeAdapter:
+    """Compiled validator for a list of keyword-argument dicts of `fn`, built from its signature.
+
+    Annotations are coerced (JSON numbers and strings to float / int / bool, lists to tuples or
+    dataclasses) and constraint aliases enforced; unknown keywords and missing required ones fail.
+    """
+    hints = get_type_hints(fn, include_extras=True)
+    fields: Dict[str, Any] = {}
+    for p in inspect.signature(fn).parameters.values():
+        if p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD):
+            continue
+        fields[p.name] = (hints.get(p.name, Any), ... if p.default is p.empty else p.default)
+    model = create_model(f"{fn.__name__}_arguments",
+                         __config__=ConfigDict(extra="forbid", arbitrary_types_allowed=True, allow_inf_nan=False),
+                         **fields)
+    return TypeAdapter(List[model])
+
+
+def validate_arguments(fn: Callable[..., Any], items: Sequence[Any]) -> List[Any]:
+    """Keyword-argument dicts for `fn` (or ValueError per invalid item), validated in one call."""
+    return [v if isinstance(v, Exception) else dict(v) for v in validate_each(arguments_adapter(fn), items)]
@@ -0,0 +1,256 @@
+
+from __future__ import annotations
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional
+import argparse
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Opt-in profiling of Streamlit reruns.
+#
+# MEP_PROFILE=1 (read once at import) turns it on. Otherwise every hook here is free: profiled()
+# and profile_functions() return the functions unchanged, span() returns one shared null context.
+#
+# When enabled, ui_common.sidebar() opens a record for the rerun and ui_common.debug_panel() (last
+# line of each page) closes it. In between, every profiled function / span adds its calls, wall
+# time (total and self, i.e. minus profiled callees) and net traced allocations to the record. The
+# record is shown in the sidebar and appended to a JSONL log for p50 / p95 per page:
+#
+#   MEP_PROFILE=1 streamlit run app.py
+#   python -m src.profiling                      # per-page and per-function p50 / p95 from the log
+#
+# MEP_PROFILE_LOG   log path (default ~/.mep_presizing/profile.jsonl)
+# MEP_PROFILE_ALLOC 0 disables tracemalloc (allocations are then reported as 0; tracing slows
+#                   allocation-heavy code by roughly 2x)
+#
+# Allocations come from the process-wide tracemalloc counter, so with several sessions rerunning
+# at the same time they are attributed approximately.
+
+ENABLED = os.environ.get("MEP_PROFILE", "").strip().lower() in ("1", "true", "yes", "on")
+TRACE_ALLOC = os.environ.get("MEP_PROFILE_ALLOC", "1").strip().lower() not in ("0", "false", "no", "off")
+LOG_PATH = Path(os.environ.get("MEP_PROFILE_LOG", Path.home() / ".mep_presizing" / "profile.jsonl"))
+
+_local = threading.local()
+_log_lock = threading.Lock()
+_NULL = nullcontext()
+# Recent rerun wall times per page in this process (for the panel; the CLI reads the log)
+RECENT: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=500))
+
+
+def _traced() -> int:
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+class _Rerun:
+    __slots__ = ("page", "started", "t0", "stats", "stack", "active")
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started = datetime.now(timezone.utc)
+        self.t0 = time.perf_counter()
+        self.stats: Dict[str, List[float]] = {}     # name -> [calls, seconds, self seconds, alloc bytes]
+        self.stack: List[float] = []                # time spent in profiled callees, per open frame
+        self.active: set = set()                    # profiled functions on the stack (recursion counts once)
+
+    def enter(self):
+        self.stack.append(0.0)
+        return time.perf_counter(), _traced()
+
+    def exit(self, name: str, t0: float, m0: int) -> None:
+        dt = time.perf_counter() - t0
+        alloc = _traced() - m0
+        child = self.stack.pop()
+        if self.stack:
+            self.stack[-1] += dt
+        s = self.stats.get(name)
+        if s is None:
+            s = self.stats[name] = [0, 0.0, 0.0, 0]
+        s[0] += 1
+        s[1] += dt
+        s[2] += dt - child
+        s[3] += max(alloc, 0)
+
+
+class _Span:
+    __slots__ = ("name", "run", "t0", "m0")
+
+    def __init__(self, name: str, run: _Rerun):
+        self.name, self.run = name, run
+
+    def __enter__(self):
+        self.t0, self.m0 = self.run.enter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.run.exit(self.name, self.t0, self.m0)
+
+
+def span(name: str):
+    """Context manager timing a block under `name` in the current rerun (no-op when disabled)."""
+    if not ENABLED:
+        return _NULL
+    run = getattr(_local, "run", None)
+    return _NULL if run is None else _Span(name, run)
+
+
+def profiled(fn: Optional[Callable] = None, *, name: Optional[str] = None):
+    """Decorator recording each call in the current rerun; returns `fn` itself when disabled."""
+    def deco(f: Callable) -> Callable:
+        if not ENABLED:
+            return f
+        label = name or f"{f.__module__.rpartition('.')[2]}.{f.__qualname__}"
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            run = getattr(_local, "run", None)
+            if run is None or label in run.active:
+                return f(*args, **kwargs)
+            run.active.add(label)
+            t0, m0 = run.enter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                run.exit(label, t0, m0)
+                run.active.discard(label)
+
+        wrapper.__profiled__ = True
+        return wrapper
+
+    return deco(fn) if fn is not None else deco
+
+
+def profile_functions(namespace: Dict[str, Any]) -> None:
+    """Profile the public functions a module defines (call at the end of the module with globals()).
+
+    Generator functions are left alone: only their creation, not their iteration, could be timed.
+    """
+    if not ENABLED:
+        return
+    module = namespace.get("__name__")
+    for key, obj in list(namespace.items()):
+        if (key.startswith("_") or not inspect.isfunction(obj) or obj.__module__ != module
+                or inspect.isgeneratorfunction(obj) or getattr(obj, "__profiled__", False)):
+            continue
+        namespace[key] = profiled(obj)
+
+
+def begin_rerun(page: str) -> None:
+    """Start this thread's rerun record (replaces one left open by an interrupted rerun)."""
+    if not ENABLED:
+        return
+    if TRACE_ALLOC and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _local.run = _Rerun(page)
+
+
+def end_rerun(log_path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """Close this thread's rerun record, append it to the JSONL log and return it."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return None
+    _local.run = None
+    wall_ms = (time.perf_counter() - run.t0) * 1000.0
+    record = {
+        "ts": run.started.isoformat(timespec="milliseconds"),
+        "page": run.page,
+        "pid": os.getpid(),
+        "wall_ms": round(wall_ms, 3),
+        "traced_kb": round(_traced() / 1024.0, 1),
+        "functions": {
+            name: {"calls": int(c), "ms": round(t * 1000.0, 3), "self_ms": round(st * 1000.0, 3),
+                   "alloc_kb": round(a / 1024.0, 1)}
+            for name, (c, t, st, a) in sorted(run.stats.items(), key=lambda kv: -kv[1][1])
+        },
+    }
+    RECENT[run.page].append(wall_ms)
+    path = Path(log_path or LOG_PATH)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with _log_lock, path.open("a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError:
+        pass        # read-only deployments: the record is still shown in the panel
+    return record
+
+
+def record_frame(record: Mapping[str, Any]) -> "pd.DataFrame":
+    """One rerun record as a table, slowest first."""
+    import pandas as pd
+    rows = [{"function": k, **v} for k, v in record["functions"].items()]
+    return pd.DataFrame(rows, columns=["function", "calls", "ms", "self_ms", "alloc_kb"])
+
+
+def _percentiles(values: Iterable[float]) -> Dict[str, float]:
+    import numpy as np
+    a = np.fromiter(values, dtype=float)
+    return {"reruns": int(a.size), "p50_ms": float(np.percentile(a, 50)), "p95_ms": float(np.percentile(a, 95)),
+            "max_ms": float(a.max())}
+
+
+def recent_summary() -> "pd.DataFrame":
+    """Rerun wall time p50 / p95 per page for this process."""
+    import pandas as pd
+    rows = [{"page": page, **_percentiles(v)} for page, v in sorted(RECENT.items()) if v]
+    return pd.DataFrame(rows, columns=["page", "reruns", "p50_ms", "p95_ms", "max_ms"])
+
+
+def read_log(path: Optional[Path] = None) -> Iterable[Dict[str, Any]]:
+    with Path(path or LOG_PATH).open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue        # partial line from a killed process
+
+
+def log_summary(path: Optional[Path] = None, page: Optional[str] = None) -> Dict[str, "pd.DataFrame"]:
+    """p50 / p95 from the JSONL log: rerun wall time per page, and per-rerun time per function."""
+    import pandas as pd
+    pages: Dict[str, List[float]] = defaultdict(list)
+    funcs: Dict[str, List[float]] = defaultdict(list)
+    calls: Dict[str, int] = defaultdict(int)
+    for r in read_log(path):
+        if page and r.get("page") != page:
+            continue
+        pages[r["page"]].append(r["wall_ms"])
+        for name, s in r.get("functions", {}).items():
+            funcs[name].append(s["ms"])
+            calls[name] += s["calls"]
+    by_page = pd.DataFrame([{"page": p, **_percentiles(v)} for p, v in sorted(pages.items())],
+                           columns=["page", "reruns", "p50_ms", "p95_ms", "max_ms"])
+    by_function = pd.DataFrame([{"function": f, "calls": calls[f], **_percentiles(v)} for f, v in funcs.items()],
+                               columns=["function", "calls", "reruns", "p50_ms", "p95_ms", "max_ms"])
+    return {"pages": by_page, "functions": by_function.sort_values("p95_ms", ascending=False, ignore_index=True)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Summarize the rerun profiling log (p50 / p95 per page and function).")
+    ap.add_argument("log", nargs="?", type=Path, default=LOG_PATH)
+    ap.add_argument("--page", help="only reruns of this page (script name without .py)")
+    ap.add_argument("--top", type=int, default=20, help="functions to list (by p95)")
+    args = ap.parse_args(argv)
+    if not args.log.exists():
+        print(f"No profile log at {args.log} (run the app with MEP_PROFILE=1)", file=sys.stderr)
+        return 1
+    out = log_summary(args.log, page=args.page)
+    print(out["pages"].to_string(index=False, float_format=lambda x: f"{x:.1f}"))
+    print()
+    print(out["functions"].head(args.top).to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
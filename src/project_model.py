@@ -0,0 +1,166 @@
+
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Set, Tuple, Union
+from .data_catalog import city_preset, city_presets, use_profile
+from .models import ProjectInputs
+from .project_presizing import (
+    estimate_electrical_loads, estimate_fixtures_from_occupancy, estimate_hvac_capacities,
+    estimate_hvac_electrical_kw, estimate_lifts_kw, estimate_occupancy, estimate_rain_flow_lps,
+    estimate_tech_rooms_and_shafts, estimate_ventilation_flow_m3h,
+)
+
+# Project model as a dependency graph: inputs and derived quantities are nodes, each derived node
+# is a function of its parents. Changing an input drops only its descendants; everything else
+# stays computed. One model per session is shared by all pages (see ui_common.project_model).
+#
+#   area / use ──> occupancy ──> persons ──> ventilation ──> HVAC capacities ──> HVAC electric ──┐
+#   area / use ──> lifts ─────────────────────────────────────────────────────────────────────────┴──> electrical loads
+#                                                                                                          └──> connected kW
+#
+# Inputs are validated on the way in (ProjectInputs), so the node functions take them as given.
+
+
+@dataclass(frozen=True)
+class Node:
+    name: str
+    deps: Tuple[str, ...]
+    fn: Callable[..., Any]
+
+
+# The project definition fields and their defaults (models.ProjectInputs)
+INPUTS: Dict[str, Any] = ProjectInputs().model_dump()
+
+
+def _city(city: str) -> Mapping[str, Any]:
+    return city_preset(city) or city_presets().get("Custom", {})
+
+
+def _persons(auto_occupancy: bool, occupancy_est: int, persons_manual: int) -> int:
+    return occupancy_est if auto_occupancy else persons_manual
+
+
+def _footprint(area_above_m2: float, floors_above: int) -> float:
+    return 0.0 if area_above_m2 <= 0 else area_above_m2 / max(1, floors_above)
+
+
+NODES: Tuple[Node, ...] = (
+    Node("use_profile", ("use_type",), use_profile),
+    Node("city_preset", ("city",), _city),
+    Node("design_temp_C", ("city_preset",), lambda c: float(c.get("design_temp_C", -10.0))),
+    Node("rain_r_l_s_ha", ("city_preset",), lambda c: float(c.get("rain_r_l_s_ha", 300.0))),
+    Node("area_total_m2", ("area_above_m2", "area_below_m2"), lambda a, b: a + b),
+    Node("occupancy_est", ("area_above_m2", "use_profile"), estimate_occupancy),
+    Node("persons", ("auto_occupancy", "occupancy_est", "persons_manual"), _persons),
+    Node("roof_area_est", ("area_above_m2", "floors_above"), _footprint),
+    Node("roof_area_m2", ("auto_roof_area", "roof_area_est", "roof_area_manual"),
+         lambda auto, est, manual: est if auto else manual),
+    Node("ventilation", ("area_above_m2", "persons", "vent_cat"), estimate_ventilation_flow_m3h),
+    Node("hvac_capacities", ("area_above_m2", "use_profile", "design_temp_C", "design_summer_C", "ventilation"),
+         lambda a, p, t, s, v: estimate_hvac_capacities(a, p, design_temp_C=t, design_summer_C=s, ventilation=v)),
+    Node("hvac_electrical", ("area_above_m2", "use_profile", "hvac_capacities"),
+         lambda a, p, c: estimate_hvac_electrical_kw(a, p, c["design_summer_C"], cooling_kw=c["cooling_kw"])),
+    Node("lifts", ("area_above_m2", "use_profile"), estimate_lifts_kw),
+    Node("electrical_loads", ("area_above_m2", "use_profile", "hvac_electrical", "lifts"),
+         lambda a, p, h, l: estimate_electrical_loads(a, p, hvac_kw=h[0], lifts_kw=l[0])),
+    Node("electrical_connected_kw", ("electrical_loads",), lambda e: float(sum(e.values()))),
+    Node("allowances", ("area_total_m2", "floors_above", "use_profile", "fire_shafts_m2_per_floor"),
+         estimate_tech_rooms_and_shafts),
+    Node("fixtures", ("use_type", "persons"), estimate_fixtures_from_occupancy),
+    Node("rain_flow_lps", ("roof_area_m2", "rain_r_l_s_ha"), estimate_rain_flow_lps),
+)
+
+
+class ProjectModel:
+    """Inputs + lazily computed derived nodes with targeted invalidation."""
+
+    def __init__(self, inputs: Union[Mapping[str, Any], ProjectInputs] = None, nodes: Iterable[Node] = NODES):
+        self.nodes: Dict[str, Node] = {n.name: n for n in nodes}
+        self.children: Dict[str, List[str]] = {k: [] for k in list(INPUTS) + list(self.nodes)}
+        for n in self.nodes.values():
+            for d in n.deps:
+                if d not in self.children:
+                    raise KeyError(f"Node {n.name} depends on unknown node {d}")
+                self.children[d].append(n.name)
+        self.order = self._toposort()
+        self.values: Dict[str, Any] = dict(INPUTS)
+        self.recomputed: Counter = Counter()
+        if isinstance(inputs, ProjectInputs):
+            self.values.update(inputs.model_dump())     # already validated (e.g. models.PROJECTS)
+        elif inputs:
+            self.set(**inputs)
+
+    def _toposort(self) -> List[str]:
+        indeg = {k: len(self.nodes[k].deps) if k in self.nodes else 0 for k in self.children}
+        ready = [k for k, d in indeg.items() if d == 0]
+        out: List[str] = []
+        while ready:
+            k = ready.pop()
+            out.append(k)
+            for c in self.children[k]:
+                indeg[c] -= 1
+                if indeg[c] == 0:
+                    ready.append(c)
+        if len(out) != len(indeg):
+            raise ValueError("Project model graph has a cycle")
+        return out
+
+    def descendants(self, names: Iterable[str]) -> Set[str]:
+        seen: Set[str] = set()
+        stack = list(names)
+        while stack:
+            for c in self.children[stack.pop()]:
+                if c not in seen:
+                    seen.add(c)
+                    stack.append(c)
+        return seen
+
+    def input_closure(self, name: str) -> Tuple[str, ...]:
+        """The inputs a node depends on, directly or through other nodes (sorted)."""
+        if name not in self.nodes:
+            return (name,)
+        seen: Set[str] = set()
+        stack = [name]
+        while stack:
+            for d in self.nodes[stack.pop()].deps:
+                if d not in seen:
+                    seen.add(d)
+                    if d in self.nodes:
+                        stack.append(d)
+        return tuple(sorted(k for k in seen if k not in self.nodes))
+
+    def set(self, **inputs: Any) -> Set[str]:
+        """Update inputs; drop the derived values that depend on a changed input. Returns them.
+
+        Values are validated and coerced (ProjectInputs); invalid ones raise a ValidationError (a
+        ValueError) and leave the model unchanged.
+        """
+        for k in inputs:
+            if k not in INPUTS:
+                raise KeyError(f"Unknown project input: {k}")
+        valid = ProjectInputs.model_validate({**self.inputs(), **inputs})
+        changed = []
+        for k in inputs:
+            v = getattr(valid, k)
+            if self.values[k] != v:
+                self.values[k] = v
+                changed.append(k)
+        stale = self.descendants(changed)
+        for k in stale:
+            self.values.pop(k, None)
+        return stale
+
+    def get(self, name: str) -> Any:
+        if name in self.values:
+            return self.values[name]
+        node = self.nodes[name]
+        value = node.fn(*(self.get(d) for d in node.deps))
+        self.values[name] = value
+        self.recomputed[name] += 1
+        return value
+
+    __getitem__ = get
+
+    def inputs(self) -> Dict[str, Any]:
+        return {k: self.values[k] for k in INPUTS}
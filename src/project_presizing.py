@@ -1,82 +1,95 @@
 
 from __future__ import annotations
 
-import json
 import math
-from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Mapping, Optional, Tuple
 
-DATA_PATH = Path(__file__).resolve().parent.parent / "data"
+import numpy as np
+
+from .data_catalog import CityPreset, UseProfile, city_presets, use_profiles
+from .rainfall_grid import Location, RainGrid, default_rain_grid, rain_intensity_l_s_ha
+from .models import Count, FixtureCounts, NonNegative, VentCat
+from .profiling import profile_functions
 
 # Ventilation (outdoor air) category defaults — indicative values aligned with EN 16798 examples.
 # Note: ventilation flow targets depend mainly on IAQ category and occupancy, not on climate.
+#
+# Arguments are validated where they enter (models: ProjectInputs, API arguments) against the
+# annotations below, so the estimates use them as given.
 VENT_CAT_DEFAULTS = {
     "Cat I": {"qp_Ls_per_person": 10.0, "qB_Ls_per_m2": 1.0},
     "Cat II": {"qp_Ls_per_person": 7.0, "qB_Ls_per_m2": 0.7},
     "Cat III": {"qp_Ls_per_person": 4.0, "qB_Ls_per_m2": 0.4},
 }
 
-def estimate_ventilation_flow_m3h(area_m2: float, persons: int, vent_cat: str = "Cat II") -> dict:
+def estimate_ventilation_flow_m3h(area_m2: NonNegative, persons: Count, vent_cat: VentCat = "Cat II") -> dict:
     """Estimate outdoor air flow using people + area method (pre-sizing).
 
     q = n*qp + A*qB
     where qp and qB are in L/s.
     Returns both L/s and m³/h.
     """
-    area_m2 = max(0.0, float(area_m2))
-    persons = max(0, int(persons))
-    d = VENT_CAT_DEFAULTS.get(str(vent_cat), VENT_CAT_DEFAULTS["Cat II"])
-    qp = float(d["qp_Ls_per_person"])
-    qB = float(d["qB_Ls_per_m2"])
+    d = VENT_CAT_DEFAULTS.get(vent_cat, VENT_CAT_DEFAULTS["Cat II"])
+    qp = d["qp_Ls_per_person"]
+    qB = d["qB_Ls_per_m2"]
     q_ls = persons * qp + area_m2 * qB
     q_m3h = q_ls * 3.6  # 1 L/s = 3.6 m3/h
-    return {"vent_cat": str(vent_cat), "qp_Ls_per_person": qp, "qB_Ls_per_m2": qB, "q_Ls": q_ls, "q_m3h": q_m3h}
+    return {"vent_cat": vent_cat, "qp_Ls_per_person": qp, "qB_Ls_per_m2": qB, "q_Ls": q_ls, "q_m3h": q_m3h}
 
-def ventilation_sensible_loads_kw(q_m3h: float, t_in_C: float, t_out_C: float) -> float:
+def ventilation_sensible_loads_kw(q_m3h: NonNegative, t_in_C: float, t_out_C: float) -> float:
     """Sensible ventilation load (kW), very simplified.
     Uses rho_air=1.2 kg/m3 and cp=1.005 kJ/kgK.
     """
     rho = 1.2
     cp_kJ = 1.005
-    q_m3s = max(0.0, float(q_m3h)) / 3600.0
+    q_m3s = q_m3h / 3600.0
     m_dot = rho * q_m3s  # kg/s
-    dT = float(t_out_C) - float(t_in_C)
+    dT = t_out_C - t_in_C
     # kW = (kg/s)*(kJ/kgK)*(K) = kJ/s = kW
     return m_dot * cp_kJ * dT
 
-def load_use_profiles() -> Dict[str, Any]:
-    return json.load(open(DATA_PATH / "use_profiles.json", "r", encoding="utf-8"))
+def load_use_profiles() -> Mapping[str, UseProfile]:
+    return use_profiles()
 
-def load_city_presets() -> Dict[str, Any]:
-    return json.load(open(DATA_PATH / "city_presets.json", "r", encoding="utf-8"))
+def load_city_presets() -> Mapping[str, CityPreset]:
+    return city_presets()
 
-def estimate_occupancy(area_above_m2: float, use_profile: Dict[str, Any]) -> int:
+def estimate_occupancy(area_above_m2: NonNegative, use_profile: Dict[str, Any]) -> int:
     m2_per_person = float(use_profile.get("occupancy_m2_per_person", 10) or 10)
     if m2_per_person <= 0:
         m2_per_person = 10
-    return int(max(0, round(area_above_m2 / m2_per_person)))
+    return int(round(area_above_m2 / m2_per_person))
 
-def estimate_tech_rooms_and_shafts(area_total_m2: float, floors_above: int, use_profile: Dict[str, Any]) -> Dict[str, float]:
+def estimate_tech_rooms_and_shafts(area_total_m2: NonNegative, floors_above: Count, use_profile: Dict[str, Any],
+                                   fire_shafts_m2_per_floor: NonNegative = 0.0) -> Dict[str, float]:
+    """Area-ratio allowances; smoke-extraction / pressurization risers (calcs_smoke) are added on every storey above."""
     tech_ratio = float(use_profile.get("tech_rooms_ratio", 0.015) or 0.015)
     shafts_ratio = float(use_profile.get("shafts_ratio", 0.008) or 0.008)
-    tech_m2 = max(0.0, area_total_m2 * tech_ratio)
-    shafts_m2 = max(0.0, area_total_m2 * shafts_ratio)
-    floors_above = max(1, int(floors_above or 1))
+    tech_m2 = area_total_m2 * tech_ratio
+    floors_above = max(1, floors_above)
+    fire_m2 = fire_shafts_m2_per_floor * floors_above
+    shafts_m2 = area_total_m2 * shafts_ratio + fire_m2
     return {
         "tech_rooms_m2": tech_m2,
         "shafts_m2": shafts_m2,
         "shafts_m2_per_floor": shafts_m2 / floors_above,
+        "fire_shafts_m2": fire_m2,
     }
 
-def estimate_hvac_electrical_kw(area_above_m2: float, use_profile: Dict[str, Any], design_summer_C: float = 32.0) -> Tuple[float, Dict[str, float]]:
-    # Very simplified: P_elec ≈ Q_cool / EER + fans/aux
+def estimate_hvac_electrical_kw(area_above_m2: NonNegative, use_profile: Dict[str, Any], design_summer_C: float = 32.0,
+                                cooling_kw: Optional[NonNegative] = None) -> Tuple[float, Dict[str, float]]:
+    # Very simplified: P_elec ≈ Q_cool / EER + fans/aux. Q_cool is the cooling capacity
+    # (estimate_hvac_capacities) when given, else the profile's W/m² with the climate factor.
     cool_w_m2 = float(use_profile.get("cooling_W_m2", 0) or 0)
     eer = float(use_profile.get("hvac_eer_cooling", 3.0) or 3.0)
     fans_w_m2 = float(use_profile.get("hvac_fans_W_m2", 5.0) or 5.0)
-    cool_factor = climate_adjust_cooling_factor(float(design_summer_C))
-    hvac_elec_w_m2 = ((cool_w_m2 * cool_factor) / eer) + fans_w_m2
-    hvac_kw = max(0.0, area_above_m2) * hvac_elec_w_m2 / 1000.0
+    cool_factor = climate_adjust_cooling_factor(design_summer_C)
+    if cooling_kw is None:
+        cooling_kw = area_above_m2 * cool_w_m2 * cool_factor / 1000.0
+    hvac_kw = cooling_kw / eer + area_above_m2 * fans_w_m2 / 1000.0
+    hvac_elec_w_m2 = hvac_kw * 1000.0 / area_above_m2 if area_above_m2 > 0 else 0.0
     return hvac_kw, {
+        "cooling_kw": cooling_kw,
         "cooling_W_m2": cool_w_m2,
         "eer": eer,
         "fans_W_m2": fans_w_m2,
@@ -84,13 +97,13 @@ def estimate_hvac_electrical_kw(area_above_m2: float, use_profile: Dict[str, Any
         "cooling_factor": cool_factor,
     }
 
-def estimate_lifts_kw(area_above_m2: float, use_profile: Dict[str, Any]) -> Tuple[float, Dict[str, float]]:
+def estimate_lifts_kw(area_above_m2: NonNegative, use_profile: Dict[str, Any]) -> Tuple[float, Dict[str, float]]:
     area_per_lift = float(use_profile.get("lift_area_m2_per_lift", 5000) or 5000)
     p_per_lift = float(use_profile.get("lift_power_kW_per_lift", 15.0) or 0.0)
     diversity = float(use_profile.get("lift_diversity", 0.6) or 0.0)
     if p_per_lift <= 0 or diversity <= 0 or area_above_m2 <= 0:
         return 0.0, {"n_lifts": 0, "area_m2_per_lift": area_per_lift, "power_kW_per_lift": p_per_lift, "diversity": diversity}
-    n_lifts = max(1, int(math.ceil(area_above_m2 / area_per_lift)))
+    n_lifts = max(1, math.ceil(area_above_m2 / area_per_lift))
     lifts_kw = n_lifts * p_per_lift * diversity
     return lifts_kw, {
         "n_lifts": n_lifts,
@@ -99,15 +112,19 @@ def estimate_lifts_kw(area_above_m2: float, use_profile: Dict[str, Any]) -> Tupl
         "diversity": diversity,
     }
 
-def estimate_electrical_loads(area_above_m2: float, use_profile: Dict[str, Any]) -> Dict[str, float]:
+def estimate_electrical_loads(area_above_m2: NonNegative, use_profile: Dict[str, Any],
+                              hvac_kw: Optional[NonNegative] = None, lifts_kw: Optional[NonNegative] = None) -> Dict[str, float]:
+    """Connected loads (kW). HVAC and lift loads are estimated from the profile unless given."""
     lighting_w_m2 = float(use_profile.get("lighting_W_m2", 8) or 0)
     sockets_w_m2 = float(use_profile.get("sockets_W_m2", 15) or 0)
     other_w_m2 = float(use_profile.get("other_W_m2", 5) or 0)
     lighting_kw = area_above_m2 * lighting_w_m2 / 1000.0
     sockets_kw = area_above_m2 * sockets_w_m2 / 1000.0
     other_kw = area_above_m2 * other_w_m2 / 1000.0
-    hvac_kw, _ = estimate_hvac_electrical_kw(area_above_m2, use_profile)
-    lifts_kw, _ = estimate_lifts_kw(area_above_m2, use_profile)
+    if hvac_kw is None:
+        hvac_kw, _ = estimate_hvac_electrical_kw(area_above_m2, use_profile)
+    if lifts_kw is None:
+        lifts_kw, _ = estimate_lifts_kw(area_above_m2, use_profile)
     return {
         "lighting_kw": lighting_kw,
         "sockets_kw": sockets_kw,
@@ -125,11 +142,11 @@ def climate_adjust_cooling_factor(summer_temp_C: float, reference_summer_C: floa
     using Tin_summer = 26°C and reference_summer = 32°C by default.
     """
     T_in = 26.0
-    denom = (float(reference_summer_C) - T_in)
+    denom = (reference_summer_C - T_in)
     if denom <= 0:
         return 1.0
-    factor = (float(summer_temp_C) - T_in) / denom
-    return max(0.7, min(1.4, float(factor)))
+    factor = (summer_temp_C - T_in) / denom
+    return max(0.7, min(1.4, factor))
 
 def climate_adjust_heating_factor(design_temp_C: float, reference_temp_C: float = -10.0) -> float:
     """Very simplified climate adjustment for heating loads (pre-sizing).
@@ -139,107 +156,142 @@ def climate_adjust_heating_factor(design_temp_C: float, reference_temp_C: float
     using Tindoor = 20°C and Tref = -10°C by default.
     """
     T_in = 20.0
-    denom = (T_in - float(reference_temp_C))
+    denom = (T_in - reference_temp_C)
     if denom <= 0:
         return 1.0
-    factor = (T_in - float(design_temp_C)) / denom
-    return max(0.7, min(1.4, float(factor)))
+    factor = (T_in - design_temp_C) / denom
+    return max(0.7, min(1.4, factor))
 
 def estimate_hvac_capacities(
-    area_above_m2: float,
+    area_above_m2: NonNegative,
     use_profile: Dict[str, Any],
     diversity: float = 0.8,
     design_temp_C: float = -10.0,
-    persons: int = 0,
-    vent_cat: str = "Cat II",
+    persons: Count = 0,
+    vent_cat: VentCat = "Cat II",
     design_summer_C: float = 32.0,
+    ventilation: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, float]:
     """Very simplified HVAC capacity pre-sizing (kW).
 
     - Base loads use W/m² benchmarks from the use profile.
     - Adds a simplified sensitivity for climate using design winter/summer temperatures.
-    - Adds sensible ventilation load from the EN 16798-style people+area outdoor air flow estimate.
+    - Adds sensible ventilation load from the EN 16798-style people+area outdoor air flow estimate
+      (`ventilation`, a result of estimate_ventilation_flow_m3h; estimated from persons and
+      vent_cat unless given).
 
     This is NOT a DIN EN 12831 or VDI 2078 compliant load calculation.
     """
     heat_w_m2 = float(use_profile.get("heating_W_m2", 50) or 0)
     cool_w_m2 = float(use_profile.get("cooling_W_m2", 70) or 0)
-    diversity = max(0.3, min(1.0, float(diversity)))
+    diversity = max(0.3, min(1.0, diversity))
 
     heat_factor = climate_adjust_heating_factor(design_temp_C)
     cool_factor = climate_adjust_cooling_factor(design_summer_C)
 
     # Ventilation outdoor air flow (people + area method)
-    vent = estimate_ventilation_flow_m3h(area_above_m2, persons, vent_cat)
-    q_m3h = float(vent["q_m3h"])
+    vent = ventilation or estimate_ventilation_flow_m3h(area_above_m2, persons, vent_cat)
+    q_m3h = vent["q_m3h"]
+    vent_cat = vent.get("vent_cat", vent_cat)
 
     # Sensible ventilation loads (kW)
     vent_heat_kw = -ventilation_sensible_loads_kw(q_m3h, t_in_C=20.0, t_out_C=design_temp_C)  # heating magnitude
     vent_cool_kw = max(0.0, ventilation_sensible_loads_kw(q_m3h, t_in_C=26.0, t_out_C=design_summer_C))  # cooling magnitude
 
-    base_heat_kw = max(0.0, area_above_m2) * heat_w_m2 / 1000.0 * diversity * heat_factor
-    base_cool_kw = max(0.0, area_above_m2) * cool_w_m2 / 1000.0 * diversity * cool_factor
+    vent_heat_kw = max(0.0, vent_heat_kw)
+    base_heat_kw = area_above_m2 * heat_w_m2 / 1000.0 * diversity * heat_factor
+    base_cool_kw = area_above_m2 * cool_w_m2 / 1000.0 * diversity * cool_factor
 
     return {
-        "heating_kw": float(base_heat_kw + max(0.0, vent_heat_kw)),
-        "cooling_kw": float(base_cool_kw + max(0.0, vent_cool_kw)),
-        "heat_W_m2": float(heat_w_m2),
-        "cool_W_m2": float(cool_w_m2),
-        "diversity": float(diversity),
-        "design_temp_C": float(design_temp_C),
-        "design_summer_C": float(design_summer_C),
-        "heating_factor": float(heat_factor),
-        "cooling_factor": float(cool_factor),
-        "vent_cat": str(vent_cat),
-        "vent_m3h": float(q_m3h),
-        "vent_heat_kw": float(max(0.0, vent_heat_kw)),
-        "vent_cool_kw": float(max(0.0, vent_cool_kw)),
+        "heating_kw": base_heat_kw + vent_heat_kw,
+        "cooling_kw": base_cool_kw + vent_cool_kw,
+        "heat_W_m2": heat_w_m2,
+        "cool_W_m2": cool_w_m2,
+        "diversity": diversity,
+        "design_temp_C": design_temp_C,
+        "design_summer_C": design_summer_C,
+        "heating_factor": heat_factor,
+        "cooling_factor": cool_factor,
+        "vent_cat": vent_cat,
+        "vent_m3h": q_m3h,
+        "vent_heat_kw": vent_heat_kw,
+        "vent_cool_kw": vent_cool_kw,
     }
 
-def estimate_rain_flow_lps(roof_area_m2: float, r_l_s_ha: float, runoff_coeff: float = 0.9) -> float:
+def estimate_rain_flow_lps(
+    roof_area_m2: NonNegative,
+    r_l_s_ha: Optional[NonNegative] = None,
+    runoff_coeff: float = 0.9,
+    location: Optional[Location] = None,
+    duration_min: float = 5.0,
+    return_period_a: float = 5.0,
+    grid: Optional[RainGrid] = None,
+) -> float:
     # Q = r · C · A ; r in L/(s·ha), A in ha
-    A_ha = max(0.0, float(roof_area_m2)) / 10000.0
-    r = max(0.0, float(r_l_s_ha))
-    C = max(0.1, min(1.0, float(runoff_coeff)))
+    # r is either given directly or looked up as r(D,T) at a location (lat/lon or postcode) in the rain grid.
+    if location is not None:
+        r_l_s_ha = rain_intensity_l_s_ha(location, duration_min, return_period_a, grid)
+    if r_l_s_ha is None:
+        raise ValueError("Provide r_l_s_ha or a location")
+    A_ha = roof_area_m2 / 10000.0
+    C = max(0.1, min(1.0, runoff_coeff))
+    return r_l_s_ha * C * A_ha
+
+def estimate_rain_flows_lps(
+    roof_area_m2,
+    lat,
+    lon,
+    duration_min=5.0,
+    return_period_a=5.0,
+    runoff_coeff=0.9,
+    grid: Optional[RainGrid] = None,
+) -> np.ndarray:
+    """Vectorized rain flow (L/s) for a portfolio of sites from the rain grid."""
+    grid = grid or default_rain_grid()
+    r = grid.intensity(lat, lon, duration_min, return_period_a)
+    A_ha = np.maximum(0.0, np.asarray(roof_area_m2, dtype=float)) / 10000.0
+    C = np.clip(np.asarray(runoff_coeff, dtype=float), 0.1, 1.0)
     return r * C * A_ha
 
-def estimate_fixtures_from_occupancy(use_type: str, persons: int) -> Dict[str, int]:
+def estimate_fixtures_from_occupancy(use_type: str, persons: Count) -> FixtureCounts:
     # Very rough rule-of-thumb to seed plumbing pre-sizing.
-    persons = max(0, int(persons))
     if persons == 0:
         return {"Washbasin": 0, "WC cistern": 0, "Urinal": 0, "Kitchen sink": 0, "Shower": 0}
 
     if use_type == "Office":
         return {
-            "Washbasin": max(1, int(math.ceil(persons / 25))),
-            "WC cistern": max(1, int(math.ceil(persons / 25))),
-            "Urinal": max(0, int(math.ceil(persons / 50))),
-            "Kitchen sink": max(1, int(math.ceil(persons / 100))),
-            "Shower": max(0, int(math.ceil(persons / 200))),
+            "Washbasin": max(1, math.ceil(persons / 25)),
+            "WC cistern": max(1, math.ceil(persons / 25)),
+            "Urinal": max(0, math.ceil(persons / 50)),
+            "Kitchen sink": max(1, math.ceil(persons / 100)),
+            "Shower": max(0, math.ceil(persons / 200)),
         }
     if use_type == "Retail":
         return {
-            "Washbasin": max(1, int(math.ceil(persons / 30))),
-            "WC cistern": max(1, int(math.ceil(persons / 30))),
-            "Urinal": max(0, int(math.ceil(persons / 60))),
-            "Kitchen sink": max(1, int(math.ceil(persons / 150))),
+            "Washbasin": max(1, math.ceil(persons / 30)),
+            "WC cistern": max(1, math.ceil(persons / 30)),
+            "Urinal": max(0, math.ceil(persons / 60)),
+            "Kitchen sink": max(1, math.ceil(persons / 150)),
             "Shower": 0,
         }
     if use_type == "Hotel":
         return {
-            "Washbasin": max(1, int(math.ceil(persons / 10))),
-            "WC cistern": max(1, int(math.ceil(persons / 10))),
-            "Urinal": max(0, int(math.ceil(persons / 30))),
-            "Kitchen sink": max(1, int(math.ceil(persons / 50))),
-            "Shower": max(1, int(math.ceil(persons / 10))),
+            "Washbasin": max(1, math.ceil(persons / 10)),
+            "WC cistern": max(1, math.ceil(persons / 10)),
+            "Urinal": max(0, math.ceil(persons / 30)),
+            "Kitchen sink": max(1, math.ceil(persons / 50)),
+            "Shower": max(1, math.ceil(persons / 10)),
         }
     if use_type == "Residential":
         return {
-            "Washbasin": max(1, int(math.ceil(persons / 3))),
-            "WC cistern": max(1, int(math.ceil(persons / 3))),
+            "Washbasin": max(1, math.ceil(persons / 3)),
+            "WC cistern": max(1, math.ceil(persons / 3)),
             "Urinal": 0,
-            "Kitchen sink": max(1, int(math.ceil(persons / 3))),
-            "Shower": max(1, int(math.ceil(persons / 3))),
+            "Kitchen sink": max(1, math.ceil(persons / 3)),
+            "Shower": max(1, math.ceil(persons / 3)),
         }
 
     return {"Washbasin": 0, "WC cistern": 0, "Urinal": 0, "Kitchen sink": 0, "Shower": 0}
+
+
+profile_functions(globals())
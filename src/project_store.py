@@ -0,0 +1,363 @@
+
+from __future__ import annotations
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from .batch import RESULT_COLUMNS
+from .export import column_kind
+from .models import PROJECTS, validate_each
+from .project_model import INPUTS
+
+# Local project store (SQLite): python -m src.project_store import projects.csv
+#
+# One row per project: the project definition (project_model.INPUTS), the pre-sizing results
+# (batch.RESULT_COLUMNS) and W/m² figures derived from them, plus name and timestamps. Indexed on
+# (city, use, area), (use, area), area and the last-saved date, so portfolio questions such as
+# "Munich offices over 20,000 m² and their W/m²" are index range scans. Saving an existing project
+# compares with the stored row and writes only the changed columns (results are recomputed only if
+# an input changed); bulk inserts run as one executemany per chunk; queries page by id (keyset) so
+# the UI loads any result set in fixed-size batches.
+
+DEFAULT_PATH = Path(os.environ.get("MEP_PROJECT_DB", Path.home() / ".mep_presizing" / "projects.sqlite"))
+
+INPUT_COLUMNS = list(INPUTS)
+RESULT_FIELDS = [c for c in RESULT_COLUMNS if c not in ("row", "id") and c not in INPUTS]
+DERIVED_COLUMNS = ["area_total_m2", "elec_demand_w_m2", "heating_w_m2", "cooling_w_m2"]
+COLUMNS = ["name"] + INPUT_COLUMNS + RESULT_FIELDS + DERIVED_COLUMNS
+
+_SQL_TYPES = {"str": "TEXT", "int": "INTEGER", "bool": "INTEGER", "list": "TEXT", "float": "REAL"}
+
+
+def _input_kind(key: str) -> str:
+    default = INPUTS[key]
+    return "bool" if isinstance(default, bool) else "int" if isinstance(default, int) else \
+        "float" if isinstance(default, float) else "str"
+
+
+def _kind(col: str) -> str:
+    if col == "name":
+        return "str"
+    return _input_kind(col) if col in INPUTS else column_kind(col)
+
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS projects (id INTEGER PRIMARY KEY, "
+    + ", ".join(f"{c} {_SQL_TYPES[_kind(c)]}" for c in COLUMNS)
+    + ", created_at TEXT NOT NULL, updated_at TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_projects_city_use_area ON projects (city, use_type, area_total_m2)",
+    "CREATE INDEX IF NOT EXISTS ix_projects_use_area ON projects (use_type, area_total_m2)",
+    "CREATE INDEX IF NOT EXISTS ix_projects_area ON projects (area_total_m2)",
+    "CREATE INDEX IF NOT EXISTS ix_projects_updated ON projects (updated_at)",
+]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _to_sql(kind: str):
+    if kind == "list":
+        return lambda v: json.dumps(list(v), ensure_ascii=False)
+    return {"int": int, "bool": int, "float": float}.get(kind, str)
+
+
+# Per-column converters, resolved once (bulk inserts and page loads run them per cell)
+_SQL_CONVERT = {c: _to_sql(_kind(c)) for c in COLUMNS}
+_PY_CONVERT = {c: json.loads if _kind(c) == "list" else bool for c in COLUMNS if _kind(c) in ("list", "bool")}
+
+
+def _sql_value(col: str, v: Any) -> Any:
+    if v is None or (isinstance(v, float) and v != v):
+        return None
+    return _SQL_CONVERT[col](v)
+
+
+def project_row(inputs: Dict[str, Any], results: Optional[Dict[str, Any]] = None, name: Optional[str] = None) -> Dict[str, Any]:
+    """Stored column values for one project (missing inputs take the sidebar defaults)."""
+    inp = {**INPUTS, **{k: v for k, v in inputs.items() if k in INPUTS}}
+    res = results or {}
+    area_above = float(inp["area_above_m2"])
+    per_m2 = lambda kw: float(kw) * 1000.0 / area_above if kw is not None and area_above > 0 else None
+    row = {"name": name if name is not None else str(inputs.get("name", res.get("id", "")))}
+    row.update(inp)
+    row.update({c: res.get(c) for c in RESULT_FIELDS})
+    row.update({
+        "area_total_m2": area_above + float(inp["area_below_m2"]),
+        "elec_demand_w_m2": per_m2(res.get("elec_demand_kw")),
+        "heating_w_m2": per_m2(res.get("hvac_heating_kw")),
+        "cooling_w_m2": per_m2(res.get("hvac_cooling_kw")),
+    })
+    return {c: _sql_value(c, row.get(c)) for c in COLUMNS}
+
+
+def compute_results(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    from .batch import presize_records
+    return presize_records([{"row": 0, "raw": dict(inputs)}])[0]
+
+
+class ProjectStore:
+    """SQLite store of project definitions and results. Use as a context manager or call close()."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_PATH):
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Streamlit reruns may run on different threads; each store is used by one session at a time
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for stmt in SCHEMA:
+                self.conn.execute(stmt)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- writes --------------------------------------------------------------------------------
+
+    def save(self, inputs: Dict[str, Any], name: Optional[str] = None, project_id: Optional[int] = None,
+             results: Optional[Dict[str, Any]] = None) -> Tuple[int, List[str]]:
+        """Insert a project, or update `project_id` touching only changed columns.
+
+        Returns (id, changed column names); nothing is written when nothing changed. Results are
+        computed with the batch pipeline unless given, and only when an input changed.
+        """
+        if project_id is None:
+            row = project_row(inputs, results or compute_results(inputs), name)
+            now = _now()
+            with self.conn:
+                cur = self.conn.execute(
+                    f"INSERT INTO projects ({', '.join(COLUMNS)}, created_at, updated_at) "
+                    f"VALUES ({', '.join('?' * len(COLUMNS))}, ?, ?)", [row[c] for c in COLUMNS] + [now, now])
+            return int(cur.lastrowid), list(COLUMNS)
+
+        found = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM projects WHERE id = ?", (project_id,)).fetchone()
+        if found is None:
+            raise KeyError(f"no stored project {project_id}")
+        old = dict(zip(COLUMNS, found))
+        new_inputs = project_row(inputs)
+        inputs_changed = any(new_inputs[c] != old[c] for c in INPUT_COLUMNS)
+        if results is None and inputs_changed:
+            results = compute_results(inputs)
+        if results is None:
+            row = dict(old)
+            row.update({c: new_inputs[c] for c in INPUT_COLUMNS})
+        else:
+            row = project_row(inputs, results)
+        row["name"] = name if name is not None else old["name"]
+        changed = [c for c in COLUMNS if row[c] != old[c]]
+        if changed:
+            with self.conn:
+                self.conn.execute(f"UPDATE projects SET {', '.join(f'{c} = ?' for c in changed)}, updated_at = ? WHERE id = ?",
+                                  [row[c] for c in changed] + [_now(), project_id])
+        return project_id, changed
+
+    def bulk_insert(self, rows: Iterable[Dict[str, Any]], chunk_size: int = 5_000) -> int:
+        """Insert flat project records (input fields, result fields, name or id); one transaction per chunk."""
+        sql = (f"INSERT INTO projects ({', '.join(COLUMNS)}, created_at, updated_at) "
+               f"VALUES ({', '.join('?' * len(COLUMNS))}, ?, ?)")
+        n = 0
+        chunk: List[List[Any]] = []
+
+        def flush() -> None:
+            with self.conn:
+                self.conn.executemany(sql, chunk)
+            chunk.clear()
+
+        now = _now()
+        for r in rows:
+            row = project_row(r, r, r.get("name", r.get("id")))
+            chunk.append([row[c] for c in COLUMNS] + [r.get("created_at", now), r.get("updated_at", now)])
+            n += 1
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+        return n
+
+    def import_projects(self, projects: Iterable[Dict[str, Any]], chunk_size: int = 256) -> Dict[str, int]:
+        """Pre-size raw project rows (batch input format) and store them. Failed rows are stored with their error."""
+        from .batch import _chunks, presize_chunk
+        stats = {"projects": 0, "errors": 0}
+
+        def records() -> Iterator[Dict[str, Any]]:
+            for chunk in _chunks(projects, chunk_size):
+                raws = {rec["row"]: rec["raw"] for rec in chunk}
+                valid = validate_each(PROJECTS, list(raws.values()))
+                inputs = {row: {} if isinstance(v, Exception) else v.model_dump(exclude_unset=True)
+                          for row, v in zip(raws, valid)}
+                for res in presize_chunk(chunk):
+                    raw = raws[res["row"]]
+                    stats["errors"] += bool(res.get("error"))
+                    yield {**res, **inputs[res["row"]], "name": str(raw.get("name", res["id"]))}
+
+        stats["projects"] = self.bulk_insert(records())
+        return stats
+
+    def delete(self, project_id: int) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+
+    # -- reads ---------------------------------------------------------------------------------
+
+    @staticmethod
+    def _where(city: Optional[str] = None, use_type: Optional[str] = None, min_area: Optional[float] = None,
+               max_area: Optional[float] = None, since: Optional[str] = None, until: Optional[str] = None,
+               name: Optional[str] = None) -> Tuple[str, List[Any]]:
+        clauses, args = [], []
+        for sql, v in (("city = ?", city), ("use_type = ?", use_type), ("area_total_m2 >= ?", min_area),
+                       ("area_total_m2 <= ?", max_area), ("updated_at >= ?", since), ("updated_at < ?", until),
+                       ("name LIKE ?", None if name is None else f"%{name}%")):
+            if v is not None:
+                clauses.append(sql)
+                args.append(v)
+        return (" AND ".join(clauses) or "1"), args
+
+    def count(self, **filters: Any) -> int:
+        where, args = self._where(**filters)
+        return int(self.conn.execute(f"SELECT COUNT(*) FROM projects WHERE {where}", args).fetchone()[0])
+
+    def query(self, columns: Optional[Sequence[str]] = None, after_id: int = 0, limit: Optional[int] = None,
+              **filters: Any) -> List[Dict[str, Any]]:
+        """Matching projects with id > after_id in id order (keyset paging), as dicts of `columns`."""
+        cols = ["id"] + [c for c in (columns or COLUMNS + ["created_at", "updated_at"]) if c != "id"]
+        unknown = set(cols) - set(COLUMNS) - {"id", "created_at", "updated_at"}
+        if unknown:
+            raise KeyError(f"unknown columns {sorted(unknown)}")
+        where, args = self._where(**filters)
+        sql = f"SELECT {', '.join(cols)} FROM projects WHERE {where} AND id > ? ORDER BY id"
+        args.append(int(after_id))
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        convert = [(c, _PY_CONVERT[c]) for c in cols if c in _PY_CONVERT]
+        out = []
+        for r in self.conn.execute(sql, args):
+            d = dict(zip(cols, r))
+            for c, fn in convert:
+                if d[c] is not None:
+                    d[c] = fn(d[c])
+            out.append(d)
+        return out
+
+    def iter_batches(self, batch_size: int = 500, columns: Optional[Sequence[str]] = None,
+                     **filters: Any) -> Iterator[List[Dict[str, Any]]]:
+        """query() in fixed-size batches; each batch is one indexed query resuming after the last id."""
+        after = 0
+        while True:
+            batch = self.query(columns, after_id=after, limit=batch_size, **filters)
+            if not batch:
+                return
+            yield batch
+            after = batch[-1]["id"]
+
+    def load(self, project_id: int) -> Dict[str, Any]:
+        """Stored project definition (name plus project_model inputs)."""
+        rows = self.query(["name"] + INPUT_COLUMNS, after_id=int(project_id) - 1, limit=1)
+        if not rows or rows[0]["id"] != int(project_id):
+            raise KeyError(f"no stored project {project_id}")
+        return rows[0]
+
+
+def _synthetic_rows(n: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Benchmark rows: varied inputs with results scaled from one computed project (no 100k pipeline runs)."""
+    import random
+    rnd = random.Random(seed)
+    base = compute_results(INPUTS)
+    cities = ["Berlin", "Munich", "Hamburg", "Cologne", "Frankfurt", "Düsseldorf", "Stuttgart", "Leipzig"]
+    uses = ["Office", "Residential", "Retail", "Hotel", "School", "Hospital"]
+    t0 = time.time() - 3 * 365 * 86400
+    for i in range(n):
+        area = rnd.uniform(500, 60_000)
+        scale = area / INPUTS["area_above_m2"]
+        r = {k: (v * scale if isinstance(v, float) and k not in ("feeder_section_mm2", "rain_collector_DN") else v)
+             for k, v in base.items()}
+        stamp = datetime.fromtimestamp(t0 + rnd.uniform(0, 3 * 365 * 86400), timezone.utc).isoformat(timespec="seconds")
+        r.update({"id": f"P{i:06d}", "city": rnd.choice(cities), "use_type": rnd.choice(uses), "area_above_m2": area,
+                  "area_below_m2": rnd.choice([0.0, 0.2 * area]), "floors_above": rnd.randint(1, 20),
+                  "created_at": stamp, "updated_at": stamp})
+        yield r
+
+
+def bench(path: Path, n: int = 100_000) -> Dict[str, float]:
+    """Bulk insert n synthetic projects into a fresh store and time the typical operations (ms)."""
+    if path.exists():
+        path.unlink()
+    out: Dict[str, float] = {}
+    with ProjectStore(path) as store:
+        t = time.perf_counter()
+        store.bulk_insert(_synthetic_rows(n))
+        out["bulk_insert_rows_per_s"] = n / (time.perf_counter() - t)
+
+        def timed(key: str, fn, repeat: int = 20) -> Any:
+            best, res = float("inf"), None
+            for _ in range(repeat):
+                t = time.perf_counter()
+                res = fn()
+                best = min(best, time.perf_counter() - t)
+            out[key] = best * 1000.0
+            return res
+
+        munich = timed("query_munich_offices_over_20k_ms", lambda: store.query(
+            ["name", "area_total_m2", "elec_demand_w_m2", "heating_w_m2", "cooling_w_m2"],
+            city="Munich", use_type="Office", min_area=20_000))
+        out["query_munich_offices_over_20k_rows"] = len(munich)
+        timed("count_offices_over_20k_ms", lambda: store.count(use_type="Office", min_area=20_000))
+        timed("first_page_500_ms", lambda: store.query(limit=500))
+        timed("page_at_90k_500_ms", lambda: store.query(after_id=90_000, limit=500))
+        timed("load_one_ms", lambda: store.load(n // 2))
+        inputs = store.load(n // 2)
+        inputs["design_summer_C"] += 1.0
+        timed("save_changed_input_ms", lambda: store.save(inputs, project_id=n // 2), repeat=1)
+        timed("save_unchanged_ms", lambda: store.save(inputs, project_id=n // 2))
+        out["db_mb"] = path.stat().st_size / 1e6
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .batch import read_projects
+    ap = argparse.ArgumentParser(prog="python -m src.project_store", description="Local SQLite project store.")
+    ap.add_argument("--db", type=Path, default=DEFAULT_PATH, help=f"store file (default {DEFAULT_PATH}; env MEP_PROJECT_DB)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="pre-size and store projects from CSV / JSON / JSON lines")
+    imp.add_argument("input", type=Path)
+    q = sub.add_parser("query", help="print matching projects as JSON lines")
+    q.add_argument("--city")
+    q.add_argument("--use", dest="use_type")
+    q.add_argument("--min-area", type=float)
+    q.add_argument("--max-area", type=float)
+    q.add_argument("--since", help="ISO date, e.g. 2026-01-01")
+    b = sub.add_parser("bench", help="benchmark a fresh store (the --db file is replaced)")
+    b.add_argument("-n", "--projects", type=int, default=100_000)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "bench":
+        for k, v in bench(args.db, args.projects).items():
+            print(f"{k:38s} {v:12,.2f}")
+        return 0
+    with ProjectStore(args.db) as store:
+        if args.cmd == "import":
+            stats = store.import_projects(read_projects(args.input))
+            print(f"{stats['projects']} projects stored ({stats['errors']} with errors) in {args.db}", file=sys.stderr)
+            return 0 if stats["errors"] == 0 else 1
+        for batch in store.iter_batches(city=args.city, use_type=args.use_type, min_area=args.min_area,
+                                        max_area=args.max_area, since=args.since):
+            for r in batch:
+                print(json.dumps(r, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple, Union
+import json
+import numpy as np
+from .data_catalog import file_stamp
+
+# Gridded design rainfall r(D,T) shaped like KOSTRA-DWD: cells × durations × return periods.
+# The dataset is not shipped (obtain it from DWD and convert with write_rain_grid).
+# On disk, a directory holds:
+#   rain_r.npy      float32 (n_cells, n_durations, n_return_periods), r in L/(s·ha)
+#   rain_meta.json  durations_min, return_periods_a, grid {lon0, lat0, dlon, dlat, nrows, ncols},
+#                   cell_rc (row/col per cell, optional), postcodes {"10115": [lat, lon], ...}
+# r is memory-mapped; the grid index maps coordinates to a cell in O(1) without scanning cells.
+
+DATA_PATH = Path(__file__).resolve().parent.parent / "data"
+RAIN_GRID_PATH = DATA_PATH / "kostra"
+
+Location = Union[str, Tuple[float, float]]
+
+
+@dataclass(frozen=True)
+class RainGrid:
+    r: np.ndarray              # memmap (n_cells, n_D, n_T), L/(s·ha)
+    durations_min: np.ndarray
+    return_periods_a: np.ndarray
+    lon0: float
+    lat0: float
+    dlon: float
+    dlat: float
+    cell_at: np.ndarray        # (nrows, ncols) -> cell index, -1 outside the dataset
+    postcodes: Dict[str, Tuple[float, float]]
+
+    def __memo_key__(self):
+        """Cheap cache key: the dataset file version when memory-mapped, else the content."""
+        name = getattr(self.r, "filename", None)
+        if name:
+            return (file_stamp(Path(name)), self.lon0, self.lat0, self.dlon, self.dlat)
+        return (self.r, self.durations_min, self.return_periods_a, self.lon0, self.lat0, self.dlon, self.dlat,
+                self.cell_at, self.postcodes)
+
+    def cells(self, lat, lon) -> np.ndarray:
+        """Cell index for each coordinate (grid index lookup). -1 outside the grid."""
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        row = np.floor((lat - self.lat0) / self.dlat).astype(np.int64)
+        col = np.floor((lon - self.lon0) / self.dlon).astype(np.int64)
+        nrows, ncols = self.cell_at.shape
+        inside = (row >= 0) & (row < nrows) & (col >= 0) & (col < ncols)
+        out = np.full(row.shape, -1, dtype=np.int64)
+        out[inside] = self.cell_at[row[inside], col[inside]]
+        return out
+
+    def coords(self, location: Location) -> Tuple[float, float]:
+        if isinstance(location, str):
+            if location not in self.postcodes:
+                raise KeyError(f"Postcode not in rain grid: {location}")
+            return self.postcodes[location]
+        lat, lon = location
+        return float(lat), float(lon)
+
+    def intensity(self, lat, lon, duration_min, return_period_a) -> np.ndarray:
+        """r(D,T) in L/(s·ha) for arrays of sites; log-log interpolation between tabulated D and T."""
+        cell = self.cells(lat, lon)
+        if (cell < 0).any():
+            raise ValueError(f"{int((cell < 0).sum())} location(s) outside the rain grid")
+        iD, wD = _log_weights(self.durations_min, duration_min, cell.shape)
+        iT, wT = _log_weights(self.return_periods_a, return_period_a, cell.shape)
+        jD = np.minimum(iD + 1, len(self.durations_min) - 1)
+        jT = np.minimum(iT + 1, len(self.return_periods_a) - 1)
+        r = self.r
+        v00 = r[cell, iD, iT]
+        v10 = r[cell, jD, iT]
+        v01 = r[cell, iD, jT]
+        v11 = r[cell, jD, jT]
+        lr = ((1 - wD) * (1 - wT) * np.log(v00) + wD * (1 - wT) * np.log(v10)
+              + (1 - wD) * wT * np.log(v01) + wD * wT * np.log(v11))
+        return np.exp(lr)
+
+
+def _log_weights(grid: np.ndarray, x, shape) -> Tuple[np.ndarray, np.ndarray]:
+    lg = np.log(grid.astype(float))
+    lx = np.broadcast_to(np.log(np.clip(np.asarray(x, dtype=float), grid[0], grid[-1])), shape)
+    if len(grid) == 1:
+        return np.zeros(shape, dtype=np.int64), np.zeros(shape)
+    i = np.clip(np.searchsorted(lg, lx, side="right") - 1, 0, len(grid) - 2)
+    return i, (lx - lg[i]) / (lg[i + 1] - lg[i])
+
+
+def load_rain_grid(path: Union[str, Path] = RAIN_GRID_PATH) -> RainGrid:
+    path = Path(path)
+    with open(path / "rain_meta.json", "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    r = np.load(path / "rain_r.npy", mmap_mode="r")
+    g = meta["grid"]
+    nrows, ncols = int(g["nrows"]), int(g["ncols"])
+    rc = np.asarray(meta.get("cell_rc") or [(i // ncols, i % ncols) for i in range(r.shape[0])], dtype=np.int64)
+    cell_at = np.full((nrows, ncols), -1, dtype=np.int64)
+    cell_at[rc[:, 0], rc[:, 1]] = np.arange(len(rc))
+    return RainGrid(
+        r=r,
+        durations_min=np.asarray(meta["durations_min"], dtype=float),
+        return_periods_a=np.asarray(meta["return_periods_a"], dtype=float),
+        lon0=float(g["lon0"]), lat0=float(g["lat0"]), dlon=float(g["dlon"]), dlat=float(g["dlat"]),
+        cell_at=cell_at,
+        postcodes={str(k): (float(v[0]), float(v[1])) for k, v in meta.get("postcodes", {}).items()},
+    )
+
+
+def write_rain_grid(
+    path: Union[str, Path],
+    r: np.ndarray,
+    durations_min: Sequence[float],
+    return_periods_a: Sequence[float],
+    grid: Dict[str, float],
+    cell_rc: Optional[np.ndarray] = None,
+    postcodes: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> None:
+    """Write a rain grid directory (e.g. after converting the KOSTRA-DWD CSV/GIS exports)."""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / "rain_r.npy", np.asarray(r, dtype=np.float32))
+    meta = {
+        "durations_min": list(map(float, durations_min)),
+        "return_periods_a": list(map(float, return_periods_a)),
+        "grid": grid,
+        "cell_rc": None if cell_rc is None else np.asarray(cell_rc).tolist(),
+        "postcodes": postcodes or {},
+    }
+    with open(path / "rain_meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def rain_grid_available(path: Union[str, Path] = RAIN_GRID_PATH) -> bool:
+    path = Path(path)
+    return (path / "rain_r.npy").exists() and (path / "rain_meta.json").exists()
+
+
+@lru_cache(maxsize=1)
+def default_rain_grid() -> RainGrid:
+    if not rain_grid_available():
+        raise FileNotFoundError(f"No rain grid dataset found in {RAIN_GRID_PATH}")
+    return load_rain_grid()
+
+
+def rain_intensity_l_s_ha(location: Location, duration_min: float = 5.0, return_period_a: float = 5.0,
+                          grid: Optional[RainGrid] = None) -> float:
+    """r(D,T) in L/(s·ha) at a (lat, lon) tuple or a postcode."""
+    grid = grid or default_rain_grid()
+    lat, lon = grid.coords(location)
+    return float(grid.intensity(lat, lon, duration_min, return_period_a))
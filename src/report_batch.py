@@ -0,0 +1,305 @@
+
+from __future__ import annotations
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+# Portfolio reports: python -m src.report_batch projects.csv -o reports/
+#
+# A report is a list of sections (executive summary, one per table, sources page); each starts on a
+# new page, so sections render independently (reporting.render_section) and are concatenated with
+# pypdf, page numbers stamped last. Rendered sections are cached on disk under a hash of their
+# content and of the report layout code: regenerating after an input change re-renders only the
+# sections whose content changed, and sections shared between projects (the sources page) render
+# once. Renders and assembly run in a process pool over a bounded window of reports.
+
+Section = Tuple[str, str, Any]          # (content key, kind, payload)
+
+# project_report tables -> modules of data/sources_matrix.csv whose sources they rest on
+TABLE_MODULES: Dict[str, Tuple[str, ...]] = {
+    "Electrical (LV)": ("Electrical (LV)",),
+    "HVAC": ("HVAC",),
+    "Plumbing / drainage": ("Plumbing/DHW", "Drainage/Rainwater"),
+    "Fire safety screening": ("Fire/Brandschutz",),
+}
+
+
+@lru_cache(maxsize=1)
+def _layout_version() -> bytes:
+    """Report layout fingerprint: cached sections are stale once the layout code changes."""
+    import reportlab
+    from . import reporting
+    return hashlib.sha256(Path(reporting.__file__).read_bytes() + reportlab.Version.encode()).digest()
+
+
+def _frame_digest(df: Any) -> bytes:
+    import pandas as pd
+    h = hashlib.sha256(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    try:
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    except TypeError:           # unhashable cells (lists, dicts): hash the text form instead
+        h.update(df.to_csv(index=False).encode())
+    return h.digest()
+
+
+def section_key(kind: str, payload: Any) -> str:
+    """Content hash of one section: equal keys render to identical pages."""
+    h = hashlib.sha256(_layout_version() + kind.encode())
+    if kind == "table":
+        h.update(str(payload.get("title", "Table")).encode() + b"\0" + _frame_digest(payload["df"]))
+    elif kind == "sources":
+        from .sources import SOURCES
+        h.update(json.dumps([[sid, SOURCES[sid].url, SOURCES[sid].accessed] if sid in SOURCES else [sid]
+                             for sid in payload]).encode())
+    else:
+        h.update(json.dumps(list(payload.items()), default=str).encode())
+    return h.hexdigest()
+
+
+def report_sections(executive: Dict[str, Any], tables: List[Dict[str, Any]], source_ids: List[str]) -> List[Section]:
+    """Sections of one report, in page order. Table dfs must be DataFrames (they are hashed)."""
+    import pandas as pd
+    parts: List[Tuple[str, Any]] = [("executive", dict(executive))]
+    for t in tables:
+        df = t["df"] if isinstance(t["df"], pd.DataFrame) else pd.concat(list(t["df"]), ignore_index=True)
+        parts.append(("table", {"title": t.get("title", "Table"), "df": df}))
+    parts.append(("sources", list(source_ids)))
+    return [(section_key(kind, payload), kind, payload) for kind, payload in parts]
+
+
+class SectionCache:
+    """Rendered sections as <key>.pdf files; safe to share between processes (atomic writes)."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.pdf"
+
+    def __contains__(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def manifest(self) -> Dict[str, str]:
+        """Report file -> key of the section list it was last assembled from."""
+        try:
+            return json.loads((self.directory / "reports.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, manifest: Dict[str, str]) -> None:
+        tmp = self.directory / f"reports.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=0, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.directory / "reports.json")
+
+    def put(self, key: str, data: bytes) -> Path:
+        path = self.path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return path
+
+
+def render_to_cache(directory: Path, key: str, kind: str, payload: Any) -> str:
+    """Worker task: render one section into the cache (no-op if another task got there first)."""
+    from .reporting import render_section
+    cache = SectionCache(directory)
+    if key not in cache:
+        cache.put(key, render_section(kind, payload))
+    return key
+
+
+def assemble_pdf(filename: Path, parts: List[Path]) -> int:
+    """Concatenate section PDFs into one report and stamp the page footers. Returns the page count."""
+    import io
+    from pypdf import PdfReader, PdfWriter
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from .reporting import draw_footer
+
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(PdfReader(str(part)))
+    n = len(writer.pages)
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    for page in range(1, n + 1):
+        draw_footer(c, page)
+        c.showPage()
+    c.save()
+    for page, stamp in zip(writer.pages, PdfReader(buf).pages):
+        page.merge_page(stamp)
+    writer.add_metadata({"/Title": "MEP Pre-sizing — Germany"})
+    with open(filename, "wb") as f:
+        writer.write(f)
+    return n
+
+
+def _safe_name(name: Any) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(name)).strip("._") or "report"
+
+
+def build_reports(reports: Iterable[Dict[str, Any]], out_dir: Path, cache_dir: Optional[Path] = None,
+                  workers: Optional[int] = None, window: int = 4) -> Dict[str, Any]:
+    """Write <name>.pdf for each report dict (name, executive, tables, source_ids). Returns run statistics.
+
+    Only sections missing from the cache (default: out_dir/.sections) are rendered, and reports whose
+    sections are all unchanged since the last build are not reassembled. workers=1 runs in-process,
+    default is one worker per CPU. At most workers * window reports are held at once.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cache = SectionCache(cache_dir if cache_dir is not None else out_dir / ".sections")
+    workers = int(workers or os.cpu_count() or 1)
+    t0 = time.perf_counter()
+    stats = {"reports": 0, "unchanged": 0, "pages": 0, "sections": 0, "rendered": 0, "reused": 0}
+    manifest = cache.manifest()
+
+    def run(group: List[Tuple[Path, List[Section]]], submit) -> None:
+        stats["reports"] += len(group)
+        changed = []
+        for path, sections in group:
+            key = hashlib.sha256("".join(s[0] for s in sections).encode()).hexdigest()
+            if manifest.get(str(path.resolve())) == key and path.exists():
+                stats["unchanged"] += 1
+            else:
+                manifest[str(path.resolve())] = key
+                changed.append((path, sections))
+        group = changed
+        todo: Dict[str, Section] = {}
+        for _, sections in group:
+            for key, kind, payload in sections:
+                stats["sections"] += 1
+                if key in todo or key in cache:
+                    stats["reused"] += 1
+                else:
+                    todo[key] = (key, kind, payload)
+        stats["rendered"] += len(todo)
+        for _ in submit(render_to_cache, [(cache.directory, *s) for s in todo.values()]):
+            pass
+        for pages in submit(assemble_pdf, [(path, [cache.path(s[0]) for s in sections]) for path, sections in group]):
+            stats["pages"] += pages
+
+    def groups(size: int) -> Iterator[List[Tuple[Path, List[Section]]]]:
+        group = []
+        for i, r in enumerate(reports):
+            path = out_dir / f"{_safe_name(r.get('name', i))}.pdf"
+            group.append((path, report_sections(r.get("executive", {}), r.get("tables", []), r.get("source_ids", []))))
+            if len(group) >= size:
+                yield group
+                group = []
+        if group:
+            yield group
+
+    if workers == 1:
+        inline = lambda fn, calls: [fn(*args) for args in calls]
+        for group in groups(window):
+            run(group, inline)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            def submit(fn, calls) -> List[Any]:
+                futures: List[Future] = [pool.submit(fn, *args) for args in calls]
+                wait(futures)
+                return [f.result() for f in futures]
+            for group in groups(workers * window):
+                run(group, submit)
+
+    cache.save_manifest(manifest)
+    stats["seconds"] = time.perf_counter() - t0
+    return stats
+
+
+@lru_cache(maxsize=None)
+def table_source_ids(titles: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Source IDs of the disciplines reported (TABLE_MODULES), in sources-matrix order."""
+    from .data_catalog import sources_matrix
+    m = sources_matrix()
+    modules = [mod for t in titles for mod in TABLE_MODULES.get(t, ())]
+    return tuple(dict.fromkeys(sid for mod in modules for sid in m.loc[m["Module"] == mod, "ID"].tolist()))
+
+
+def project_report(result: Dict[str, Any], source_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Report for one batch.presize_records result: summary plus one table per discipline.
+
+    The sources page lists `source_ids`, by default the sources of the reported disciplines.
+    """
+    import pandas as pd
+
+    def table(title: str, rows: List[Tuple[str, str, Any]]) -> Dict[str, Any]:
+        return {"title": title, "df": pd.DataFrame(rows, columns=["Quantity", "Unit", "Value"])}
+
+    r = result
+    report = {
+        "name": r["id"],
+        "executive": {
+            "Project": r["id"], "City": r.get("city", ""), "Use": r.get("use_type", ""),
+            "GFA above / below ground [m²]": f"{r.get('area_above_m2', 0):.0f} / {r.get('area_below_m2', 0):.0f}",
+            "Floors above / below": f"{r.get('floors_above', 0)} / {r.get('floors_below', 0)}",
+            "Persons (estimate)": r.get("persons", ""),
+            "Note": "Pre-sizing (not a design project). See README for scope and limitations.",
+        },
+        "tables": [
+            table("Electrical (LV)", [
+                ("Connected load", "kW", r.get("elec_connected_kw")), ("Demand load", "kW", r.get("elec_demand_kw")),
+                ("Main feeder design current", "A", r.get("feeder_current_A")),
+                ("Main feeder section", "mm²", r.get("feeder_section_mm2")),
+            ]),
+            table("HVAC", [
+                ("Heating capacity", "kW", r.get("hvac_heating_kw")), ("Cooling capacity", "kW", r.get("hvac_cooling_kw")),
+                ("Outdoor air", "m³/h", r.get("ventilation_m3h")), ("HVAC electrical", "kW", r.get("hvac_electric_kw")),
+                ("Technical rooms", "m²", r.get("tech_rooms_m2")), ("Shafts", "m²", r.get("shafts_m2")),
+            ]),
+            table("Plumbing / drainage", [
+                ("Peak water flow", "l/s", r.get("water_peak_lps")), ("Water main", "mm", r.get("water_main_d_mm")),
+                ("DHW energy", "kWh/day", r.get("dhw_kwh_day")), ("Roof area", "m²", r.get("roof_area_m2")),
+                ("Rainwater flow", "l/s", r.get("rain_flow_lps")), ("Rain collector", "DN", r.get("rain_collector_DN")),
+            ]),
+            table("Fire safety screening", [
+                ("Building class", "", r.get("fire_building_class")), ("Sonderbau", "", r.get("fire_sonderbau")),
+                ("Sprinkler", "", r.get("fire_sprinkler")), ("Fire alarm", "", r.get("fire_alarm")),
+                ("Reasons", "", "; ".join(r.get("fire_reasons") or [])),
+            ]),
+        ],
+    }
+    report["source_ids"] = list(source_ids if source_ids is not None
+                                else table_source_ids(tuple(t["title"] for t in report["tables"])))
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .batch import _chunks, presize_chunk, read_projects
+    ap = argparse.ArgumentParser(prog="python -m src.report_batch", description="PDF pre-sizing reports for a project portfolio.")
+    ap.add_argument("input", type=Path, help="CSV, JSON or JSON lines with the sidebar fields (and an optional id)")
+    ap.add_argument("-o", "--output", type=Path, required=True, help="directory for <id>.pdf reports")
+    ap.add_argument("--cache", type=Path, default=None, help="section cache directory (default: <output>/.sections)")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = ap.parse_args(argv)
+
+    failed: List[str] = []
+
+    def reports() -> Iterator[Dict[str, Any]]:
+        for chunk in _chunks(read_projects(args.input), 64):
+            for res in presize_chunk(chunk):
+                if res.get("error"):
+                    failed.append(f"{res['id']}: {res['error']}")
+                else:
+                    yield project_report(res)
+
+    stats = build_reports(reports(), args.output, args.cache, args.workers)
+    for msg in failed:
+        print(f"skipped {msg}", file=sys.stderr)
+    print(f"{stats['reports']} reports ({stats['unchanged']} unchanged), {stats['pages']} pages written in {stats['seconds']:.1f} s; sections: "
+          f"{stats['rendered']} rendered, {stats['reused']} reused", file=sys.stderr)
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
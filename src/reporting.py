@@ -1,53 +1,269 @@
 
 from __future__ import annotations
-from typing import Dict, Any, List
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import mm
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle
-import pandas as pd
-from .sources import SOURCES
-
-def _draw_title(c: canvas.Canvas, title: str, y: float) -> float:
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(20*mm, y, title)
-    return y - 10*mm
-
-def _draw_paragraph(c: canvas.Canvas, text: str, y: float, size: int=9, leading: int=11) -> float:
-    c.setFont("Helvetica", size)
-    max_width = 170*mm
-    words = text.split()
-    line = ""
-    for w in words:
-        trial = (line + " " + w).strip()
-        if c.stringWidth(trial, "Helvetica", size) <= max_width:
-            line = trial
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+import math
+from .profiling import profile_functions
+
+# PDF report on platypus flowables. Tables are cut into page-sized chunks as they are converted
+# (fixed row height, one-line cells), each chunk carrying the header row, and the story is fed to
+# the document lazily. Memory stays bounded by one page of converted rows whatever the table
+# length; build time grows linearly with the row count.
+#
+# reportlab is imported inside the functions: it is only needed once a PDF is actually built.
+if TYPE_CHECKING:
+    import pandas as pd
+    from reportlab.platypus import Flowable, Table
+
+FONT_SIZE = 7.0
+ROW_HEIGHT = 10.0          # pt, one line of FONT_SIZE text plus padding
+MARGIN_MM = 15.0
+MIN_COL_MM = 12.0
+CHUNK_ROWS = 2_000         # rows converted to text at once when a table is given as one frame
+
+TableSource = Union["pd.DataFrame", Iterable["pd.DataFrame"]]
+
+
+@lru_cache(maxsize=1)
+def _styles() -> Dict[str, Any]:
+    """Paragraph and table styles, built once per process."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+    base = getSampleStyleSheet()
+    return {
+        "title": base["Title"],
+        "heading": base["Heading2"],
+        "body": base["BodyText"],
+        "small": base["Code"].clone("small", fontName="Helvetica", fontSize=8, leading=10),
+        "table": TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ("GRID", (0, 0), (-1, -1), 0.3, colors.grey),
+            ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", FONT_SIZE),
+            ("FONT", (0, 1), (-1, -1), "Helvetica", FONT_SIZE),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("TOPPADDING", (0, 0), (-1, -1), 1),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
+            ("LEFTPADDING", (0, 0), (-1, -1), 2),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 2),
+        ]),
+    }
+
+
+def _fmt(v: Any) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, float):
+        return "" if math.isnan(v) else format(v, ".6g")
+    return str(v)
+
+
+def _frames(source: TableSource, chunk_rows: int) -> Iterator["pd.DataFrame"]:
+    if hasattr(source, "columns") and hasattr(source, "iloc"):
+        for i in range(0, max(1, len(source)), chunk_rows):
+            yield source.iloc[i:i + chunk_rows]
+    else:
+        yield from source
+
+
+def _column_widths(header: Sequence[str], sample: List[List[str]], avail_w: float) -> List[float]:
+    from reportlab.lib.units import mm
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    widths = []
+    for j, h in enumerate(header):
+        w = stringWidth(h, "Helvetica-Bold", FONT_SIZE)
+        for row in sample:
+            w = max(w, stringWidth(row[j], "Helvetica", FONT_SIZE))
+        widths.append(max(MIN_COL_MM * mm, w + 6))
+    if sum(widths) > avail_w:
+        # Cap the widest columns at a common width (narrow columns keep theirs), then scale only
+        # if the narrow columns alone still do not fit
+        rest, cap = avail_w, 0.0
+        for i, w in enumerate(sorted(widths)):
+            cap = rest / (len(widths) - i)
+            if w > cap:
+                break
+            rest -= w
+        widths = [min(w, max(cap, MIN_COL_MM * mm)) for w in widths]
+    scale = min(1.0, avail_w / sum(widths)) if widths else 1.0
+    return [w * scale for w in widths]
+
+
+def _clip(text: str, width: float, font: str = "Helvetica") -> str:
+    """`text` cut to the longest prefix that fits `width` (pt) with an ellipsis."""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    if stringWidth(text, font, FONT_SIZE) <= width:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if stringWidth(text[:mid] + "…", font, FONT_SIZE) <= width:
+            lo = mid
         else:
-            c.drawString(20*mm, y, line)
-            y -= leading
-            line = w
-    if line:
-        c.drawString(20*mm, y, line)
-        y -= leading
-    return y
-
-def df_to_table(df: pd.DataFrame, max_rows: int = 25) -> Table:
-    df = df.copy()
-    if len(df) > max_rows:
+            hi = mid - 1
+    return text[:lo] + "…"
+
+
+def table_flowables(source: TableSource, avail_w: float, first_h: float, page_h: float,
+                    chunk_rows: int = CHUNK_ROWS) -> Iterator[Flowable]:
+    """Page-sized Table flowables for a frame (or an iterable of frame chunks).
+
+    Every table repeats the header row; the first fills `first_h` (space left under the title),
+    the others a full frame height `page_h`. Cells are single-line and clipped to the column width.
+    """
+    from reportlab.platypus import Table
+    style = _styles()["table"]
+    header: List[str] = []
+    widths: List[float] = []
+    text_w: List[float] = []
+    pending: List[List[str]] = []
+    room = max(1, int(first_h // ROW_HEIGHT) - 1)
+
+    def make(rows: List[List[str]]) -> Table:
+        t = Table([header] + rows, colWidths=widths, rowHeights=ROW_HEIGHT, repeatRows=1, hAlign="LEFT")
+        t.setStyle(style)
+        return t
+
+    for frame in _frames(source, chunk_rows):
+        if not header:
+            header = [str(c) for c in frame.columns]
+        cols = [[_fmt(v) for v in frame[c].tolist()] for c in frame.columns]
+        rows = [list(r) for r in zip(*cols)] if cols else []
+        if not widths:
+            widths = _column_widths(header, rows[:200], avail_w)
+            text_w = [w - 4 for w in widths]       # less left/right padding
+            header = [_clip(h, tw, "Helvetica-Bold") for h, tw in zip(header, text_w)]
+        for r in rows:
+            for j, tw in enumerate(text_w):
+                r[j] = _clip(r[j], tw)
+        pending.extend(rows)
+        while len(pending) >= room:
+            yield make(pending[:room])
+            del pending[:room]
+            room = max(1, int(page_h // ROW_HEIGHT) - 1)
+    if pending or header:
+        yield make(pending)
+
+
+def df_to_table(df: pd.DataFrame, max_rows: int = None) -> Table:
+    """One Table for a small frame (all rows unless `max_rows` is given; header repeats on split)."""
+    if max_rows is not None:
         df = df.head(max_rows)
-    data = [list(df.columns)] + df.astype(str).values.tolist()
-    t = Table(data, hAlign="LEFT", colWidths=None)
-    style = TableStyle([
-        ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
-        ("GRID", (0,0), (-1,-1), 0.3, colors.grey),
-        ("FONT", (0,0), (-1,0), "Helvetica-Bold"),
-        ("FONT", (0,1), (-1,-1), "Helvetica"),
-        ("FONTSIZE", (0,0), (-1,-1), 8),
-        ("VALIGN", (0,0), (-1,-1), "TOP"),
-    ])
-    t.setStyle(style)
-    return t
+    avail_w, _ = _frame_size()
+    h = ROW_HEIGHT * (len(df) + 1)
+    return next(table_flowables(df, avail_w, first_h=h, page_h=h, chunk_rows=max(1, len(df))))
+
+
+class _LazyStory(list):
+    """Story list that refills from a generator as the document consumes it (bounded lookahead)."""
+
+    def __init__(self, items: Iterator[Flowable], lookahead: int = 8):
+        super().__init__()
+        self._items = items
+        self._lookahead = lookahead
+        self._fill()
+
+    def _fill(self) -> None:
+        while len(self) < self._lookahead:
+            try:
+                self.append(next(self._items))
+            except StopIteration:
+                break
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self._fill()
+
+
+def _doc(file: Any) -> Any:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import SimpleDocTemplate
+    return SimpleDocTemplate(file, pagesize=A4, leftMargin=MARGIN_MM * mm, rightMargin=MARGIN_MM * mm,
+                             topMargin=MARGIN_MM * mm, bottomMargin=MARGIN_MM * mm,
+                             title="MEP Pre-sizing — Germany")
+
+
+def _frame_size() -> Tuple[float, float]:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    # Frame padding (6 pt each side) is part of the margins
+    return A4[0] - 2 * MARGIN_MM * mm, A4[1] - 2 * MARGIN_MM * mm - 12
+
+
+def draw_footer(c: Any, page: int) -> None:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    c.saveState()
+    c.setFont("Helvetica", 7)
+    c.drawRightString(A4[0] - MARGIN_MM * mm, 8 * mm, f"Page {page}")
+    c.restoreState()
+
+
+def executive_story(executive: Dict[str, Any]) -> Iterator[Flowable]:
+    from reportlab.platypus import Paragraph
+    from xml.sax.saxutils import escape
+    st = _styles()
+    yield Paragraph("MEP Pre-sizing — Germany (Streamlit)", st["title"])
+    yield Paragraph("Executive summary:", st["heading"])
+    for k, v in executive.items():
+        yield Paragraph(escape(f"- {k}: {v}"), st["body"])
+
+
+def table_story(title: str, df: TableSource) -> Iterator[Flowable]:
+    from reportlab.platypus import Paragraph, Spacer
+    from xml.sax.saxutils import escape
+    st = _styles()
+    avail_w, frame_h = _frame_size()
+    head = Paragraph(escape(str(title)), st["heading"])
+    _, title_h = head.wrap(avail_w, frame_h)
+    yield head
+    yield Spacer(1, 2)
+    title_h += 2 + st["heading"].spaceBefore + st["heading"].spaceAfter
+    yield from table_flowables(df, avail_w, frame_h - title_h - 4, frame_h - 4)
+
+
+def sources_story(source_ids: List[str]) -> Iterator[Flowable]:
+    from reportlab.platypus import Paragraph
+    from xml.sax.saxutils import escape
+    from .sources import SOURCES
+    st = _styles()
+    yield Paragraph("Sources used (ID / link / access date)", st["heading"])
+    for sid in source_ids:
+        s = SOURCES.get(sid)
+        if s:
+            yield Paragraph(escape(f"{sid} — {s.url} — {s.accessed}"), st["small"])
+
+
+def _story(executive: Dict[str, Any], tables: List[Dict[str, Any]], source_ids: List[str]) -> Iterator[Flowable]:
+    from reportlab.platypus import PageBreak
+    yield from executive_story(executive)
+    for tinfo in tables:
+        yield PageBreak()
+        yield from table_story(tinfo.get("title", "Table"), tinfo["df"])
+    yield PageBreak()
+    yield from sources_story(source_ids)
+
+
+def render_section(kind: str, payload: Any) -> bytes:
+    """One report section ("executive", "table" with {"title", "df"}, or "sources") as PDF bytes.
+
+    Every section starts on a new page, so rendering sections separately and concatenating them
+    paginates exactly like build_pdf. No footer: page numbers depend on the assembled document.
+    """
+    import io
+    if kind == "executive":
+        story = executive_story(payload)
+    elif kind == "table":
+        story = table_story(payload.get("title", "Table"), payload["df"])
+    elif kind == "sources":
+        story = sources_story(payload)
+    else:
+        raise ValueError(f"unknown report section {kind!r}")
+    buf = io.BytesIO()
+    _doc(buf).build(_LazyStory(story))
+    return buf.getvalue()
+
 
 def build_pdf(
     filename: str,
@@ -55,42 +271,10 @@ def build_pdf(
     tables: List[Dict[str, Any]],
     source_ids: List[str],
 ):
-    c = canvas.Canvas(filename, pagesize=A4)
-    width, height = A4
-    y = height - 20*mm
-    y = _draw_title(c, "MEP Pre-sizing — Germany (Streamlit)", y)
-
-    y = _draw_paragraph(c, f"Executive summary:", y, size=11)
-    for k,v in executive.items():
-        y = _draw_paragraph(c, f"- {k}: {v}", y)
+    """Write the report. Each table dict has a title and a df (a DataFrame or an iterable of
+    DataFrame chunks, e.g. pd.read_csv(..., chunksize=...)); tables are never truncated."""
+    footer = lambda c, d: draw_footer(c, d.page)
+    _doc(filename).build(_LazyStory(_story(executive, tables, source_ids)), onFirstPage=footer, onLaterPages=footer)
 
-    c.showPage()
 
-    for tinfo in tables:
-        df = tinfo["df"]
-        title = tinfo.get("title","Table")
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(20*mm, height-20*mm, title)
-        tbl = df_to_table(df)
-        w,h = tbl.wrapOn(c, width-40*mm, height-40*mm)
-        tbl.drawOn(c, 20*mm, height-30*mm-h)
-        c.showPage()
-
-    # Sources
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(20*mm, height-20*mm, "Sources used (ID / link / access date)")
-    y = height-30*mm
-    c.setFont("Helvetica", 8)
-    for sid in source_ids:
-        s = SOURCES.get(sid)
-        if not s:
-            continue
-        line = f"{sid} — {s.url} — {s.accessed}"
-        if y < 20*mm:
-            c.showPage()
-            y = height-20*mm
-            c.setFont("Helvetica", 8)
-        c.drawString(20*mm, y, line[:140])
-        y -= 4*mm
-
-    c.save()
+profile_functions(globals())
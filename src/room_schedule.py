@@ -0,0 +1,517 @@
+
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import argparse
+import csv
+import hashlib
+import io
+import json
+import re
+import sys
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+
+from .data_catalog import use_profiles
+from .project_presizing import (
+    estimate_electrical_loads, estimate_hvac_capacities, estimate_hvac_electrical_kw, estimate_ventilation_flow_m3h,
+)
+from .profiling import profile_functions
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Room-schedule import: python -m src.room_schedule rooms.csv (or .xlsx)
+#
+# Rows are streamed (csv module / XLSX sheet XML via iterparse) and never held as a whole. Each row
+# is hashed on its raw cells; rows whose hash is already known reuse their stored contribution,
+# only new or edited rows are collected into chunks and validated in bulk (pandas, vectorized).
+# Valid rows are added to a roll-up per (storey, zone) with use-type subtotals; rows that vanished
+# from the file are subtracted again. Areas and persons are kept in hundredths (integers), so
+# adding and removing rows never drifts.
+#
+# The roll-up grows with the number of storeys / zones, not rows. The hash index needs one small
+# entry per distinct row (~200 bytes), which is what makes re-importing an edited file cheap.
+#
+# Totals feed the sidebar project (RoomSchedule.project_inputs) and the estimate_* functions per
+# zone (RoomSchedule.zone_estimates).
+
+CHUNK_ROWS = 5000
+MAX_ERRORS = 200            # error rows listed (all are counted)
+
+# Accepted column headers (normalized: lower case, units in brackets dropped, separators -> "_")
+COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "room": ("room", "room_id", "room_no", "room_number", "raum", "raumnummer", "raum_nr", "id"),
+    "storey": ("storey", "story", "level", "floor", "geschoss", "ebene"),
+    "zone": ("zone", "wing", "section", "bauteil", "nutzungseinheit"),
+    "use": ("use", "use_type", "usage", "room_type", "function", "nutzung", "raumart"),
+    "area_m2": ("area_m2", "area", "net_area", "nfa", "ngf", "nrf", "flaeche", "fläche"),
+    "persons": ("persons", "occupants", "people", "personen"),
+}
+REQUIRED = ("storey", "area_m2")
+
+Source = Union[str, Path, IO[bytes]]
+# (storey, zone, use, area in 0.01 m², persons in 0.01, error message or None)
+Contribution = Tuple[str, str, str, int, int, Optional[str]]
+
+
+def _norm_header(h: str) -> str:
+    h = re.sub(r"[\(\[].*?[\)\]]", "", str(h)).strip().lower()
+    return re.sub(r"[\s\-\./]+", "_", h).strip("_")
+
+
+def map_columns(header: Sequence[str]) -> Dict[str, int]:
+    """Field -> column index for a header row. ValueError if a required column is missing."""
+    normalized = [_norm_header(h) for h in header]
+    out: Dict[str, int] = {}
+    for fld, aliases in COLUMNS.items():
+        for a in aliases:
+            if a in normalized:
+                out[fld] = normalized.index(a)
+                break
+    missing = [f for f in REQUIRED if f not in out]
+    if missing:
+        raise ValueError(f"Room schedule is missing column(s): {', '.join(missing)} "
+                         f"(accepted headers: {', '.join(a for f in missing for a in COLUMNS[f][:4])}, ...)")
+    return out
+
+
+_BELOW = ("ug", "kg", "b", "basement", "u", "sub")
+_GROUND = ("eg", "gf", "g", "ground", "erdgeschoss")
+
+
+def storey_level(label: str) -> Optional[int]:
+    """Storey number from labels like "3", "-1", "EG", "1.OG", "OG2", "UG1", "B2", "Level 4" (None if unknown)."""
+    s = str(label).strip().lower()
+    try:
+        return int(float(s.replace(",", ".")))
+    except ValueError:
+        pass
+    m = re.search(r"\d+", s)
+    n = int(m.group()) if m else None
+    word = re.sub(r"[\d\.\s_\-]+", "", s)
+    if word in _GROUND:
+        return 0
+    if word in _BELOW:
+        return -(n or 1)
+    if word in ("og", "l", "level", "f", "floor", "storey", "story", "etage", "stock") and n is not None:
+        return n
+    return None
+
+
+# ----------------------------------------------------------------------------------------------
+# Streaming readers: header row + iterator over rows of cell strings
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+
+def _col_index(ref: str) -> int:
+    n = 0
+    for ch in ref:
+        if ch.isalpha():
+            n = n * 26 + (ord(ch.upper()) - 64)
+        else:
+            break
+    return n - 1
+
+
+def _xlsx_rows(z: zipfile.ZipFile) -> Iterator[List[str]]:
+    """Rows of the first worksheet as strings (shared / inline strings resolved), streamed."""
+    shared: List[str] = []
+    if "xl/sharedStrings.xml" in z.namelist():
+        with z.open("xl/sharedStrings.xml") as f:
+            for _, el in ET.iterparse(f):
+                if el.tag == f"{_NS}si":
+                    shared.append("".join(t.text or "" for t in el.iter(f"{_NS}t")))
+                    el.clear()
+    sheet = "xl/worksheets/sheet1.xml"
+    try:
+        wb = ET.fromstring(z.read("xl/workbook.xml"))
+        rid = next(wb.iter(f"{_NS}sheet")).get(f"{_REL_NS}id")
+        rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+        target = next(r.get("Target") for r in rels if r.get("Id") == rid)
+        sheet = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+    except (KeyError, StopIteration):
+        pass
+    with z.open(sheet) as f:
+        for _, el in ET.iterparse(f):
+            if el.tag != f"{_NS}row":
+                continue
+            row: List[str] = []
+            for c in el.iter(f"{_NS}c"):
+                i = _col_index(c.get("r", "")) if c.get("r") else len(row)
+                t = c.get("t")
+                if t == "inlineStr":
+                    value = "".join(x.text or "" for x in c.iter(f"{_NS}t"))
+                else:
+                    v = c.find(f"{_NS}v")
+                    value = "" if v is None or v.text is None else v.text
+                    if t == "s" and value:
+                        value = shared[int(value)]
+                    elif t == "b":
+                        value = "TRUE" if value == "1" else "FALSE"
+                if i >= len(row):
+                    row.extend([""] * (i - len(row) + 1))
+                row[i] = value
+            el.clear()
+            yield row
+
+
+def read_rows(source: Source, name: Optional[str] = None) -> Tuple[List[str], Iterator[List[str]]]:
+    """(header, remaining rows) of a CSV or XLSX room list; `source` is a path or a binary file."""
+    name = str(name or getattr(source, "name", source))
+    if name.lower().endswith((".xlsx", ".xlsm")):
+        rows = _xlsx_rows(zipfile.ZipFile(source))
+    else:
+        f = open(source, "rb") if isinstance(source, (str, Path)) else source
+        text = io.TextIOWrapper(f, encoding="utf-8-sig", errors="replace", newline="")
+        first = text.readline()
+        delimiter = ";" if first.count(";") > first.count(",") else "\t" if "\t" in first else ","
+        rows = csv.reader(_chain_line(first, text), delimiter=delimiter)
+    for header in rows:
+        if any(h.strip() for h in header):
+            return header, rows
+    raise ValueError("Room schedule is empty")
+
+
+def _chain_line(first: str, rest: IO[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+# ----------------------------------------------------------------------------------------------
+# Bulk validation of changed rows
+
+def _numbers(s: "pd.Series") -> "pd.Series":
+    """Parse German and English number formats: "1.234,50", "1.234", "120,5", "1,234.50", "120.5".
+
+    With both separators the later one is the decimal mark; a lone comma is a decimal comma; lone
+    dots grouping whole thousands ("1.234", "12.500.000") are thousands separators.
+    """
+    import pandas as pd
+    s = s.str.strip()
+    comma = s.str.contains(",", regex=False, na=False)
+    english = s.str.contains(r",.*\.", na=False)          # a dot after a comma: "1,234.50"
+    german = (comma & ~english) | s.str.fullmatch(r"[+-]?\d{1,3}(?:\.\d{3})+", na=False)
+    s = s.where(~german, s.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    s = s.where(~english, s.str.replace(",", "", regex=False))
+    return pd.to_numeric(s, errors="coerce")
+
+
+def validate_rows(rows: Sequence[Sequence[str]], cols: Dict[str, int]) -> List[Contribution]:
+    """Contributions of raw rows, validated column-wise in one pass over the chunk."""
+    import numpy as np
+    import pandas as pd
+    fields = list(cols)
+    width = max(cols.values()) + 1
+    df = pd.DataFrame([[r[cols[f]] if cols[f] < len(r) else "" for f in fields]
+                       for r in (list(r) + [""] * (width - len(r)) for r in rows)], columns=fields, dtype=str)
+    empty = pd.Series("", index=df.index)
+    storey = df["storey"].str.strip()
+    zone = df["zone"].str.strip().replace("", "—") if "zone" in df else empty.replace("", "—")
+    use_raw = df["use"].str.strip() if "use" in df else empty
+    area = _numbers(df["area_m2"])
+    persons_raw = df["persons"].str.strip() if "persons" in df else empty
+    persons = _numbers(persons_raw)
+
+    profiles = use_profiles()
+    canonical = {k.lower(): k for k in profiles}
+    use = use_raw.str.lower().map(canonical).fillna(use_raw)
+    density = use.map({k: float(p.get("occupancy_m2_per_person", 0) or 0) for k, p in profiles.items()})
+    estimated = (area / density.where(density > 0)).fillna(0.0)
+    persons = persons.where(persons_raw != "", estimated)
+
+    error = np.select(
+        [storey == "", area.isna(), area <= 0, persons.isna(), persons < 0],
+        ["storey missing", "area is not a number", "area must be > 0", "persons is not a number",
+         "persons must be >= 0"],
+        default="")
+    area_c = (area.fillna(0) * 100).round().astype("int64")
+    persons_c = (persons.fillna(0) * 100).round().astype("int64")
+    return [(s, z, u, int(a), int(p), e or None)
+            for s, z, u, a, p, e in zip(storey.tolist(), zone.tolist(), use.tolist(), area_c.tolist(),
+                                        persons_c.tolist(), error.tolist())]
+
+
+# ----------------------------------------------------------------------------------------------
+# Incremental roll-up
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    unchanged: int = 0
+    validated: int = 0          # new / edited rows parsed and validated
+    reused: int = 0             # extra copies of an already known row
+    removed: int = 0
+    invalid: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    errors: List[Tuple[int, str, str]] = field(default_factory=list)     # (line, room, message)
+
+
+def _row_hash(cells: Sequence[str]) -> bytes:
+    return hashlib.blake2b("\x1f".join(cells).encode("utf-8", "surrogatepass"), digest_size=12).digest()
+
+
+class RoomSchedule:
+    """Roll-up of a room list per storey and zone; re-importing an edited list reprocesses changed rows only."""
+
+    def __init__(self):
+        self.index: Dict[bytes, List[Any]] = {}                      # row hash -> [count, contribution]
+        self.groups: Dict[Tuple[str, str], Dict[str, List[int]]] = {}  # (storey, zone) -> use -> [rooms, area, persons]
+        self.invalid = 0
+        self.columns: Dict[str, int] = {}
+        self.source: Optional[str] = None
+
+    # -- updates --------------------------------------------------------------------------------
+
+    def _apply(self, c: Contribution, sign: int) -> None:
+        storey, zone, use, area, persons, error = c
+        if error:
+            self.invalid += sign
+            return
+        uses = self.groups.setdefault((storey, zone), {})
+        t = uses.setdefault(use, [0, 0, 0])
+        t[0] += sign
+        t[1] += sign * area
+        t[2] += sign * persons
+        if t[0] == 0:
+            del uses[use]
+            if not uses:
+                del self.groups[(storey, zone)]
+
+    def import_rows(self, header: Sequence[str], rows: Iterator[Sequence[str]],
+                    chunk_size: int = CHUNK_ROWS) -> ImportStats:
+        stats = ImportStats()
+        t0 = time.perf_counter()
+        cols = map_columns(header)
+        if cols != self.columns:         # other layout: stored contributions do not apply
+            self.__init__()
+            self.columns = cols
+        room_col = cols.get("room")
+        seen: Dict[bytes, int] = {}
+        pending: List[Tuple[int, bytes, Sequence[str]]] = []
+
+        def note_error(line: int, cells: Sequence[str], message: str) -> None:
+            stats.invalid += 1
+            if len(stats.errors) < MAX_ERRORS:
+                room = cells[room_col] if room_col is not None and room_col < len(cells) else ""
+                stats.errors.append((line, room, message))
+
+        def flush() -> None:
+            stats.chunks += 1
+            for (line, h, cells), c in zip(pending, validate_rows([p[2] for p in pending], cols)):
+                entry = self.index.get(h)
+                if entry is None:
+                    self.index[h] = [1, c]
+                else:
+                    entry[0] += 1
+                self._apply(c, +1)
+                if c[5]:
+                    note_error(line, cells, c[5])
+            stats.validated += len(pending)
+            pending.clear()
+
+        for line, cells in enumerate(rows, start=2):
+            if not any(str(x).strip() for x in cells):
+                continue
+            stats.rows += 1
+            h = _row_hash(cells)
+            n = seen[h] = seen.get(h, 0) + 1
+            entry = self.index.get(h)
+            if entry is not None:
+                if n > entry[0]:           # one more copy of a known row: same contribution
+                    entry[0] += 1
+                    self._apply(entry[1], +1)
+                    stats.reused += 1
+                else:
+                    stats.unchanged += 1
+                if entry[1][5]:
+                    note_error(line, cells, entry[1][5])
+                continue
+            pending.append((line, h, cells))
+            if len(pending) >= chunk_size:
+                flush()
+        if pending:
+            flush()
+
+        for h, entry in list(self.index.items()):
+            gone = entry[0] - seen.get(h, 0)
+            for _ in range(gone):
+                self._apply(entry[1], -1)
+            stats.removed += max(gone, 0)
+            if gone >= entry[0]:
+                del self.index[h]
+            elif gone > 0:
+                entry[0] -= gone
+        stats.seconds = time.perf_counter() - t0
+        return stats
+
+    def import_file(self, source: Source, name: Optional[str] = None, chunk_size: int = CHUNK_ROWS) -> ImportStats:
+        """Stream a CSV / XLSX room list into the roll-up (incrementally if it was imported before)."""
+        header, rows = read_rows(source, name)
+        stats = self.import_rows(header, rows, chunk_size=chunk_size)
+        self.source = str(name or getattr(source, "name", source))
+        return stats
+
+    # -- results --------------------------------------------------------------------------------
+
+    @property
+    def rooms(self) -> int:
+        return sum(t[0] for uses in self.groups.values() for t in uses.values())
+
+    def _levels(self) -> Dict[str, Optional[int]]:
+        return {storey: storey_level(storey) for storey, _ in self.groups}
+
+    def zones(self) -> "pd.DataFrame":
+        """One row per (storey, zone): rooms, area, persons and the main use by area."""
+        import pandas as pd
+        levels = self._levels()
+        rows = []
+        for (storey, zone), uses in self.groups.items():
+            rooms, area, persons = (sum(t[i] for t in uses.values()) for i in range(3))
+            rows.append({"storey": storey, "level": levels[storey], "zone": zone, "rooms": rooms,
+                         "area_m2": area / 100.0, "persons": persons / 100.0,
+                         "main_use": max(uses, key=lambda u: uses[u][1])})
+        df = pd.DataFrame(rows, columns=["storey", "level", "zone", "rooms", "area_m2", "persons", "main_use"])
+        df["level"] = df["level"].astype("Int64")
+        return df.sort_values(["level", "storey", "zone"], na_position="last", ignore_index=True)
+
+    def storeys(self) -> "pd.DataFrame":
+        z = self.zones()
+        out = z.groupby(["storey"], sort=False, dropna=False).agg(
+            level=("level", "first"), zones=("zone", "size"), rooms=("rooms", "sum"),
+            area_m2=("area_m2", "sum"), persons=("persons", "sum")).reset_index()
+        return out.sort_values(["level", "storey"], na_position="last", ignore_index=True)
+
+    def uses(self) -> "pd.DataFrame":
+        import pandas as pd
+        totals: Dict[str, List[int]] = {}
+        for uses in self.groups.values():
+            for use, t in uses.items():
+                acc = totals.setdefault(use, [0, 0, 0])
+                for i in range(3):
+                    acc[i] += t[i]
+        rows = [{"use": u, "known_profile": u in use_profiles(), "rooms": t[0], "area_m2": t[1] / 100.0,
+                 "persons": t[2] / 100.0} for u, t in totals.items()]
+        df = pd.DataFrame(rows, columns=["use", "known_profile", "rooms", "area_m2", "persons"])
+        return df.sort_values("area_m2", ascending=False, ignore_index=True)
+
+    def project_inputs(self, default_use: str = "Office") -> Dict[str, Any]:
+        """Sidebar project inputs (project_model.INPUTS keys) from the roll-up totals.
+
+        Storeys with a negative level count as below ground; unrecognized storey labels as above.
+        The project use is the profiled use with the largest area above ground.
+        """
+        levels = self._levels()
+        above = below = persons = 0
+        floors_above, floors_below = set(), set()
+        use_area: Dict[str, int] = {}
+        profiles = use_profiles()
+        for (storey, _), uses in self.groups.items():
+            lvl = levels[storey]
+            for use, (_, area, p) in uses.items():
+                persons += p
+                if lvl is not None and lvl < 0:
+                    below += area
+                else:
+                    above += area
+                    if use in profiles:
+                        use_area[use] = use_area.get(use, 0) + area
+            (floors_below if lvl is not None and lvl < 0 else floors_above).add(storey)
+        return {
+            "use_type": max(use_area, key=use_area.get) if use_area else default_use,
+            "area_above_m2": round(above / 100.0, 2),
+            "area_below_m2": round(below / 100.0, 2),
+            "floors_above": max(1, len(floors_above)),
+            "floors_below": len(floors_below),
+            "auto_occupancy": False,
+            "persons_manual": int(round(persons / 100.0)),
+        }
+
+    def zone_estimates(self, vent_cat: str = "Cat II", design_temp_C: float = -10.0, design_summer_C: float = 32.0,
+                       default_use: str = "Office") -> "pd.DataFrame":
+        """estimate_* results per zone (main profiled use of the zone, else `default_use`)."""
+        profiles = use_profiles()
+        z = self.zones()
+        rows = []
+        for r in z.itertuples(index=False):
+            uses = self.groups[(r.storey, r.zone)]
+            known = [u for u in uses if u in profiles]
+            profile = profiles[max(known, key=lambda u: uses[u][1]) if known else default_use]
+            persons = int(round(r.persons))
+            vent = estimate_ventilation_flow_m3h(r.area_m2, persons, vent_cat)
+            hvac = estimate_hvac_capacities(r.area_m2, profile, design_temp_C=design_temp_C,
+                                            design_summer_C=design_summer_C, ventilation=vent)
+            hvac_kw, _ = estimate_hvac_electrical_kw(r.area_m2, profile, design_summer_C, cooling_kw=hvac["cooling_kw"])
+            rows.append({"heating_kw": hvac["heating_kw"], "cooling_kw": hvac["cooling_kw"], "outdoor_air_m3h": vent["q_m3h"],
+                         "electrical_kw": float(sum(estimate_electrical_loads(r.area_m2, profile, hvac_kw=hvac_kw).values()))})
+        import pandas as pd
+        est = pd.DataFrame(rows, columns=["heating_kw", "cooling_kw", "outdoor_air_m3h", "electrical_kw"])
+        return pd.concat([z[["storey", "zone", "area_m2", "persons", "main_use"]], est], axis=1)
+
+    # -- persistence (CLI re-imports) --------------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        data = {"columns": self.columns, "source": self.source,
+                "index": {h.hex(): [e[0], *e[1]] for h, e in self.index.items()}}
+        Path(path).write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "RoomSchedule":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        s = cls()
+        s.columns, s.source = data["columns"], data.get("source")
+        for h, (count, *c) in data["index"].items():
+            c = tuple(c)
+            s.index[bytes.fromhex(h)] = [count, c]
+            for _ in range(count):
+                s._apply(c, +1)
+        return s
+
+
+def _synthetic_rows(n: int, seed: int = 0) -> Iterator[List[str]]:
+    """Room rows for tests / benchmarks: storeys UG1..OG9, zones A-D, mixed uses."""
+    import random
+    rng = random.Random(seed)
+    storeys = ["UG1", "EG"] + [f"OG{i}" for i in range(1, 10)]
+    uses = ["Office", "Office", "Office", "Retail", "Corridor", "WC", "Technical"]
+    for i in range(n):
+        st = storeys[i % len(storeys)]
+        use = "Parking" if st == "UG1" else rng.choice(uses)
+        yield [f"R{i:06d}", st, "ABCD"[(i // len(storeys)) % 4], use, f"{rng.uniform(8, 120):.2f}",
+               "" if rng.random() < 0.8 else str(rng.randint(0, 12))]
+
+
+SYNTHETIC_HEADER = ["Room", "Storey", "Zone", "Use", "Area (m²)", "Persons"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Import a room schedule (CSV / XLSX) and roll it up per storey and zone.")
+    ap.add_argument("input", type=Path)
+    ap.add_argument("--state", type=Path, help="roll-up state file; re-imports only reprocess changed rows")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_ROWS)
+    args = ap.parse_args(argv)
+
+    schedule = RoomSchedule.load(args.state) if args.state and args.state.exists() else RoomSchedule()
+    stats = schedule.import_file(args.input, chunk_size=args.chunk_size)
+    print(f"{stats.rows:,} rows: {stats.unchanged:,} unchanged, {stats.validated:,} validated, "
+          f"{stats.removed:,} removed, {stats.invalid:,} invalid ({stats.seconds:.2f} s)", file=sys.stderr)
+    for line, room, msg in stats.errors[:20]:
+        print(f"  line {line} {room}: {msg}", file=sys.stderr)
+    print(schedule.storeys().to_string(index=False))
+    print()
+    print(json.dumps(schedule.project_inputs(), indent=1))
+    if args.state:
+        schedule.save(args.state)
+    return 1 if stats.invalid else 0
+
+
+profile_functions(globals())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
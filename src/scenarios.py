@@ -0,0 +1,387 @@
+
+from __future__ import annotations
+from collections.abc import Mapping as MappingABC
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+import sys
+import threading
+
+from .project_model import INPUTS, NODES, Node, ProjectModel
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Scenario branching for the project definition.
+#
+# A scenario state is a PMap: an immutable hash trie (HAMT) of project inputs. Setting a key copies
+# only the path from the root to that key (at most a few small nodes); every other node is shared
+# with the previous version. Undo history and branches are lists of such versions, so a hundred
+# variants of one project cost their differences, not a hundred copies.
+#
+# SharedResults computes derived model nodes for many scenarios at once. A node's value is cached
+# under the values of the inputs it actually depends on (ProjectModel.input_closure), so two
+# scenarios that differ only in, say, the summer design temperature share the occupancy,
+# ventilation and drainage results: computed once, same object in both comparison columns.
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MAX_SHIFT = 64             # below this depth equal hashes go to a collision bucket
+
+
+class _Leaf:
+    __slots__ = ("hash", "key", "value")
+
+    def __init__(self, h: int, key: Any, value: Any):
+        self.hash, self.key, self.value = h, key, value
+
+
+class _Collision:
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, h: int, leaves: Tuple[_Leaf, ...]):
+        self.hash, self.leaves = h, leaves
+
+
+class _Node:
+    """Bitmap-indexed node: only occupied slots are stored."""
+    __slots__ = ("bitmap", "slots")
+
+    def __init__(self, bitmap: int, slots: tuple):
+        self.bitmap, self.slots = bitmap, slots
+
+
+_EMPTY = _Node(0, ())
+
+
+def _hash(key: Any) -> int:
+    return hash(key) & 0xFFFFFFFFFFFFFFFF
+
+
+def _same(a: Any, b: Any) -> bool:
+    try:
+        return a is b or bool(a == b)
+    except (TypeError, ValueError):      # arrays and frames: identity only
+        return False
+
+
+def _lookup(node, h: int, key: Any, default: Any) -> Any:
+    shift = 0
+    while True:
+        if isinstance(node, _Node):
+            bit = 1 << ((h >> shift) & (_WIDTH - 1))
+            if not node.bitmap & bit:
+                return default
+            node = node.slots[bin(node.bitmap & (bit - 1)).count("1")]
+            shift += _BITS
+        elif isinstance(node, _Leaf):
+            return node.value if node.hash == h and node.key == key else default
+        else:
+            for leaf in node.leaves:
+                if leaf.key == key:
+                    return leaf.value
+            return default
+
+
+def _merge(a: _Leaf, b: _Leaf, shift: int):
+    """Smallest subtree holding two leaves with different keys."""
+    if shift >= _MAX_SHIFT or a.hash == b.hash:
+        return _Collision(a.hash, (a, b))
+    ia, ib = (a.hash >> shift) & (_WIDTH - 1), (b.hash >> shift) & (_WIDTH - 1)
+    if ia == ib:
+        return _Node(1 << ia, (_merge(a, b, shift + _BITS),))
+    return _Node((1 << ia) | (1 << ib), (a, b) if ia < ib else (b, a))
+
+
+def _assoc(node, leaf: _Leaf, shift: int):
+    """Node with `leaf` set, plus whether a key was added. Returns `node` itself if nothing changed."""
+    if isinstance(node, _Leaf):
+        if node.key == leaf.key:
+            return (node, False) if _same(node.value, leaf.value) else (leaf, False)
+        return _merge(node, leaf, shift), True
+    if isinstance(node, _Collision):
+        if leaf.hash != node.hash:
+            wrapped = _Node(1 << ((node.hash >> shift) & (_WIDTH - 1)), (node,))
+            return _assoc(wrapped, leaf, shift)
+        for i, old in enumerate(node.leaves):
+            if old.key == leaf.key:
+                if _same(old.value, leaf.value):
+                    return node, False
+                return _Collision(node.hash, node.leaves[:i] + (leaf,) + node.leaves[i + 1:]), False
+        return _Collision(node.hash, node.leaves + (leaf,)), True
+    bit = 1 << ((leaf.hash >> shift) & (_WIDTH - 1))
+    pos = bin(node.bitmap & (bit - 1)).count("1")
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, node.slots[:pos] + (leaf,) + node.slots[pos:]), True
+    child, added = _assoc(node.slots[pos], leaf, shift + _BITS)
+    if child is node.slots[pos]:
+        return node, False
+    return _Node(node.bitmap, node.slots[:pos] + (child,) + node.slots[pos + 1:]), added
+
+
+def _leaves(node) -> Iterator[_Leaf]:
+    if isinstance(node, _Leaf):
+        yield node
+    elif isinstance(node, _Collision):
+        yield from node.leaves
+    else:
+        for s in node.slots:
+            yield from _leaves(s)
+
+
+def _walk(node) -> Iterator[object]:
+    """Every trie object below (and including) `node`."""
+    yield node
+    if isinstance(node, _Collision):
+        yield from node.leaves
+    elif isinstance(node, _Node):
+        for s in node.slots:
+            yield from _walk(s)
+
+
+_MISSING = object()
+
+
+def _diff(a, b, out: Dict[Any, Tuple[Any, Any]]) -> None:
+    if a is b:                            # shared subtree: nothing below differs
+        return
+    if isinstance(a, _Node) and isinstance(b, _Node):
+        for i in range(_WIDTH):
+            bit = 1 << i
+            sa = a.slots[bin(a.bitmap & (bit - 1)).count("1")] if a.bitmap & bit else _EMPTY
+            sb = b.slots[bin(b.bitmap & (bit - 1)).count("1")] if b.bitmap & bit else _EMPTY
+            _diff(sa, sb, out)
+        return
+    la = {leaf.key: leaf.value for leaf in _leaves(a)}
+    lb = {leaf.key: leaf.value for leaf in _leaves(b)}
+    for k in la.keys() | lb.keys():
+        va, vb = la.get(k, _MISSING), lb.get(k, _MISSING)
+        if not _same(va, vb):
+            out[k] = (None if va is _MISSING else va, None if vb is _MISSING else vb)
+
+
+class PMap(MappingABC):
+    """Immutable mapping with structural sharing; `set` / `update` return a new map."""
+    __slots__ = ("_root", "_len")
+
+    def __init__(self, items: Mapping[Any, Any] = None):
+        root, n = _EMPTY, 0
+        for k, v in (items or {}).items():
+            root, added = _assoc(root, _Leaf(_hash(k), k, v), 0)
+            n += added
+        self._root, self._len = root, n
+
+    @classmethod
+    def _make(cls, root, n: int) -> "PMap":
+        m = cls.__new__(cls)
+        m._root, m._len = root, n
+        return m
+
+    def __getitem__(self, key: Any) -> Any:
+        value = _lookup(self._root, _hash(key), key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return _lookup(self._root, _hash(key), key, default)
+
+    def __contains__(self, key: Any) -> bool:
+        return _lookup(self._root, _hash(key), key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[Any]:
+        return (leaf.key for leaf in _leaves(self._root))
+
+    def items(self):
+        return [(leaf.key, leaf.value) for leaf in _leaves(self._root)]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, PMap):
+            return self._root is other._root or (len(self) == len(other) and not self.diff(other))
+        return MappingABC.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PMap({dict(self.items())!r})"
+
+    def set(self, key: Any, value: Any) -> "PMap":
+        root, added = _assoc(self._root, _Leaf(_hash(key), key, value), 0)
+        return self if root is self._root else PMap._make(root, self._len + added)
+
+    def update(self, changes: Mapping[Any, Any] = None, **kw: Any) -> "PMap":
+        out = self
+        for k, v in {**(changes or {}), **kw}.items():
+            out = out.set(k, v)
+        return out
+
+    def diff(self, other: "PMap") -> Dict[Any, Tuple[Any, Any]]:
+        """{key: (value here, value in other)} for keys that differ; shared subtrees are skipped."""
+        out: Dict[Any, Tuple[Any, Any]] = {}
+        _diff(self._root, other._root, out)
+        return out
+
+    def trie_objects(self) -> Iterator[object]:
+        return _walk(self._root)
+
+
+@dataclass
+class Scenario:
+    """One branch: its version history (last = current) and the undone versions for redo."""
+    history: List[PMap]
+    future: List[PMap] = field(default_factory=list)
+    parent: Optional[str] = None
+
+
+class ScenarioTree:
+    """Named scenario branches over the project inputs, each with its own undo / redo history."""
+
+    def __init__(self, inputs: Mapping[str, Any] = None, name: str = "Base", max_history: int = 200):
+        self.max_history = max_history
+        self.branches: Dict[str, Scenario] = {name: Scenario([PMap({**INPUTS, **(inputs or {})})])}
+        self.current = name
+
+    def names(self) -> List[str]:
+        return list(self.branches)
+
+    def state(self, name: str = None) -> PMap:
+        return self.branches[name or self.current].history[-1]
+
+    def record(self, inputs: Mapping[str, Any]) -> bool:
+        """Make `inputs` the current branch's new version. False (no new version) if nothing changed."""
+        branch = self.branches[self.current]
+        new = branch.history[-1].update({k: v for k, v in inputs.items() if k in INPUTS})
+        if new is branch.history[-1]:
+            return False
+        branch.history.append(new)
+        del branch.history[:-self.max_history]
+        branch.future.clear()
+        return True
+
+    def can_undo(self) -> bool:
+        return len(self.branches[self.current].history) > 1
+
+    def can_redo(self) -> bool:
+        return bool(self.branches[self.current].future)
+
+    def undo(self) -> PMap:
+        branch = self.branches[self.current]
+        if len(branch.history) > 1:
+            branch.future.append(branch.history.pop())
+        return branch.history[-1]
+
+    def redo(self) -> PMap:
+        branch = self.branches[self.current]
+        if branch.future:
+            branch.history.append(branch.future.pop())
+        return branch.history[-1]
+
+    def branch(self, name: str, source: str = None) -> PMap:
+        """New branch starting at the current version of `source` (default: current), and switch to it."""
+        name = name.strip()
+        if not name:
+            raise ValueError("Scenario name is empty")
+        if name in self.branches:
+            raise ValueError(f"Scenario already exists: {name}")
+        source = source or self.current
+        self.branches[name] = Scenario([self.state(source)], parent=source)
+        self.current = name
+        return self.state()
+
+    def switch(self, name: str) -> PMap:
+        if name not in self.branches:
+            raise KeyError(f"Unknown scenario: {name}")
+        self.current = name
+        return self.state()
+
+    def delete(self, name: str) -> None:
+        if len(self.branches) == 1:
+            raise ValueError("Cannot delete the only scenario")
+        removed = self.branches.pop(name)
+        for b in self.branches.values():
+            if b.parent == name:
+                b.parent = removed.parent
+        if self.current == name:
+            self.current = removed.parent if removed.parent in self.branches else next(iter(self.branches))
+
+    def diff(self, a: str, b: str) -> Dict[str, Tuple[Any, Any]]:
+        return self.state(a).diff(self.state(b))
+
+    def memory(self) -> Dict[str, int]:
+        """Versions held, and trie bytes shared across them vs. the same versions as separate copies."""
+        versions = [v for b in self.branches.values() for v in b.history + b.future]
+        unique: Dict[int, object] = {}
+        copies = 0
+        for v in versions:
+            for obj in v.trie_objects():
+                unique[id(obj)] = obj
+                copies += sys.getsizeof(obj) + (sys.getsizeof(obj.slots) if isinstance(obj, _Node) else 0)
+        shared = sum(sys.getsizeof(o) + (sys.getsizeof(o.slots) if isinstance(o, _Node) else 0)
+                     for o in unique.values())
+        return {"versions": len(versions), "trie_objects": len(unique), "bytes": shared, "bytes_as_copies": copies}
+
+
+class SharedResults:
+    """Derived model nodes for many input sets; each node computed once per distinct relevant inputs.
+
+    Cached values are shared between scenarios and must be treated as read-only.
+    """
+
+    def __init__(self, nodes: Iterable[Node] = NODES, max_entries: int = 20_000):
+        graph = ProjectModel(nodes=nodes)
+        self.nodes = graph.nodes
+        self.closure = {name: graph.input_closure(name) for name in self.nodes}
+        self.max_entries = max_entries
+        self.values: Dict[Tuple[Any, ...], Any] = {}
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, inputs: Mapping[str, Any], name: str) -> Any:
+        if name not in self.nodes:
+            return inputs[name]
+        key = (name,) + tuple(inputs[k] for k in self.closure[name])
+        try:
+            value = self.values[key]
+            self.hits += 1
+            return value
+        except KeyError:
+            pass
+        node = self.nodes[name]
+        value = node.fn(*(self.get(inputs, d) for d in node.deps))
+        with self._lock:
+            self.misses += 1
+            while len(self.values) >= self.max_entries:
+                self.values.pop(next(iter(self.values)))
+            self.values[key] = value
+        return value
+
+
+RESULTS = SharedResults()
+
+# (label, unit, value from a node getter)
+METRICS: Sequence[Tuple[str, str, Any]] = (
+    ("Area total", "m²", lambda g: g("area_total_m2")),
+    ("Persons", "-", lambda g: g("persons")),
+    ("Electrical connected load", "kW", lambda g: g("electrical_connected_kw")),
+    ("HVAC electrical", "kW", lambda g: g("hvac_electrical")[0]),
+    ("Heating capacity", "kW", lambda g: g("hvac_capacities")["heating_kw"]),
+    ("Cooling capacity", "kW", lambda g: g("hvac_capacities")["cooling_kw"]),
+    ("Outdoor air", "m³/h", lambda g: g("ventilation")["q_m3h"]),
+    ("Rain flow (roof)", "l/s", lambda g: g("rain_flow_lps")),
+    ("Technical rooms", "m²", lambda g: g("allowances")["tech_rooms_m2"]),
+    ("Shafts", "m²", lambda g: g("allowances")["shafts_m2"]),
+)
+
+
+def compare(tree: ScenarioTree, names: Sequence[str] = None, results: SharedResults = None) -> "pd.DataFrame":
+    """Key results side by side: one row per metric, one column per scenario."""
+    import pandas as pd
+    results = results or RESULTS
+    names = list(names or tree.names())
+    data = {"Result": [m[0] for m in METRICS], "Unit": [m[1] for m in METRICS]}
+    for name in names:
+        state = tree.state(name)
+        data[name] = [float(fn(lambda node: results.get(state, node))) for _, _, fn in METRICS]
+    return pd.DataFrame(data)
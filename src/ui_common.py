@@ -1,6 +1,10 @@
-import json
+from collections.abc import Mapping
 from pathlib import Path
+import sys
 import streamlit as st
+from . import data_catalog, profiling
+from .project_model import INPUTS, ProjectModel
+from .scenarios import ScenarioTree
 
 BUNDESLANDS = [
     "Generic (Germany)",
@@ -22,38 +26,142 @@ BUNDESLANDS = [
     "Thüringen",
 ]
 
-DATA_PATH = Path(__file__).resolve().parent.parent / "data"
+def project_model() -> ProjectModel:
+    """The session's project model; every page reads derived results from it."""
+    if "_project_model" not in st.session_state:
+        st.session_state["_project_model"] = ProjectModel()
+    return st.session_state["_project_model"]
 
 
-def _load_json(name: str):
-    return json.load(open(DATA_PATH / name, "r", encoding="utf-8"))
+def scenarios() -> ScenarioTree:
+    """The session's scenario branches; the sidebar records every project change in the current one."""
+    if "_scenarios" not in st.session_state:
+        st.session_state["_scenarios"] = ScenarioTree(project_model().inputs())
+    return st.session_state["_scenarios"]
+
+
+def _index(options, value) -> int:
+    options = list(options)
+    return options.index(value) if value in options else 0
+
+
+def apply_project_inputs(inputs) -> None:
+    """Put stored project inputs (project_model.INPUTS keys) into the sidebar state and the model."""
+    inputs = {k: v for k, v in inputs.items() if k in INPUTS}
+    project_model().set(**inputs)
+    st.session_state.update({k: v for k, v in inputs.items() if k not in ("persons_manual", "roof_area_manual")})
+    if not inputs.get("auto_occupancy", True):
+        st.session_state["persons"] = int(inputs.get("persons_manual", 0))
+    if not inputs.get("auto_roof_area", True):
+        st.session_state["roof_area_m2"] = float(inputs.get("roof_area_manual", 0.0))
+    # New widget keys: the sidebar widgets start again from the loaded values
+    st.session_state["_sidebar_gen"] = st.session_state.get("_sidebar_gen", 0) + 1
+
+
+def _key(name: str) -> str:
+    return f"_sidebar_{name}_{st.session_state.get('_sidebar_gen', 0)}"
+
+
+class _SessionView(Mapping):
+    """Read-only view of the session state, returned by sidebar() instead of a copy per rerun."""
+
+    def __getitem__(self, key):
+        return st.session_state[key]
+
+    def __iter__(self):
+        return iter(list(st.session_state.keys()))
+
+    def __len__(self):
+        return len(st.session_state)
 
 
 def sidebar():
     """Project definition sidebar (pre-sizing).
 
     Auto-estimates update live with area / use / storeys and can be switched to manual overrides.
+    The sidebar is a fragment: its widgets rerun only the sidebar, and the page is rerun only when
+    the project definition actually changed. Page widgets never re-render the sidebar unless the page
+    itself reruns.
     """
+    if profiling.ENABLED:
+        profiling.begin_rerun(Path(sys._getframe(1).f_code.co_filename).stem)
+    st.session_state["_app_run"] = True
+    try:
+        with profiling.span("ui.sidebar"):
+            _project_definition()
+        _scenario_controls()
+    finally:
+        st.session_state["_app_run"] = False
+    return _SessionView()
+
+
+def debug_panel() -> None:
+    """Close the rerun's profile and show it in the sidebar (only with MEP_PROFILE=1). Last call on each page."""
+    if not profiling.ENABLED:
+        return
+    record = profiling.end_rerun()
+    if record is None:
+        return
+    with st.sidebar.expander(f"Profiling: {record['wall_ms']:,.0f} ms"):
+        st.caption(f"{record['page']} · traced memory {record['traced_kb'] / 1024:,.1f} MB · log {profiling.LOG_PATH}")
+        st.dataframe(profiling.record_frame(record), use_container_width=True, hide_index=True)
+        st.caption("Rerun wall time per page (this process)")
+        st.dataframe(profiling.recent_summary(), use_container_width=True, hide_index=True)
+
+
+@st.fragment
+def _scenario_controls():
+    tree = scenarios()
+    with st.sidebar.expander(f"Scenario: {tree.current}"):
+        pick = st.selectbox("Scenario", tree.names(), index=_index(tree.names(), tree.current),
+                            key=f"_scenario_pick_{tree.current}")
+        name = st.text_input("New branch name", key="_scenario_name",
+                             placeholder="e.g. Cat I ventilation")
+        c1, c2, c3 = st.columns(3)
+        state = None
+        if pick != tree.current:
+            state = tree.switch(pick)
+        elif c1.button("Branch", disabled=not name.strip()):
+            try:
+                state = tree.branch(name)
+            except ValueError as e:
+                st.warning(str(e))
+        elif c2.button("Undo", disabled=not tree.can_undo()):
+            state = tree.undo()
+        elif c3.button("Redo", disabled=not tree.can_redo()):
+            state = tree.redo()
+        if state is not None:
+            apply_project_inputs(state)
+            st.rerun(scope="app")
+
+
+@st.fragment
+def _project_definition():
     st.sidebar.header("Project definition")
 
-    city_presets = _load_json("city_presets.json")
-    use_profiles = _load_json("use_profiles.json")
+    city_presets = data_catalog.city_presets()
+    use_profiles = data_catalog.use_profiles()
 
-    city = st.sidebar.selectbox("City (Germany)", list(city_presets.keys()), index=0)
-    bundesland = st.sidebar.selectbox("Federal state (Bundesland)", BUNDESLANDS, index=0)
-    use_type = st.sidebar.selectbox("Main use", list(use_profiles.keys()), index=0)
+    city = st.sidebar.selectbox("City (Germany)", list(city_presets.keys()),
+                                index=_index(city_presets.keys(), st.session_state.get("city")), key=_key("city"))
+    bundesland = st.sidebar.selectbox("Federal state (Bundesland)", BUNDESLANDS,
+                                      index=_index(BUNDESLANDS, st.session_state.get("bundesland")), key=_key("bundesland"))
+    use_type = st.sidebar.selectbox("Main use", list(use_profiles.keys()),
+                                    index=_index(use_profiles.keys(), st.session_state.get("use_type")), key=_key("use_type"))
 
     area_above = st.sidebar.number_input(
         "Above-ground area (m²)",
         min_value=0.0,
         value=float(st.session_state.get("area_above_m2", 10000.0)),
         step=100.0,
+        key=_key("area_above_m2"),
     )
     area_below = st.sidebar.number_input(
         "Below-ground area (m²)",
         min_value=0.0,
         value=float(st.session_state.get("area_below_m2", 0.0)),
         step=100.0,
+        key=_key("area_below_m2"),
     )
 
     floors_above = st.sidebar.number_input(
@@ -61,25 +169,38 @@ def sidebar():
         min_value=0,
         value=int(st.session_state.get("floors_above", 8)),
         step=1,
+        key=_key("floors_above"),
     )
     floors_below = st.sidebar.number_input(
         "Below-ground storeys",
         min_value=0,
         value=int(st.session_state.get("floors_below", 0)),
         step=1,
+        key=_key("floors_below"),
     )
 
-    prof = use_profiles.get(use_type, {})
+    model = project_model()
+    model.set(
+        city=city,
+        bundesland=bundesland,
+        use_type=use_type,
+        area_above_m2=area_above,
+        area_below_m2=area_below,
+        floors_above=floors_above,
+        floors_below=floors_below,
+    )
+    prof = model["use_profile"]
 
     st.sidebar.subheader("Auto-estimates (editable)")
 
     # Occupancy
     m2_per_person = float(prof.get("occupancy_m2_per_person", 10)) or 10.0
-    occ_est = 0 if area_above <= 0 else int(max(0, round(area_above / m2_per_person)))
+    occ_est = model["occupancy_est"]
     auto_occupancy = st.sidebar.toggle(
         "Auto occupancy from area + use profile",
         value=bool(st.session_state.get("auto_occupancy", True)),
         help="If enabled, occupancy updates automatically when area or use changes.",
+        key=_key("auto_occupancy"),
     )
     if auto_occupancy:
         st.sidebar.number_input(
@@ -89,25 +210,29 @@ def sidebar():
             step=5,
             disabled=True,
         )
-        persons = int(occ_est)
     else:
         persons = st.sidebar.number_input(
             "Occupancy (persons) — manual",
             min_value=0,
             value=int(st.session_state.get("persons", occ_est)),
             step=5,
+            key=_key("persons_manual"),
         )
+        model.set(persons_manual=persons)
+    model.set(auto_occupancy=auto_occupancy)
+    persons = model["persons"]
 
     with st.sidebar.expander("Occupancy assumptions"):
         st.write(f"Use profile density: {m2_per_person} m²/person")
         st.write(f"Computed persons: {occ_est}")
 
     # Roof area
-    roof_est = 0.0 if area_above <= 0 else float(area_above) / max(1, int(floors_above or 1))
+    roof_est = model["roof_area_est"]
     auto_roof = st.sidebar.toggle(
         "Auto roof area from footprint (area/storeys)",
         value=bool(st.session_state.get("auto_roof_area", True)),
         help="If enabled, roof area updates automatically when area or storeys change.",
+        key=_key("auto_roof_area"),
     )
     if auto_roof:
         st.sidebar.number_input(
@@ -117,20 +242,20 @@ def sidebar():
             step=50.0,
             disabled=True,
         )
-        roof_area = float(roof_est)
     else:
         roof_area = st.sidebar.number_input(
             "Roof area (m²) — manual",
             min_value=0.0,
             value=float(st.session_state.get("roof_area_m2", roof_est)),
             step=50.0,
+            key=_key("roof_area_manual"),
         )
+        model.set(roof_area_manual=roof_area)
+    model.set(auto_roof_area=auto_roof)
+    roof_area = model["roof_area_m2"]
 
-    # Technical rooms & shafts
-    from .project_presizing import estimate_tech_rooms_and_shafts
-
-    area_total = float(area_above) + float(area_below)
-    allowances = estimate_tech_rooms_and_shafts(area_total, int(floors_above or 1), prof)
+    # Technical rooms & shafts (smoke risers: applied on the Fire Safety page)
+    allowances = model["allowances"]
 
     auto_spaces = st.sidebar.toggle(
         "Auto technical rooms & shafts from area ratios",
@@ -155,6 +280,8 @@ def sidebar():
         tech_rooms_m2 = float(allowances["tech_rooms_m2"])
         shafts_m2 = float(allowances["shafts_m2"])
         st.sidebar.caption(f"Net shafts per storey: {allowances['shafts_m2_per_floor']:.2f} m²/storey")
+        if allowances["fire_shafts_m2"] > 0:
+            st.sidebar.caption(f"incl. smoke control risers: {allowances['fire_shafts_m2']:.1f} m² (Fire page)")
     else:
         tech_rooms_m2 = st.sidebar.number_input(
             "Technical rooms (m²) — manual",
@@ -171,7 +298,9 @@ def sidebar():
         st.sidebar.caption(f"Net shafts per storey: {shafts_m2 / max(1, int(floors_above or 1)):.2f} m²/storey")
 
     st.sidebar.subheader("Design context (pre-sizing)")
-    vent_cat = st.sidebar.selectbox("Indoor air category (EN 16798 example)", ["Cat I", "Cat II", "Cat III"], index=1)
+    vent_cats = ["Cat I", "Cat II", "Cat III"]
+    vent_cat = st.sidebar.selectbox("Indoor air category (EN 16798 example)", vent_cats,
+                                    index=_index(vent_cats, st.session_state.get("vent_cat", "Cat II")), key=_key("vent_cat"))
     geg = st.sidebar.selectbox(
         "GEG context",
         ["Existing building", "New build (GEG baseline)", "High performance (indicative)"],
@@ -186,32 +315,37 @@ def sidebar():
         max_value=45.0,
         value=float(st.session_state.get("design_summer_C", summer_preset)),
         step=0.5,
+        key=_key("design_summer_C"),
     )
 
+    model.set(vent_cat=vent_cat, design_summer_C=design_summer_C)
+
     st.sidebar.caption(
         "Note: requirements can vary by state building codes (Landesbauordnung). This app uses a generic mode and adds alerts."
     )
 
-    st.session_state.update(
-        {
-            "city": city,
-            "bundesland": bundesland,
-            "use_type": use_type,
-            "area_above_m2": float(area_above),
-            "area_below_m2": float(area_below),
-            "floors_above": int(floors_above),
-            "floors_below": int(floors_below),
-            "auto_occupancy": bool(auto_occupancy),
-            "auto_roof_area": bool(auto_roof),
-            "auto_spaces": bool(auto_spaces),
-            "persons": int(persons),
-            "vent_cat": vent_cat,
-            "geg": geg,
-            "roof_area_m2": float(roof_area),
-            "tech_rooms_m2": float(tech_rooms_m2),
-            "shafts_m2": float(shafts_m2),
-            "design_summer_C": float(design_summer_C),
-        }
-    )
+    with st.sidebar.expander("Calculation cache"):
+        from .memo import CACHE
+        stats = CACHE.summary()
+        st.write(f"Hits {stats['hits']:,} · misses {stats['misses']:,} · "
+                 f"{stats['entries']:,} entries · {stats['bytes'] / 1e6:.1f} of {stats['max_bytes'] / 1e6:.0f} MB")
+        if st.toggle("Per-function statistics", value=False):
+            st.dataframe(CACHE.stats_frame(), use_container_width=True, hide_index=True)
 
-    return dict(st.session_state)
+    # Validated values from the model (ProjectInputs); the rest are sidebar-only settings
+    project = {k: model[k] for k in ("city", "bundesland", "use_type", "area_above_m2", "area_below_m2", "floors_above",
+                                     "floors_below", "auto_occupancy", "auto_roof_area", "vent_cat", "design_summer_C")}
+    project.update({
+        "auto_spaces": bool(auto_spaces),
+        "persons": persons,
+        "geg": geg,
+        "roof_area_m2": roof_area,
+        "tech_rooms_m2": float(tech_rooms_m2),
+        "shafts_m2": float(shafts_m2),
+    })
+    scenarios().record(model.inputs())
+    changed = any(st.session_state.get(k) != v for k, v in project.items())
+    st.session_state.update(project)
+    if changed and not st.session_state.get("_app_run"):
+        # Sidebar-only rerun that changed the project: refresh the page that reads it
+        st.rerun()
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from typing import Dict, Any, List, Tuple
 import math
 import pandas as pd
+from .profiling import profile_functions
 
 COPPER_RESISTIVITY_OHM_MM2_PER_M = 0.0175  # approx at 20°C
 
@@ -73,3 +74,6 @@ class Advisory:
 
 def advisories_to_df(advs: List[Advisory]) -> pd.DataFrame:
     return pd.DataFrame([{"Level": a.level, "Alert": a.text} for a in advs])
+
+
+profile_functions(globals())
@@ -0,0 +1,71 @@
+
+import asyncio
+import json
+
+from src.api import ApiError, PresizingApi, presize_batch, start_server
+from src.calcs_electrical import size_feeder
+
+
+async def _post(port, path, payload):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, data = raw.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(data)
+
+
+def test_concurrent_requests_are_micro_batched():
+    async def run():
+        api = PresizingApi(max_wait_ms=20.0)
+        server = await start_server("127.0.0.1", 0, api)
+        port = server.sockets[0].getsockname()[1]
+        projects = [{"id": i, "use_type": "Office", "area_above_m2": 2000.0 + 100 * i, "floors_above": 4} for i in range(12)]
+        results = await asyncio.gather(*(_post(port, "/presize", p) for p in projects))
+        bad = await _post(port, "/presize", {"area_above_m2": "n/a"})
+        server.close()
+        return api, results, bad
+
+    api, results, bad = asyncio.run(run())
+    assert all(status == 200 for status, _ in results)
+    assert [r["id"] for _, r in results] == list(range(12))
+    assert results[1][1]["elec_connected_kw"] > results[0][1]["elec_connected_kw"]
+    assert api.batchers["/presize"].batches < 12 and api.batchers["/presize"].items == 13
+    assert bad[0] == 422 and "error" in bad[1]
+
+
+def test_calc_endpoint_and_latency_stats():
+    async def run():
+        api = PresizingApi(max_wait_ms=1.0)
+        ok = await api.handle("POST", "/calc/size_feeder", b'{"p_dem_kw": 120.0, "length_m": 80}')
+        missing = await api.handle("POST", "/calc/no_such_function", b"{}")
+        bad_args = await api.handle("POST", "/calc/size_feeder", b'{"kw": 1}')
+        pipes = await api.handle("POST", "/drainage/pipe", b'[{"q_lps": 5}, {"q_lps": 20, "slope_pct": 2}]')
+        stats = await api.handle("GET", "/stats", b"")
+        return ok, missing, bad_args, pipes, stats
+
+    ok, missing, bad_args, pipes, stats = asyncio.run(run())
+    assert ok[0] == 200 and ok[1]["Section_mm2"] == size_feeder(120.0, length_m=80)["Section_mm2"]
+    assert missing[0] == 404 and bad_args[0] == 400
+    assert pipes[0] == 200 and pipes[1][1]["DN"] >= pipes[1][0]["DN"] > 0
+    ep = stats[1]["endpoints"]["POST /calc/*"]
+    assert ep["count"] == 3 and ep["errors"] == 2 and ep["p95_ms"] >= ep["p50_ms"]
+
+
+def test_mixed_batches_fail_per_item():
+    async def run():
+        api = PresizingApi(max_wait_ms=1.0)
+        calc = await api.handle("POST", "/calc/size_feeder", b'[{"p_dem_kw": 5}, {"x": 1}]')
+        pipes = await api.handle("POST", "/drainage/pipe", b'[{"q_lps": 5}, {"q_lps": -1}, {"q_lps": 5, "slope_pct": 0}]')
+        fire = await api.handle("POST", "/fire/screen", b'[{"use": "Hotel", "storeys": 9}, {"storeys": "many"}]')
+        return calc, pipes, fire
+
+    calc, pipes, fire = asyncio.run(run())
+    assert fire[1][0]["sonderbau"] and "storeys" in fire[1][1]["error"]
+    assert calc[0] == 200 and "Section_mm2" in calc[1][0] and "error" in calc[1][1]
+    assert pipes[0] == 200 and pipes[1][0]["DN"] > 0 and all("positive" in r["error"] for r in pipes[1][1:])
+    rows = presize_batch([{"id": "a", "area_above_m2": 1500.0}, 5, {"id": "c", "area_above_m2": 900.0}])
+    assert rows[0]["id"] == "a" and rows[2]["id"] == "c"
+    assert isinstance(rows[1], ApiError) and rows[1].status == 400
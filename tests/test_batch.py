@@ -0,0 +1,46 @@
+
+import csv
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from src.batch import ResultWriter, read_projects, run_batch
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROJECTS = [
+    {"id": "A", "city": "Berlin", "use_type": "Office", "area_above_m2": "12000", "floors_above": "6"},
+    {"id": "B", "city": "Munich", "use_type": "Retail", "area_above_m2": "3000", "floors_above": "1", "floors_below": "1"},
+    {"id": "bad", "area_above_m2": "n/a"},
+]
+
+
+def test_batch_streams_one_row_per_project_and_isolates_errors():
+    buf = io.StringIO()
+    stats = run_batch(PROJECTS, ResultWriter(buf, "jsonl"), workers=1, chunk_size=2)
+    rows = {r["id"]: r for r in map(json.loads, buf.getvalue().splitlines())}
+    assert stats["projects"] == 3 and stats["errors"] == 1
+    assert rows["bad"]["error"] and not rows["A"]["error"]
+    assert rows["A"]["elec_connected_kw"] > 0 and rows["A"]["hvac_heating_kw"] > 0
+    assert rows["B"]["fire_building_class"] and rows["A"]["rain_collector_DN"] > 0
+
+
+def test_batch_pool_matches_serial_and_avoids_streamlit(tmp_path):
+    src = tmp_path / "projects.csv"
+    with open(src, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["id", "city", "use_type", "area_above_m2", "floors_above", "floors_below"])
+        w.writeheader()
+        w.writerows({k: p.get(k, "") for k in w.fieldnames} for p in PROJECTS)
+    out = tmp_path / "results.csv"
+    code = ("import sys; from src.batch import main; rc = main(sys.argv[1:]); "
+            "print('streamlit' in sys.modules); sys.exit(rc)")
+    proc = subprocess.run([sys.executable, "-c", code, str(src), "-o", str(out), "-j", "2", "--chunk-size", "1"],
+                          cwd=ROOT, capture_output=True, text=True)
+    assert proc.returncode == 1 and proc.stdout.strip() == "False"
+    pooled = {r["id"]: r for r in csv.DictReader(open(out, encoding="utf-8"))}
+    serial = io.StringIO()
+    run_batch(read_projects(src), ResultWriter(serial, "csv"), workers=1)
+    for r in csv.DictReader(io.StringIO(serial.getvalue())):
+        assert {k: v for k, v in r.items() if k != "row"} == {k: v for k, v in pooled[r["id"]].items() if k != "row"}
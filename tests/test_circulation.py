@@ -0,0 +1,39 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.calcs_circulation import circulation_balance
+
+def test_circulation_small_tree():
+    seg = pd.DataFrame({
+        "parent": [-1, 0, 0],
+        "length_m": [20.0, 15.0, 30.0],
+        "d_inner_mm": [20.0, 13.0, 13.0],
+        "insulation_mm": [20.0, 20.0, 20.0],
+    })
+    r = circulation_balance(seg)
+    df = r["segments"]
+    # Root carries all downstream losses
+    assert abs(r["flow_total_lps"] - df["Circulation flow (L/s)"][0]) < 1e-12
+    assert df["Circulation flow (L/s)"][0] > df["Circulation flow (L/s)"][1] + df["Circulation flow (L/s)"][2]
+    assert r["pump_head_kPa"] > 0
+    # The longer branch is the critical one and needs no throttling
+    assert r["critical_segment"] == 2
+    assert abs(df["Valve Δp (kPa)"][2]) < 1e-9
+    assert df["Valve Δp (kPa)"][1] > 0
+
+def test_circulation_many_segments():
+    n = 5000
+    parent = np.arange(n) // 2 - 1
+    parent[0] = -1
+    seg = pd.DataFrame({"parent": parent, "length_m": 5.0, "d_inner_mm": 16.0, "insulation_mm": 20.0})
+    r = circulation_balance(seg)
+    assert abs(r["heat_loss_total_W"] - r["segments"]["Heat loss (W)"].sum()) < 1e-6
+
+def test_parents_are_segment_ids():
+    seg = pd.DataFrame({"parent": [-1, 0, 0, 2], "length_m": [20.0, 15.0, 30.0, 10.0], "d_inner_mm": [20.0, 13.0, 13.0, 13.0]})
+    r = circulation_balance(seg.drop(index=1))
+    # Deleting segment 1 keeps 3 -> 2 -> 0 linked by id, not shifted to the next position
+    assert list(r["segments"]["Segment"]) == [0, 2, 3] and r["critical_segment"] == 3
+    with pytest.raises(ValueError, match="segment\\(s\\) 3"):
+        circulation_balance(seg.drop(index=2))
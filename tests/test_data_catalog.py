@@ -0,0 +1,24 @@
+
+import json
+import os
+import pytest
+from src.data_catalog import city_presets, load_json_file, thaw, use_profile
+from src.project_presizing import load_use_profiles
+
+def test_shared_read_only_view():
+    assert load_use_profiles() is load_use_profiles()
+    assert city_presets() is city_presets()
+    assert use_profile("Office")["lighting_W_m2"] > 0
+    with pytest.raises(TypeError):
+        use_profile("Office")["lighting_W_m2"] = 0
+    json.dumps(thaw(city_presets()))
+
+def test_invalidated_on_change(tmp_path):
+    p = tmp_path / "x.json"
+    p.write_text(json.dumps({"a": [1, 2]}))
+    first = load_json_file(p)
+    assert first["a"] == (1, 2) and load_json_file(p) is first
+    p.write_text(json.dumps({"a": [3]}))
+    st = os.stat(p)
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert load_json_file(p)["a"] == (3,)
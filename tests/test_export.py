@@ -0,0 +1,50 @@
+
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pyarrow.ipc as ipc
+
+from src import export
+from src.batch import RESULT_COLUMNS, presize_records
+from src.export import MODULES, ArrowIpcWriter, ParquetDatasetWriter, WorkbookWriter, read_dataset
+
+NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def _rows():
+    raw = [{"id": f"P{i}", "city": c, "use_type": "Office", "area_above_m2": 2000 + 500 * i, "floors_above": 3}
+           for i, c in enumerate(["Berlin", "Munich", "Berlin", "Hamburg", "Berlin"])]
+    raw.append({"id": "bad", "area_above_m2": "n/a"})
+    return presize_records([{"row": i, "raw": r} for i, r in enumerate(raw)])
+
+
+def test_parquet_dataset_is_partitioned_and_round_trips(tmp_path):
+    assert set(RESULT_COLUMNS) <= set(export.KEY_COLUMNS).union(*MODULES.values())
+    rows = _rows()
+    with ParquetDatasetWriter(tmp_path / "r.parquet", row_group_rows=2) as w:
+        w.write(rows[:3])
+        w.write(rows[3:])
+    parts = sorted(p.name for p in (tmp_path / "r.parquet" / "hvac").iterdir())
+    assert parts == ["city=Berlin", "city=Hamburg", "city=Munich", "city=__HIVE_DEFAULT_PARTITION__"]
+    project = read_dataset(tmp_path / "r.parquet", "project").sort_values("row")
+    assert list(project["id"]) == [r["id"] for r in rows]
+    assert project["error"].iloc[-1] and project["city"].isna().iloc[-1]
+    berlin = read_dataset(tmp_path / "r.parquet", "fire", city="Berlin")
+    assert len(berlin) == 3 and berlin["fire_building_class"].notna().all() and len(berlin["fire_reasons"].iloc[0]) > 0
+
+
+def test_arrow_and_workbook_writers_stream_one_table_per_module(tmp_path, monkeypatch):
+    rows = _rows()
+    with ArrowIpcWriter(tmp_path / "r.arrow", row_group_rows=4) as w:
+        w.write(rows)
+    t = ipc.open_file(tmp_path / "r.arrow" / "electrical.arrow").read_all()
+    assert t.num_rows == len(rows) and t.column("elec_demand_kw").to_pylist()[0] == rows[0]["elec_demand_kw"]
+
+    monkeypatch.setattr(export, "XLSX_MAX_ROWS", 4)     # header + 3 rows per sheet
+    with WorkbookWriter(tmp_path / "r.xlsx") as w:
+        w.write(rows)
+    with zipfile.ZipFile(tmp_path / "r.xlsx") as z:
+        sheets = [s.get("name") for s in ET.fromstring(z.read("xl/workbook.xml")).iter(f"{{{NS['m']}}}sheet")]
+        assert sheets[:2] == ["project", "electrical"] and "fire (2)" in sheets and len(sheets) == 2 * len(MODULES)
+        first = ET.fromstring(z.read("xl/worksheets/sheet1.xml")).findall(".//m:row", NS)
+        assert len(first) == 4 and first[0].find("m:c/m:is/m:t", NS).text == "row"
@@ -0,0 +1,30 @@
+
+import pandas as pd
+import pytest
+from src.calcs_fire import fire_predim
+from src.fire_rules import screen_buildings, state_rules
+
+def test_fire_predim_highrise():
+    r = fire_predim("Office", 20000, 12, True, bundesland="Berlin")
+    assert r["building_class"] == "GK 5"
+    assert r["sonderbau"] and r["alarm"]
+    assert any("Hochhaus" in x for x in r["reasons"])
+
+def test_screen_portfolio():
+    df = pd.DataFrame({
+        "bundesland": ["Bayern", "Hamburg", "Generic (Germany)"] * 1000,
+        "use": ["Residential", "Retail", "Hotel"] * 1000,
+        "gross_area_m2": [300.0, 5000.0, 4000.0] * 1000,
+        "storeys": [2, 2, 6] * 1000,
+        "persons": [6, 500, 100] * 1000,
+    })
+    res = screen_buildings(df)
+    assert len(res) == 3000
+    assert res["building_class"].iloc[0] == "GK 2"
+    assert res["sprinkler"].iloc[1] and "SB_RETAIL" in res["matched"].iloc[1]
+    assert res["alarm"].iloc[2] and "SB_HOTEL" in res["matched"].iloc[2]
+
+def test_extends_cycle_is_rejected():
+    tables = {"states": {"Generic (Germany)": {"rules": []}, "A": {"extends": "B", "rules": []}, "B": {"extends": "A", "rules": []}}}
+    with pytest.raises(ValueError, match="A -> B -> A"):
+        state_rules("A", tables)
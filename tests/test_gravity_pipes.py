@@ -0,0 +1,20 @@
+
+import numpy as np
+from src.gravity_pipes import DN, DN_INNER_MM, partial_flow_lps, capacity_lps, size_gravity_pipes
+
+def test_half_full_is_half_of_full_flow():
+    q_full = partial_flow_lps(100, 1.0, 1.0)
+    q_half = partial_flow_lps(100, 1.0, 0.5)
+    assert abs(q_half / q_full - 0.5) < 1e-9
+
+def test_table_matches_direct_formula():
+    cap = capacity_lps([0.5, 1.0, 2.0], filling_ratio=0.7, kb_mm=1.0)
+    direct = partial_flow_lps(DN_INNER_MM[None, :], np.array([0.5, 1.0, 2.0])[:, None], 0.7, 1.0)
+    assert np.allclose(cap, direct, rtol=0.01)
+
+def test_size_gravity_pipes():
+    r = size_gravity_pipes([1.0, 10.0, 40.0], 1.0, max_filling=0.5)
+    assert list(r["DN"]) == sorted(r["DN"])
+    assert (r["filling_ratio"] <= 0.5 + 1e-6).all()
+    q_check = partial_flow_lps(r["d_inner_mm"], 1.0, r["filling_ratio"])
+    assert np.allclose(q_check, [1.0, 10.0, 40.0], rtol=0.02)
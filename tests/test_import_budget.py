@@ -0,0 +1,46 @@
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# What every page imports before drawing anything: sidebar, project model, report module.
+# streamlit is imported first, as on a real page.
+STARTUP = "import streamlit; import src.ui_common, src.project_model, src.reporting"
+HEAVY = ("pandas", "reportlab", "pyarrow")
+# Import cost itself is timed by the startup_imports case of src/benchmarks.py
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def _loaded() -> str:
+    return f"sorted(m for m in {HEAVY!r} if m in sys.modules)"
+
+
+def test_startup_does_not_load_heavy_dependencies():
+    out = _run(STARTUP + "; import sys; print(" + _loaded() + ")")
+    assert out.stdout.strip() == "[]"
+
+
+def test_app_and_pages_load_reportlab_only_to_build_a_pdf():
+    out = _run(f"""
+import sys
+from streamlit.testing.v1 import AppTest
+from pathlib import Path
+at = AppTest.from_file("app.py", default_timeout=60).run()
+print(not at.exception, {_loaded()})
+for page in sorted(Path("pages").glob("*.py")):
+    at = AppTest.from_file(str(page), default_timeout=60).run()
+    assert not at.exception, (page, at.exception[0].value)
+print("reportlab" in sys.modules)
+at = AppTest.from_file("pages/3_Plumbing_DHW.py", default_timeout=60).run()
+next(b for b in at.button if b.label.startswith("Apply suggested fixtures")).click().run()
+assert not at.exception, at.exception[0].value
+print(at.number_input(key="fix_WC cistern").value != 10)
+""")
+    # The home page renders without pandas; table pages need it, but none needs reportlab up front.
+    # Page buttons that only seed inputs work without a PDF either.
+    assert out.stdout.split() == ["True", "[]", "False", "True"]
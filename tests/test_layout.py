@@ -0,0 +1,40 @@
+
+import json
+import numpy as np
+from src.calcs_layout import layout_devices, load_floor_plates, rasterize
+
+def _plate(i):
+    th = np.linspace(0, 2 * np.pi, 73)[:-1]
+    rr = 30 + 6 * np.sin(5 * th + i * 0.1)
+    outline = np.column_stack([rr * np.cos(th + i * 0.02), rr * np.sin(th + i * 0.02)])
+    core = np.array([[-6, -6], [6, -6], [6, 6], [-6, 6]], float)
+    return [[outline, core]]
+
+def test_rectangle_and_geojson(tmp_path):
+    gj = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"storey": "L01"},
+         "geometry": {"type": "Polygon", "coordinates": [[[0, 0], [48, 0], [48, 24], [0, 24], [0, 0]]]}}]}
+    p = tmp_path / "plates.geojson"
+    p.write_text(json.dumps(gj))
+    plates = load_floor_plates(p)
+    mask, _, _ = rasterize(plates["L01"], 0.5)
+    assert mask.sum() * 0.25 == 48 * 24
+    r = layout_devices(plates, "Sprinkler OH (EN 12845)")
+    assert r["total"] == 14 * 7  # 3.46 m square grid, ≤ 12 m² per head
+
+def test_tower_is_fully_covered():
+    plates = {f"L{i:02d}": _plate(i) for i in range(60)}
+    r = layout_devices(plates, "Smoke detector (DIN VDE 0833-2)")
+    assert len(r["storeys"]) == 60 and r["unique_plates"] == 60
+    # Every floor cell lies within the coverage radius of a detector
+    mask, x0, y0 = rasterize(plates["L07"], 0.25)
+    rows, cols = np.nonzero(mask)
+    cx, cy = x0 + (cols + 0.5) * 0.25, y0 + (rows + 0.5) * 0.25
+    pos = r["positions"]["L07"]
+    d2 = ((cx[:, None] - pos[None, :, 0]) ** 2 + (cy[:, None] - pos[None, :, 1]) ** 2).min(axis=1)
+    assert (d2 <= 6.5**2 + 0.5).all()
+
+def test_plate_thinner_than_a_cell():
+    strip = [[np.array([[0, 0], [20, 0], [20, 0.2], [0, 0.2]], float)]]
+    r = layout_devices({"L00": strip, "L01": _plate(1)})
+    assert r["storeys"]["Devices"].tolist()[0] == 1 and r["storeys"]["Devices"].tolist()[1] > 1
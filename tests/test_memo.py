@@ -0,0 +1,70 @@
+
+import inspect
+import threading
+import time
+import numpy as np
+import pandas as pd
+from src.calcs_circulation import circulation_balance
+from src.memo import CACHE, MemoCache, memo_disabled, memoize
+
+def test_shared_hits_and_private_copies():
+    seg = pd.DataFrame({"parent": [-1, 0, 0], "length_m": [20.0, 15.0, 30.0], "d_inner_mm": [20.0, 13.0, 13.0]})
+    before = CACHE.stats.get("src.calcs_circulation.circulation_balance")
+    hits0 = before.hits if before else 0
+    a = circulation_balance(seg, t_supply_C=62.0)
+    a["pump_head_kPa"] = -1.0
+    b = circulation_balance(seg.copy(), t_supply_C=62.0)
+    assert b["pump_head_kPa"] > 0
+    assert CACHE.stats["src.calcs_circulation.circulation_balance"].hits >= hits0 + 1
+    assert "t_supply_C" in inspect.signature(circulation_balance).parameters
+
+def test_lru_bytes_and_single_flight():
+    cache = MemoCache(max_bytes=40_000)
+    calls = []
+
+    @memoize(cache=cache)
+    def block(n: int, scale: float = 1.0):
+        calls.append(n)
+        time.sleep(0.05)
+        return np.full(1000, n * scale)
+
+    threads = [threading.Thread(target=block, args=(1,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == [1] and cache.summary()["hits"] == 7
+    for n in range(2, 12):
+        block(n)
+    s = cache.summary()
+    assert s["bytes"] <= cache.max_bytes and s["evictions"] > 0
+    block(11, scale=1.0)
+    assert calls.count(11) == 1
+
+def test_memo_disabled_is_local_to_the_thread():
+    cache = MemoCache(max_bytes=40_000)
+    calls = []
+
+    @memoize(cache=cache)
+    def square(n: int):
+        calls.append(n)
+        return n * n
+
+    square(3)
+    inside, outside = threading.Event(), threading.Event()
+
+    def other_session():
+        inside.wait()
+        square(3)
+        outside.set()
+
+    t = threading.Thread(target=other_session)
+    t.start()
+    with memo_disabled(cache):
+        inside.set()
+        outside.wait()
+        square(3)
+    t.join()
+    square(3)
+    # Only the call inside the block recomputed; the concurrent one still hit the cache
+    assert calls == [3, 3] and cache.summary()["hits"] == 2
@@ -0,0 +1,56 @@
+
+import pytest
+
+from src.api import call_batch
+from src.batch import presize_records
+from src.export import column_kind
+from src.models import PROJECTS, ProjectInputs, validate_each
+from src.project_model import INPUTS, ProjectModel
+
+
+def test_project_rows_validate_in_one_call_and_feed_the_model():
+    rows = [
+        {"id": "a", "area_above_m2": "12000", "floors_above": "6.0", "auto_occupancy": "no", "persons_manual": "450",
+         "area_below_m2": "", "vent_cat": "Cat I", "unknown": "x"},
+        {"id": "b", "area_above_m2": "-5", "floors_above": "2.5"},
+        {"id": "c", "vent_cat": "Cat IV"},
+        {"id": "d"},
+    ]
+    a, b, c, d = validate_each(PROJECTS, rows)
+    assert (a.area_above_m2, a.floors_above, a.auto_occupancy, a.persons_manual, a.area_below_m2) == (12000.0, 6, False, 450, 0.0)
+    assert isinstance(b, ValueError) and "area_above_m2" in str(b) and "floors_above" in str(b)
+    assert isinstance(c, ValueError) and "vent_cat" in str(c)
+    assert d.model_dump() == INPUTS == ProjectInputs().model_dump()
+
+    m = ProjectModel(a)
+    assert m["persons"] == 450 and m["area_total_m2"] == 12000.0
+    m.set(floors_above="4")
+    assert m["floors_above"] == 4 and m["roof_area_m2"] == 3000.0
+    with pytest.raises(ValueError, match="area_above_m2"):
+        m.set(area_above_m2=-1.0)
+    assert m["area_above_m2"] == 12000.0
+
+    out = presize_records([{"row": i, "raw": r} for i, r in enumerate(rows)])
+    assert [bool(r["error"]) for r in out] == [False, True, True, False]
+    assert out[1]["error"].startswith("ValueError: area_above_m2") and out[0]["persons"] == 450
+    assert [column_kind(c) for c in ("row", "id", "persons", "fire_alarm", "fire_reasons", "hvac_heating_kw")] == \
+        ["int", "str", "int", "bool", "list", "float"]
+
+
+def test_api_arguments_are_validated_per_batch_from_signatures():
+    demand = call_batch("compute_demand", [
+        {"loads": [{"name": "Lighting", "kw": "40", "simultaneity": 0.9}, {"name": "Lifts", "kw": 30, "simultaneity": "0.5"}]},
+        {"loads": [{"name": "Bad", "kw": -1, "simultaneity": 1.5}]},
+    ])
+    assert demand[0][0] == pytest.approx(40 * 0.9 + 30 * 0.5)
+    assert demand[1].status == 400 and "loads.0.kw" in str(demand[1]) and "loads.0.simultaneity" in str(demand[1])
+
+    feeders = call_batch("size_feeder", [{"p_dem_kw": "120", "length_m": 80}, {"p_dem_kw": 120, "pf": 0}, {"kw": 1}, [1]])
+    assert feeders[0]["Section_mm2"] > 0 and [f.status for f in feeders[1:]] == [400, 400, 400]
+
+    flows = call_batch("peak_flow_lps", [{"fixtures": {"Washbasin": "10", "Shower": 4}, "simultaneity": 0.5},
+                                          {"fixtures": {"Washbasin": 1.5}, "simultaneity": 0.5}])
+    assert flows[0]["q_peak_lps"] == pytest.approx((10 * 0.07 + 4 * 0.15) * 0.5) and flows[1].status == 400
+
+    vent = call_batch("estimate_ventilation_flow_m3h", [{"area_m2": "1000", "persons": 50, "vent_cat": "Cat II"}])[0]
+    assert vent["q_m3h"] == pytest.approx((50 * 7.0 + 1000 * 0.7) * 3.6)
@@ -0,0 +1,53 @@
+
+import json
+
+from src import profiling
+
+
+def test_disabled_profiling_leaves_functions_untouched(monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLED", False)
+
+    def f(x):
+        return x + 1
+
+    ns = {"__name__": "m", "f": f}
+    profiling.profile_functions(ns)
+    assert profiling.profiled(f) is f and ns["f"] is f
+    assert profiling.span("x") is profiling.span("y")
+    profiling.begin_rerun("page")
+    assert profiling.end_rerun() is None
+
+
+def test_rerun_record_counts_calls_self_time_and_logs_percentiles(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    monkeypatch.setattr(profiling, "TRACE_ALLOC", False)
+    monkeypatch.setattr(profiling, "RECENT", profiling.defaultdict(lambda: profiling.deque(maxlen=10)))
+
+    def fact(n):
+        return 1 if n <= 1 else n * fact(n - 1)
+
+    def inner():
+        return [0] * 1000
+
+    ns = {"__name__": __name__, "fact": fact, "inner": inner, "_private": inner}
+    profiling.profile_functions(ns)
+    fact = ns["fact"]
+    assert ns["_private"] is inner and ns["inner"] is not inner
+
+    log = tmp_path / "profile.jsonl"
+    for _ in range(3):
+        profiling.begin_rerun("2_HVAC")
+        with profiling.span("build"):
+            fact(10)
+            ns["inner"]()
+            ns["inner"]()
+        rec = profiling.end_rerun(log)
+    funcs = {k.rpartition(".")[2]: v for k, v in rec["functions"].items()}
+    assert funcs["fact"]["calls"] == 1 and funcs["inner"]["calls"] == 2
+    assert funcs["build"]["self_ms"] <= funcs["build"]["ms"]
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert len(lines) == 3 and lines[0]["page"] == "2_HVAC"
+    out = profiling.log_summary(log)
+    assert out["pages"].iloc[0]["reruns"] == 3 and out["pages"].iloc[0]["p95_ms"] >= out["pages"].iloc[0]["p50_ms"]
+    assert len(out["functions"]) == 3 and out["functions"]["function"].str.startswith("test_profiling.").sum() == 2
+    assert list(profiling.recent_summary()["page"]) == ["2_HVAC"]
@@ -0,0 +1,35 @@
+
+from src.project_model import ProjectModel
+from src.project_presizing import (
+    estimate_electrical_loads, estimate_hvac_capacities, estimate_hvac_electrical_kw, estimate_ventilation_flow_m3h,
+    load_use_profiles,
+)
+
+
+def test_vent_category_invalidates_the_ventilation_chain_only():
+    m = ProjectModel({"use_type": "Office", "area_above_m2": 5000.0})
+    for name in m.nodes:
+        m[name]
+    cooling = m["hvac_capacities"]["cooling_kw"]
+    stale = m.set(vent_cat="Cat I")
+    assert stale == {"ventilation", "hvac_capacities", "hvac_electrical", "electrical_loads", "electrical_connected_kw"}
+    m["ventilation"], m["hvac_capacities"], m["electrical_loads"], m["lifts"]
+    assert m.recomputed["ventilation"] == 2 and m.recomputed["electrical_loads"] == 2
+    assert m.recomputed["lifts"] == 1 and m.recomputed["allowances"] == 1
+    # More outdoor air -> more cooling -> more HVAC electrical load
+    assert m["hvac_capacities"]["cooling_kw"] > cooling
+    assert m["electrical_loads"]["hvac_kw"] == m["hvac_electrical"][0]
+
+
+def test_area_change_propagates_and_matches_direct_calls():
+    m = ProjectModel({"use_type": "Office", "area_above_m2": 5000.0})
+    m["electrical_connected_kw"]
+    assert m.set(area_above_m2=5000.0) == set()
+    m.set(area_above_m2=8000.0)
+    prof = load_use_profiles()["Office"]
+    vent = estimate_ventilation_flow_m3h(8000.0, m["persons"], "Cat II")
+    cooling = estimate_hvac_capacities(8000.0, prof, design_temp_C=m["design_temp_C"], ventilation=vent)["cooling_kw"]
+    direct = estimate_electrical_loads(8000.0, prof, hvac_kw=estimate_hvac_electrical_kw(8000.0, prof, cooling_kw=cooling)[0])
+    assert m["electrical_loads"] == direct
+    assert abs(m["electrical_connected_kw"] - sum(direct.values())) < 1e-9
+    assert "persons" in m.descendants(["area_above_m2"])
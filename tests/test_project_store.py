@@ -0,0 +1,34 @@
+
+from src.project_model import INPUTS
+from src.project_store import ProjectStore, _synthetic_rows
+
+
+def test_save_writes_only_changed_fields(tmp_path):
+    with ProjectStore(tmp_path / "p.sqlite") as store:
+        pid, _ = store.save({**INPUTS, "city": "Munich", "area_above_m2": 24000.0}, name="Tower")
+        first = store.query(after_id=pid - 1, limit=1)[0]
+        assert first["city"] == "Munich" and first["elec_demand_w_m2"] > 0 and first["fire_reasons"]
+
+        assert store.save(store.load(pid), project_id=pid)[1] == []
+        assert store.save(store.load(pid), name="Tower B", project_id=pid)[1] == ["name"]
+
+        changed = store.save({**store.load(pid), "design_summer_C": 35.0}, project_id=pid)[1]
+        assert "design_summer_C" in changed and "hvac_cooling_kw" in changed
+        assert "city" not in changed and "water_peak_lps" not in changed and "rain_flow_lps" not in changed
+        assert store.load(pid)["design_summer_C"] == 35.0 and store.load(pid)["name"] == "Tower B"
+
+
+def test_bulk_insert_indexed_queries_and_batched_loading(tmp_path):
+    with ProjectStore(tmp_path / "p.sqlite") as store:
+        assert store.bulk_insert(_synthetic_rows(3000), chunk_size=700) == 3000
+        rows = store.query(["name", "area_total_m2", "elec_demand_w_m2"], city="Munich", use_type="Office", min_area=20_000)
+        assert rows and all(r["area_total_m2"] >= 20_000 for r in rows)
+        assert len(rows) == store.count(city="Munich", use_type="Office", min_area=20_000)
+        plan = " ".join(str(r) for r in store.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM projects WHERE city = ? AND use_type = ? AND area_total_m2 >= ?",
+            ("Munich", "Office", 20_000)))
+        assert "ix_projects_city_use_area" in plan
+
+        batches = list(store.iter_batches(batch_size=400, columns=["name"], min_area=10_000))
+        ids = [r["id"] for b in batches for r in b]
+        assert len(batches[0]) == 400 and ids == sorted(set(ids)) and len(ids) == store.count(min_area=10_000)
@@ -0,0 +1,27 @@
+
+import numpy as np
+from src.rainfall_grid import write_rain_grid, load_rain_grid
+from src.project_presizing import estimate_rain_flow_lps, estimate_rain_flows_lps
+
+def _grid(tmp_path):
+    # 2 x 3 cells of 0.1°, r doubles per cell index
+    base = np.array([[300.0, 400.0], [150.0, 200.0]])  # D=5,15 x T=2,10
+    r = np.stack([base * (1 + i) for i in range(6)])
+    write_rain_grid(tmp_path, r, [5, 15], [2, 10], {"lon0": 13.0, "lat0": 52.0, "dlon": 0.1, "dlat": 0.1, "nrows": 2, "ncols": 3},
+                    postcodes={"10115": (52.15, 13.25)})
+    return load_rain_grid(tmp_path)
+
+def test_rain_grid_lookup(tmp_path):
+    g = _grid(tmp_path)
+    assert g.cells([52.05, 52.15], [13.05, 13.25]).tolist() == [0, 5]
+    assert abs(g.intensity(52.05, 13.05, 5, 2) - 300.0) < 1e-3
+    # log-log interpolation stays between tabulated values
+    r = g.intensity(52.05, 13.05, 10, 5)
+    assert 150.0 < r < 400.0
+
+def test_rain_flow_from_location(tmp_path):
+    g = _grid(tmp_path)
+    q = estimate_rain_flow_lps(10000.0, runoff_coeff=1.0, location="10115", duration_min=5, return_period_a=2, grid=g)
+    assert abs(q - 1800.0) < 1e-2
+    qs = estimate_rain_flows_lps([10000.0, 5000.0], [52.05, 52.15], [13.05, 13.25], 5, 2, 1.0, grid=g)
+    assert np.allclose(qs, [300.0, 900.0], rtol=1e-5)
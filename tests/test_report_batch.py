@@ -0,0 +1,44 @@
+
+import pandas as pd
+from pypdf import PdfReader
+
+from src.report_batch import build_reports, project_report, table_source_ids
+from src.reporting import build_pdf
+
+
+def _reports(changed_rows: int = 0):
+    out = []
+    for i in range(3):
+        loads = pd.DataFrame({"Circuit": [f"C{j}" for j in range(120)], "P [kW]": [j * 0.1 for j in range(120)]})
+        if i == 0 and changed_rows:
+            loads.loc[:changed_rows - 1, "P [kW]"] += 1.0
+        fixed = pd.DataFrame({"Item": ["Sprinkler"], "Required": [i % 2 == 0]})
+        out.append({"name": f"P/{i}", "executive": {"Project": i}, "source_ids": ["DIN_VDE"],
+                    "tables": [{"title": "Loads", "df": loads}, {"title": "Fire", "df": fixed}]})
+    return out
+
+
+def test_batch_reports_match_single_report_pagination(tmp_path):
+    stats = build_reports(_reports(), tmp_path / "out", workers=1)
+    # 3 executives, 1 shared loads table, 2 distinct fire tables, 1 shared sources page
+    assert stats["reports"] == 3 and stats["rendered"] == 7 and stats["reused"] == 5
+    r = _reports()[0]
+    build_pdf(str(tmp_path / "single.pdf"), r["executive"], r["tables"], r["source_ids"])
+    batch, single = PdfReader(str(tmp_path / "out" / "P_0.pdf")), PdfReader(str(tmp_path / "single.pdf"))
+    assert len(batch.pages) == len(single.pages) == stats["pages"] // 3
+    assert "Page 2" in batch.pages[1].extract_text() and "C0" in batch.pages[1].extract_text()
+
+
+def test_rebuild_renders_only_changed_sections(tmp_path):
+    build_reports(_reports(), tmp_path, workers=1)
+    again = build_reports(_reports(), tmp_path, workers=1)
+    assert again["unchanged"] == 3 and again["rendered"] == 0 and again["pages"] == 0
+    edited = build_reports(_reports(changed_rows=5), tmp_path, workers=1)
+    assert edited["unchanged"] == 2 and edited["rendered"] == 1 and edited["reused"] == 3
+
+
+def test_project_report_cites_the_reported_disciplines():
+    r = project_report({"id": "P1"})
+    assert set(table_source_ids(("HVAC",))) < set(r["source_ids"])
+    assert "VDS_DIN14675" in r["source_ids"] and "VDS_DIN14675" not in table_source_ids(("Electrical (LV)", "HVAC"))
+    assert project_report({"id": "P1"}, source_ids=[])["source_ids"] == []
@@ -0,0 +1,45 @@
+
+import re
+
+import pandas as pd
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from src.reporting import ROW_HEIGHT, build_pdf, table_flowables
+
+
+def _schedule(n: int) -> pd.DataFrame:
+    return pd.DataFrame({"Circuit": [f"UV-{i}" for i in range(n)], "P [kW]": [i * 0.5 for i in range(n)],
+                         "Note": ["a very long description that cannot fit in its column " * 3] * n})
+
+
+def test_tables_are_page_sized_with_header_on_every_chunk():
+    page_h = 50 * ROW_HEIGHT
+    tables = list(table_flowables(_schedule(230), avail_w=500, first_h=20 * ROW_HEIGHT, page_h=page_h, chunk_rows=64))
+    bodies = [len(t._cellvalues) - 1 for t in tables]
+    assert bodies == [19, 49, 49, 49, 49, 15] and sum(bodies) == 230
+    assert all(t._cellvalues[0][0] == "Circuit" and t.repeatRows == 1 for t in tables)
+    assert tables[-1]._cellvalues[-1][0] == "UV-229"
+    note_w = tables[0]._argW[2]
+    assert all(row[2].endswith("…") and stringWidth(row[2], "Helvetica", 7) < note_w for row in tables[0]._cellvalues[1:])
+
+
+def test_build_pdf_keeps_every_row_and_accepts_chunk_iterables(tmp_path):
+    df = _schedule(1200)
+    whole, chunked = tmp_path / "whole.pdf", tmp_path / "chunked.pdf"
+    build_pdf(str(whole), {"Rows": len(df)}, [{"title": "Load schedule", "df": df}], ["DIN_VDE"])
+    chunks = (df.iloc[i:i + 100] for i in range(0, len(df), 100))
+    build_pdf(str(chunked), {"Rows": len(df)}, [{"title": "Load schedule", "df": chunks}], [])
+    pages = [len(re.findall(rb"/Type /Page\b", p.read_bytes())) for p in (whole, chunked)]
+    # summary + ceil(1200 rows / ~75 per page) + sources
+    assert pages[0] == pages[1] and pages[0] >= 2 + 1200 // 80
+
+
+def test_wide_columns_are_capped_and_cells_clipped_by_glyph_width():
+    df = pd.DataFrame({"A": ["x"], "B": ["y"], "Wide": ["W" * 300], "Narrow text": ["i" * 300]})
+    t = next(table_flowables(df, avail_w=400, first_h=10 * ROW_HEIGHT, page_h=10 * ROW_HEIGHT))
+    assert t._argW[0] == t._argW[1] == 12 * mm and abs(sum(t._argW) - 400) < 1e-6
+    wide, narrow = t._cellvalues[1][2:]
+    assert all(stringWidth(c, "Helvetica", 7) <= t._argW[2] - 4 for c in (wide, narrow))
+    # Narrow glyphs fill the same width with more characters than the average-width estimate allowed
+    assert len(narrow) > 2 * len(wide)
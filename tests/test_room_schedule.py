@@ -0,0 +1,86 @@
+
+import io
+import zipfile
+
+import pytest
+
+from src.room_schedule import RoomSchedule, map_columns, storey_level
+
+CSV = """Raum;Geschoss;Zone;Nutzung;Fläche (m²);Personen
+R1;UG;A;Parking;500,0;
+R2;EG;A;office;120,5;
+R3;EG;B;Retail;200;12
+R4;1.OG;A;Office;100;
+R5;1.OG;A;Corridor;40;
+R6;2.OG;A;Office;n/a;
+R7;;A;Office;10;
+"""
+
+
+def _schedule(text):
+    s = RoomSchedule()
+    return s, s.import_file(io.BytesIO(text.encode("utf-8")), name="rooms.csv", chunk_size=2)
+
+
+def test_csv_rollup_validation_and_incremental_reimport():
+    assert [storey_level(x) for x in ("EG", "1.OG", "OG3", "UG2", "B1", "Level 4", "-1", "DG")] == [0, 1, 3, -2, -1, 4, -1, None]
+    with pytest.raises(ValueError, match="area_m2"):
+        map_columns(["Room", "Storey"])
+
+    s, stats = _schedule(CSV)
+    assert (stats.rows, stats.validated, stats.invalid, stats.chunks) == (7, 7, 2, 4)
+    assert [e[1:] for e in stats.errors] == [("R6", "area is not a number"), ("R7", "storey missing")]
+    storeys = s.storeys().set_index("storey")
+    assert list(storeys.index) == ["UG", "EG", "1.OG"]
+    assert storeys.loc["EG", "area_m2"] == 320.5 and storeys.loc["EG", "persons"] == pytest.approx(12.05 + 12)
+    assert storeys.loc["1.OG", "persons"] == 10            # corridor: no profile, no persons
+    inputs = s.project_inputs()
+    assert inputs == {"use_type": "Office", "area_above_m2": 460.5, "area_below_m2": 500.0, "floors_above": 2,
+                      "floors_below": 1, "auto_occupancy": False, "persons_manual": 44}
+
+    edited = CSV.replace("R4;1.OG;A;Office;100;", "R4;1.OG;A;Office;150;").replace("R5;1.OG;A;Corridor;40;\n", "")
+    edited += "R8;2.OG;B;Office;80;\n"
+    stats = s.import_file(io.BytesIO(edited.encode("utf-8")), name="rooms.csv")
+    assert (stats.unchanged, stats.validated, stats.removed, stats.invalid) == (5, 2, 2, 2)
+    fresh, _ = _schedule(edited)
+    assert s.groups == fresh.groups and s.rooms == 5
+
+
+def _xlsx(rows):
+    shared = sorted({c for r in rows for c in r if isinstance(c, str)})
+    def cell(i, j, v):
+        ref = f"{'ABCDEF'[j]}{i + 1}"
+        if isinstance(v, str):
+            return f'<c r="{ref}" t="s"><v>{shared.index(v)}</v></c>'
+        return f'<c r="{ref}"><v>{v}</v></c>'
+    sheet = "".join(f'<row r="{i + 1}">' + "".join(cell(i, j, v) for j, v in enumerate(r) if v != "") + "</row>"
+                    for i, r in enumerate(rows))
+    ns = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("xl/sharedStrings.xml", f"<sst {ns}>" + "".join(f"<si><t>{s}</t></si>" for s in shared) + "</sst>")
+        z.writestr("xl/worksheets/sheet1.xml", f"<worksheet {ns}><sheetData>{sheet}</sheetData></worksheet>")
+    buf.seek(0)
+    return buf
+
+
+def test_xlsx_import_matches_csv_and_feeds_zone_estimates():
+    rows = [["Room", "Storey", "Zone", "Use", "Area", "Persons"],
+            ["R1", "EG", "A", "Office", 120.5, ""], ["R2", "EG", "B", "Retail", 200, 12],
+            ["R3", "OG1", "A", "Office", 100, ""]]
+    s = RoomSchedule()
+    stats = s.import_file(_xlsx(rows), name="rooms.xlsx")
+    assert stats.rows == 3 and stats.invalid == 0
+    csv_text = "\n".join(",".join(str(c) for c in r) for r in rows) + "\n"
+    assert s.groups == _schedule(csv_text)[0].groups
+
+    est = s.zone_estimates(vent_cat="Cat II").set_index(["storey", "zone"])
+    assert list(est.index) == [("EG", "A"), ("EG", "B"), ("OG1", "A")]
+    assert est.loc[("EG", "B"), "main_use"] == "Retail" and est.loc[("EG", "B"), "persons"] == 12
+    assert (est[["heating_kw", "cooling_kw", "outdoor_air_m3h", "electrical_kw"]] > 0).all().all()
+
+
+def test_thousands_separators():
+    s, stats = _schedule("Raum;Geschoss;Fläche\nH1;EG;1.234\nH2;EG;1.234,50\nH3;1.OG;1.5\nH4;1.OG;2,5\n")
+    assert stats.invalid == 0
+    assert s.storeys().set_index("storey")["area_m2"].to_dict() == {"EG": 2468.5, "1.OG": 4.0}
@@ -0,0 +1,42 @@
+
+from src.project_model import INPUTS
+from src.scenarios import PMap, ScenarioTree, SharedResults, compare
+
+
+def test_pmap_versions_share_structure_and_undo_redo_branches():
+    base = PMap({i: i for i in range(500)})
+    edited = base.set(7, -1).set(600, 1)
+    assert base[7] == 7 and edited[7] == -1 and len(edited) == 501 and 600 not in base
+    assert base.set(7, 7) is base and edited.diff(base) == {7: (-1, 7), 600: (1, None)}
+    shared = {id(o) for o in base.trie_objects()} & {id(o) for o in edited.trie_objects()}
+    assert len(shared) > 0.9 * sum(1 for _ in base.trie_objects())
+
+    tree = ScenarioTree({"area_above_m2": 12000.0})
+    assert not tree.record(dict(tree.state()))
+    tree.record({"vent_cat": "Cat I"})
+    tree.branch("Hot summer")
+    tree.record({"design_summer_C": 36.0})
+    assert tree.diff("Base", "Hot summer") == {"design_summer_C": (32.0, 36.0)}
+    assert tree.undo()["design_summer_C"] == 32.0 and tree.can_redo()
+    assert tree.redo()["design_summer_C"] == 36.0
+    assert tree.switch("Base")["vent_cat"] == "Cat I" and tree.undo()["vent_cat"] == INPUTS["vent_cat"]
+    mem = tree.memory()
+    assert mem["versions"] == 4 and mem["bytes"] < mem["bytes_as_copies"] / 2
+
+
+def test_comparison_computes_shared_subtrees_once():
+    tree = ScenarioTree()
+    for t in (34.0, 36.0, 38.0):
+        tree.branch(f"{t:.0f} °C", source="Base")
+        tree.record({"design_summer_C": t})
+    results = SharedResults()
+    compare(tree, ["Base"], results=results)
+    base_misses = results.misses
+    df = compare(tree, results=results)
+    assert list(df.columns) == ["Result", "Unit", "Base", "34 °C", "36 °C", "38 °C"]
+    row = df.set_index("Result")
+    assert row.loc["Persons", "Base"] == row.loc["Persons", "38 °C"]
+    assert row.loc["Cooling capacity", "38 °C"] > row.loc["Cooling capacity", "Base"]
+    # Summer temperature only feeds HVAC capacities / electrical and the electrical totals
+    assert results.misses - base_misses == 3 * 4
+    assert results.get(tree.state("Base"), "ventilation") is results.get(tree.state("38 °C"), "ventilation")
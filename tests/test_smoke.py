@@ -0,0 +1,22 @@
+
+import pandas as pd
+from src.calcs_smoke import building_storeys, smoke_control, leakage_flow_m3s
+from src.project_presizing import estimate_tech_rooms_and_shafts
+
+def test_tower_storeys_and_stairs():
+    storeys = building_storeys(60000, 6000, 60, 2)
+    stairs = pd.DataFrame({"stair": ["S1", "S2"], "from_storey": [0, 2], "doors_per_storey": [1, 2]})
+    r = smoke_control(storeys, stairs)
+    assert len(r["storeys"]) == 62 and len(r["stairs"]) == 2
+    # Pressure criterion: 0.83 · ΣA · √50 over the served storeys
+    a1 = 62 * (0.01 + 0.005)
+    assert abs(r["stairs"]["Pressure criterion (m³/h)"].iloc[0] - leakage_flow_m3s(a1, 50.0) * 3600) < 1e-6
+    assert r["stairs"]["Storeys served"].tolist() == [62, 60]
+    assert r["stairs"]["Supply incl. allowance (m³/h)"].iloc[1] > r["stairs"]["Supply incl. allowance (m³/h)"].iloc[0]
+    assert r["extract_fan_m3h"] > 10000 and r["shaft_m2_per_floor"] > 0
+
+def test_fire_shafts_feed_allowances():
+    base = estimate_tech_rooms_and_shafts(10000, 8, {})
+    fire = estimate_tech_rooms_and_shafts(10000, 8, {}, fire_shafts_m2_per_floor=2.5)
+    assert fire["fire_shafts_m2"] == 20.0
+    assert abs(fire["shafts_m2"] - base["shafts_m2"] - 20.0) < 1e-9
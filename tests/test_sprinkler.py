@@ -0,0 +1,32 @@
+
+import numpy as np
+import pandas as pd
+from src.calcs_sprinkler import grid_network, solve_network, sprinkler_design, hazen_williams_bar
+
+def test_single_head_branch():
+    nodes = pd.DataFrame({"x": [0.0, 10.0], "y": [0.0, 0.0], "is_head": [False, True]})
+    pipes = pd.DataFrame({"from": [0], "to": [1], "length_m": [10.0], "d_mm": [25.0]})
+    r = sprinkler_design(nodes, pipes, source=0, hazard="OH1", area_per_head_m2=12.0, k_factor=80.0)
+    q = 5.0 * 12.0
+    p_head = (q / 80.0) ** 2
+    assert abs(r["design_area_heads"]["Pressure (bar)"].iloc[0] - p_head) < 1e-3
+    assert abs(r["supply_pressure_bar"] - p_head - hazen_williams_bar(q, 10.0, 25.0)) < 2e-3
+
+def test_looped_grid_remote_area():
+    nodes, pipes, src = grid_network(60, 50)
+    r = sprinkler_design(nodes, pipes, src, hazard="OH3", area_per_head_m2=12.0, k_factor=80.0)
+    assert len(r["design_area_heads"]) == 18
+    # Most remote head is far from the source; every design head reaches the required pressure
+    assert nodes.loc[r["remote_head"], "y"] > 40 * 3.5
+    assert r["design_area_heads"]["Pressure (bar)"].min() >= 0.5625 - 1e-3
+    assert r["flow_lpm"] >= 18 * 60.0
+
+def test_flow_continuity():
+    nodes, pipes, src = grid_network(6, 4)
+    k = np.where(nodes["is_head"], 80.0, 0.0)
+    rr = hazen_williams_bar(1.0, pipes["length_m"], pipes["d_mm"])
+    sol = solve_network(len(nodes), pipes["from"].to_numpy(), pipes["to"].to_numpy(), rr, src, 2.0, np.zeros(len(nodes)), k)
+    q = sol["q_pipe_lpm"]
+    net = np.bincount(pipes["to"], weights=q, minlength=len(nodes)) - np.bincount(pipes["from"], weights=q, minlength=len(nodes))
+    net[src] = 0.0
+    assert np.allclose(net, sol["q_head_lpm"], atol=1e-2)
@@ -0,0 +1,38 @@
+
+import pandas as pd
+import pytest
+from src.calcs_drainage import wastewater_flow_lps
+from src.calcs_wastewater import du_network
+from src.gravity_pipes import DN
+
+def test_wastewater_flow():
+    assert abs(wastewater_flow_lps(100, 0.5) - 5.0) < 1e-9
+
+def test_du_network_stack_and_collector():
+    seg = pd.DataFrame({"parent": [-1, 0, 1], "kind": ["collector", "stack", "branch"], "slope_pct": [1.0, 0, 2.0]})
+    fx = pd.DataFrame({"segment": [2, 2, 1], "fixture": ["Washbasin", "Shower (no plug)", "WC (6 L cistern)"], "count": [1, 1, 40]})
+    r = du_network(seg, fx, k=0.5)
+    df = r["segments"]
+    assert abs(r["sum_du"] - (0.5 + 0.6 + 80.0)) < 1e-9
+    # A single fixture governs a small branch: Qww not below its own DU
+    assert df["Qww (L/s)"][2] >= 0.6
+    # WCs force DN 100 on the stack and DN never shrinks towards the outlet
+    assert df["DN"][1] >= 100
+    assert df["DN"][0] >= df["DN"][1] >= df["DN"][2]
+
+def test_flows_beyond_the_tables_are_flagged():
+    seg = pd.DataFrame({"parent": [-1, 0], "kind": ["stack", "branch"], "q_cont_lps": [0.0, 100.0]})
+    r = du_network(seg, pd.DataFrame({"segment": [1], "fixture": ["Washbasin"], "count": [1]}))
+    assert [a.text[:2] for a in r["advisories"] if a.level == "danger"] == ["2 "]
+    assert list(r["segments"]["DN"]) == [DN[-1], DN[-1]]
+
+def test_parents_and_fixtures_are_segment_ids():
+    seg = pd.DataFrame({"parent": [-1, 0, 0, 2], "kind": ["collector", "stack", "stack", "branch"]})
+    fx = pd.DataFrame({"segment": [3], "fixture": ["WC (6 L cistern)"], "count": [4]})
+    df = du_network(seg.drop(index=1), fx)["segments"]
+    # Deleting stack 1 keeps branch 3 draining into stack 2 by id, not shifted to the next position
+    assert list(df["Segment"]) == [0, 2, 3] and list(df["ΣDU"]) == [8.0, 8.0, 8.0]
+    with pytest.raises(ValueError, match="segment\\(s\\) 3"):
+        du_network(seg.drop(index=2), fx)
+    with pytest.raises(ValueError, match="fixture segment"):
+        du_network(seg.drop(index=3), fx)